@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AreaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'area'
+
+    def ready(self):
+        from . import schematics  # noqa: F401 (đăng ký signal raster bản vẽ)
+        from . import rollups  # noqa: F401 (đăng ký signal vô hiệu cache số liệu cây)
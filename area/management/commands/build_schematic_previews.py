@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from area.models import FunctionalLocation
+from area.previews import MANIFEST_NAME, build_previews
+from area.schematics import is_pdf, preview_options, preview_path
+
+
+class Command(BaseCommand):
+    help = "Raster bản vẽ P&ID (PDF) của Khu vực thành ảnh thu nhỏ từng trang và tháp tile để xem nhanh."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Số tiến trình raster song song')
+        parser.add_argument('--force', action='store_true', help='Raster lại kể cả bản vẽ đã có ảnh xem trước')
+
+    def handle(self, *args, **options):
+        stats = {'skipped': 0, 'built': 0, 'failed': 0}
+        self.stdout.write(self.style.WARNING("🚀 RASTER BẢN VẼ KHU VỰC\n"))
+
+        # Gom theo hash: bản vẽ dùng chung cho nhiều khu vực chỉ raster một lần
+        jobs = {}
+        areas = FunctionalLocation.objects.filter(schematic_file__isnull=False).select_related('schematic_file')
+        for area in areas:
+            document = area.schematic_file
+            if not is_pdf(document):
+                continue
+            content_hash = document.get_file_hash()
+            if content_hash in jobs:
+                continue
+            if not options['force'] and os.path.exists(os.path.join(preview_path(content_hash), MANIFEST_NAME)):
+                stats['skipped'] += 1
+                jobs[content_hash] = None
+                continue
+            jobs[content_hash] = document
+
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {
+                pool.submit(build_previews, document.file.path, preview_path(content_hash), **preview_options()): document
+                for content_hash, document in jobs.items() if document
+            }
+            for future in as_completed(futures):
+                document = futures[future]
+                try:
+                    manifest = future.result()
+                except Exception as e:
+                    stats['failed'] += 1
+                    self.stdout.write(self.style.ERROR(f"   ❌ {document.title}: {e}"))
+                    continue
+                stats['built'] += 1
+                self.stdout.write(self.style.SUCCESS(f"   + {document.title}: {len(manifest['pages'])} trang"))
+
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT!"))
+        for key, value in stats.items():
+            self.stdout.write(f"   - {key}: {value}")
@@ -11,6 +11,8 @@ from wagtail.fields import RichTextField
 from wagtail.images import get_image_model_string
 from wagtail.documents import get_document_model_string
 
+from core.tts import schedule_audio_generation
+
 class FunctionalLocation(MP_Node, PreviewableMixin):
     """
     Model quản lý Khu vực / Hệ thống chức năng (Functional Location).
@@ -126,9 +128,14 @@ class FunctionalLocation(MP_Node, PreviewableMixin):
             color = "w-bg-positive-100" if has_file else "w-bg-grey-200"
             return f'<span class="w-w-2.5 w-h-2.5 w-rounded-full {color}" title="{lang}"></span>'
         
-        html = f'<div class="w-flex w-gap-1">{render_dot(bool(self.audio_vi), "VI")}{render_dot(bool(self.audio_en), "EN")}</div>'
+        html = f'<div class="w-flex w-gap-1">{render_dot(bool(self.audio_vi), "VI")}{render_dot(bool(self.audio_en), "EN")}{render_dot(bool(self.audio_cn), "CN")}</div>'
         return format_html(html)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Sinh audio TTS ở nền (chỉ khi bật TTS_AUTO_GENERATE và văn bản nguồn đã đổi)
+        schedule_audio_generation(self)
+
     def __str__(self):
         return f"{self.name} ({self.kks_code})" if self.kks_code else self.name
 
@@ -0,0 +1,131 @@
+"""
+Raster bản vẽ PDF thành ảnh thu nhỏ từng trang + tháp tile (tile pyramid) để xem/zoom trên trình duyệt.
+Module này KHÔNG import Django để có thể chạy trong process pool (spawn).
+
+Cấu trúc thư mục kết quả:
+    manifest.json
+    p<N>/thumb.webp
+    p<N>/<level>/<col>_<row>.webp    (level 0 vừa một tile, level cuối = độ phân giải đầy đủ)
+"""
+import json
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _render_pages_pymupdf(path, dpi, max_size):
+    # Phụ thuộc tùy chọn: pip install pymupdf
+    import pymupdf
+    from PIL import Image
+
+    with pymupdf.open(path) as pdf:
+        for page in pdf:
+            rect = page.rect
+            zoom = dpi / 72
+            longest = max(rect.width, rect.height) * zoom
+            if longest > max_size:
+                zoom *= max_size / longest
+            pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+            yield Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+
+
+def _render_pages_pdftoppm(path, dpi, max_size):
+    # Dự phòng: poppler-utils (apt install poppler-utils). Raster từng trang để không giữ cả tệp trong RAM.
+    from PIL import Image
+
+    binary = shutil.which('pdftoppm')
+    if not binary:
+        raise RuntimeError("Cần cài PyMuPDF (pip install pymupdf) hoặc poppler-utils (pdftoppm) để raster PDF.")
+    info = subprocess.run(['pdfinfo', path], capture_output=True, text=True, timeout=60)
+    page_count = 0
+    for line in info.stdout.splitlines():
+        if line.startswith('Pages:'):
+            page_count = int(line.split(':', 1)[1])
+    with tempfile.TemporaryDirectory() as tmp:
+        for number in range(1, page_count + 1):
+            prefix = os.path.join(tmp, 'page')
+            subprocess.run(
+                [binary, '-r', str(dpi), '-f', str(number), '-l', str(number),
+                 '-png', '-singlefile', path, prefix],
+                capture_output=True, timeout=600, check=True,
+            )
+            with Image.open(f"{prefix}.png") as image:
+                image = image.convert('RGB')
+            image.thumbnail((max_size, max_size))
+            yield image
+
+
+def render_pages(path, dpi=150, max_size=8192):
+    try:
+        import pymupdf  # noqa: F401
+    except ImportError:
+        return _render_pages_pdftoppm(path, dpi, max_size)
+    return _render_pages_pymupdf(path, dpi, max_size)
+
+
+def build_tiles(image, page_dir, tile_size=256, quality=80):
+    """Cắt tháp tile từ độ phân giải đầy đủ xuống mức vừa một tile. Trả về số level."""
+    from PIL import Image
+
+    levels = max(1, math.ceil(math.log2(max(image.width, image.height) / tile_size)) + 1)
+    current = image
+    for level in range(levels - 1, -1, -1):
+        level_dir = os.path.join(page_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        for row in range(math.ceil(current.height / tile_size)):
+            for col in range(math.ceil(current.width / tile_size)):
+                box = (col * tile_size, row * tile_size,
+                       min((col + 1) * tile_size, current.width), min((row + 1) * tile_size, current.height))
+                current.crop(box).save(os.path.join(level_dir, f"{col}_{row}.webp"), 'WEBP', quality=quality)
+        if level:
+            # Mỗi level nhỏ hơn một nửa: thu nhỏ từ level trước (nhanh hơn thu nhỏ từ ảnh gốc)
+            current = current.resize(
+                (max(1, math.ceil(current.width / 2)), max(1, math.ceil(current.height / 2))),
+                Image.LANCZOS,
+            )
+    return levels
+
+
+def build_previews(path, output_dir, dpi=150, max_size=8192, thumb_width=320, tile_size=256):
+    """
+    Raster toàn bộ PDF vào output_dir. Ghi ra thư mục tạm rồi đổi tên -> không bao giờ phục vụ kết quả dở dang.
+    Trả về manifest (dict).
+    """
+    parent = os.path.dirname(output_dir)
+    os.makedirs(parent, exist_ok=True)
+    work_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    try:
+        pages = []
+        for number, image in enumerate(render_pages(path, dpi=dpi, max_size=max_size), start=1):
+            page_dir = os.path.join(work_dir, f"p{number}")
+            os.makedirs(page_dir)
+            thumb = image.copy()
+            thumb.thumbnail((thumb_width, thumb_width * 4))
+            thumb.save(os.path.join(page_dir, 'thumb.webp'), 'WEBP', quality=75)
+            levels = build_tiles(image, page_dir, tile_size=tile_size)
+            pages.append({
+                'number': number,
+                'width': image.width,
+                'height': image.height,
+                'levels': levels,
+                'thumb_width': thumb.width,
+                'thumb_height': thumb.height,
+            })
+            image.close()
+
+        manifest = {'version': MANIFEST_VERSION, 'tile_size': tile_size, 'format': 'webp', 'pages': pages}
+        with open(os.path.join(work_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        if os.path.isdir(output_dir):
+            shutil.rmtree(output_dir)
+        os.replace(work_dir, output_dir)
+        return manifest
+    finally:
+        if os.path.isdir(work_dir):
+            shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import tree_cache
+from .models import FunctionalLocation
+
+# Thay đổi ở các model này làm sai số liệu tổng hợp của cây khu vực
+ROLLUP_MODELS = {'area.FunctionalLocation', 'equipment.Equipment', 'details.EquipmentValue'}
+
+
+def compute_rollup(location):
+    """Số liệu tổng hợp cho cả nhánh (tính bằng tiền tố path của treebeard -> một truy vấn mỗi số)."""
+    from details.models import EquipmentValue
+    from equipment.models import Equipment
+
+    return {
+        'children': location.numchild,
+        'descendants': FunctionalLocation.objects.filter(
+            path__startswith=location.path, depth__gt=location.depth
+        ).count(),
+        'equipment': Equipment.objects.filter(location__path__startswith=location.path).count(),
+        'values': EquipmentValue.objects.filter(equipment__location__path__startswith=location.path).count(),
+    }
+
+
+def get_rollup(location):
+    # Khóa theo path (không theo id): di chuyển node đổi path -> tự lấy khóa mới
+    return tree_cache.get_or_set(f"rollup:{location.path}", lambda: compute_rollup(location))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_tree_rollups(sender, raw=False, **kwargs):
+    if raw or sender._meta.label not in ROLLUP_MODELS:
+        return
+    tree_cache.clear()
@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils._os import safe_join
+from wagtail import hooks
+from wagtail.documents import get_document_model
+
+from core.background import get_process_pool, run_in_background
+from core.media import serve_file
+from .models import FunctionalLocation
+from .previews import MANIFEST_NAME, build_previews
+
+logger = logging.getLogger(__name__)
+
+Document = get_document_model()
+
+# Ảnh xem trước lưu theo hash nội dung -> bản vẽ trùng nội dung (nhiều khu vực dùng chung) chỉ raster một lần.
+# Thư mục nằm ngoài MEDIA_ROOT (không phục vụ công khai qua MEDIA_URL): chỉ đi qua schematic_preview_file,
+# view kiểm tra quyền xem tài liệu gốc như view phục vụ tài liệu của Wagtail
+PREVIEW_DIR = 'previews/schematics'
+
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def preview_options():
+    return {
+        'dpi': getattr(settings, 'SCHEMATIC_PREVIEW_DPI', 150),
+        'max_size': getattr(settings, 'SCHEMATIC_PREVIEW_MAX_SIZE', 8192),
+    }
+
+
+def is_pdf(document):
+    return os.path.splitext(document.file.name)[1].lower() == '.pdf'
+
+
+def preview_root():
+    return str(getattr(settings, 'SCHEMATIC_PREVIEW_ROOT', settings.BASE_DIR / 'var' / PREVIEW_DIR))
+
+
+def preview_path(content_hash):
+    return os.path.join(preview_root(), content_hash)
+
+
+def preview_url(document, content_hash):
+    # Hash nằm trong URL -> tệp không bao giờ đổi nội dung, trình duyệt cache lâu dài
+    manifest_url = reverse('area_schematic_preview', args=[document.pk, content_hash, MANIFEST_NAME])
+    return manifest_url[:-len(MANIFEST_NAME)]
+
+
+# =========================================================
+# 1. ĐỌC KẾT QUẢ (Dùng ở trang chi tiết Khu vực)
+# =========================================================
+def get_schematic_preview(document):
+    """
+    Manifest ảnh xem trước của bản vẽ (kèm 'base_url'), hoặc None nếu chưa raster xong.
+    Chỉ dùng hash đã lưu: tài liệu cũ chưa có hash -> tính và raster ở nền, không đọc cả tệp trong request.
+    """
+    if not document or not is_pdf(document):
+        return None
+    if not document.file_hash:
+        run_in_background(build_schematic_preview_by_id, document.pk)
+        return None
+    try:
+        with open(os.path.join(preview_path(document.file_hash), MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    manifest['base_url'] = preview_url(document, document.file_hash)
+    return manifest
+
+
+def serve_schematic_preview(request, document, content_hash, path):
+    """
+    Phục vụ một tệp ảnh xem trước với cùng kiểm tra quyền như tài liệu gốc
+    (hook before_serve_document: giới hạn xem của collection, đăng nhập / mật khẩu).
+    """
+    if not document.file_hash or content_hash != document.file_hash:
+        raise Http404
+    for fn in hooks.get_hooks('before_serve_document'):
+        result = fn(document, request)
+        if isinstance(result, HttpResponse):
+            return result
+    try:
+        full_path = safe_join(preview_path(content_hash), path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    response = serve_file(request, full_path)
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+# =========================================================
+# 2. RASTER (Process pool, chạy nền)
+# =========================================================
+def build_schematic_preview(document, force=False):
+    """Raster bản vẽ nếu nội dung (hash) chưa có ảnh xem trước. Trả về True nếu có kết quả."""
+    if not is_pdf(document):
+        return False
+    content_hash = document.get_file_hash()
+    output_dir = preview_path(content_hash)
+    if not force and os.path.exists(os.path.join(output_dir, MANIFEST_NAME)):
+        return True
+
+    with _pending_lock:
+        if content_hash in _pending:
+            return False
+        _pending.add(content_hash)
+    try:
+        get_process_pool().submit(build_previews, document.file.path, output_dir, **preview_options()).result()
+        return True
+    except Exception as e:
+        logger.error(f"Schematic preview error for document {document.pk}: {e}")
+        return False
+    finally:
+        with _pending_lock:
+            _pending.discard(content_hash)
+
+
+def build_schematic_preview_by_id(document_id, force=False):
+    document = Document.objects.filter(pk=document_id).first()
+    if document:
+        build_schematic_preview(document, force=force)
+
+
+# =========================================================
+# 3. SIGNALS (Raster khi gán bản vẽ / tải lên phiên bản mới)
+# =========================================================
+@receiver(post_save, sender=FunctionalLocation)
+def preview_on_area_save(sender, instance, raw=False, **kwargs):
+    if raw or not instance.schematic_file_id:
+        return
+    run_in_background(build_schematic_preview_by_id, instance.schematic_file_id)
+
+
+@receiver(post_save, sender=Document)
+def preview_on_document_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and set(update_fields) <= {'file_hash', 'file_size'}):
+        return
+    if FunctionalLocation.objects.filter(schematic_file=instance).exists():
+        run_in_background(build_schematic_preview_by_id, instance.pk)
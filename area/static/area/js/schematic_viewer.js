@@ -0,0 +1,129 @@
+// area/static/area/js/schematic_viewer.js
+// Trình xem bản vẽ P&ID dạng tile (kéo để di chuyển, cuộn chuột / nút +- để zoom).
+// Chỉ tải các tile đang hiển thị ở level phù hợp -> không cần tải cả tệp PDF.
+(function () {
+    var dataEl = document.getElementById('schematic-preview-data');
+    var viewer = document.querySelector('[data-schematic-viewer]');
+    if (!dataEl || !viewer) return;
+
+    var manifest = JSON.parse(dataEl.textContent);
+    var stage = viewer.querySelector('[data-schematic-stage]');
+    var title = viewer.querySelector('[data-schematic-title]');
+    var tileSize = manifest.tile_size;
+    var page = null;
+    var scale = 1, minScale = 1, offsetX = 0, offsetY = 0;
+    var tiles = {};
+
+    function pickLevel() {
+        // Level nhỏ nhất vẫn đủ chi tiết cho mức zoom hiện tại
+        var top = page.levels - 1;
+        var level = top + Math.ceil(Math.log2(Math.max(scale, 1e-6)));
+        return Math.max(0, Math.min(top, level));
+    }
+
+    function render() {
+        var level = pickLevel();
+        var levelScale = Math.pow(2, level - (page.levels - 1));
+        var levelWidth = Math.ceil(page.width * levelScale);
+        var levelHeight = Math.ceil(page.height * levelScale);
+        var size = tileSize * scale / levelScale;
+        var rect = stage.getBoundingClientRect();
+        var colFrom = Math.max(0, Math.floor(-offsetX / size));
+        var colTo = Math.min(Math.ceil(levelWidth / tileSize) - 1, Math.floor((rect.width - offsetX) / size));
+        var rowFrom = Math.max(0, Math.floor(-offsetY / size));
+        var rowTo = Math.min(Math.ceil(levelHeight / tileSize) - 1, Math.floor((rect.height - offsetY) / size));
+
+        var wanted = {};
+        for (var row = rowFrom; row <= rowTo; row++) {
+            for (var col = colFrom; col <= colTo; col++) {
+                var key = level + '/' + col + '_' + row;
+                wanted[key] = true;
+                var img = tiles[key];
+                if (!img) {
+                    img = document.createElement('img');
+                    img.src = manifest.base_url + 'p' + page.number + '/' + key + '.' + manifest.format;
+                    img.draggable = false;
+                    img.style.position = 'absolute';
+                    img.style.maxWidth = 'none';
+                    stage.appendChild(img);
+                    tiles[key] = img;
+                }
+                var width = Math.min(tileSize, levelWidth - col * tileSize);
+                var height = Math.min(tileSize, levelHeight - row * tileSize);
+                img.style.left = (offsetX + col * size) + 'px';
+                img.style.top = (offsetY + row * size) + 'px';
+                img.style.width = (width * scale / levelScale) + 'px';
+                img.style.height = (height * scale / levelScale) + 'px';
+            }
+        }
+        Object.keys(tiles).forEach(function (key) {
+            if (!wanted[key]) {
+                stage.removeChild(tiles[key]);
+                delete tiles[key];
+            }
+        });
+    }
+
+    function fit() {
+        var rect = stage.getBoundingClientRect();
+        minScale = Math.min(rect.width / page.width, rect.height / page.height);
+        scale = minScale;
+        offsetX = (rect.width - page.width * scale) / 2;
+        offsetY = (rect.height - page.height * scale) / 2;
+        render();
+    }
+
+    function zoomAt(factor, x, y) {
+        var next = Math.max(minScale, Math.min(2, scale * factor));
+        offsetX = x - (x - offsetX) * next / scale;
+        offsetY = y - (y - offsetY) * next / scale;
+        scale = next;
+        render();
+    }
+
+    function open(number) {
+        page = manifest.pages[number - 1];
+        Object.keys(tiles).forEach(function (key) { stage.removeChild(tiles[key]); });
+        tiles = {};
+        title.textContent = 'Trang ' + page.number + ' / ' + manifest.pages.length;
+        viewer.hidden = false;
+        fit();
+        viewer.scrollIntoView({behavior: 'smooth', block: 'nearest'});
+    }
+
+    document.querySelectorAll('[data-schematic-page]').forEach(function (link) {
+        link.addEventListener('click', function (event) {
+            event.preventDefault();
+            open(parseInt(link.dataset.schematicPage, 10));
+        });
+    });
+
+    stage.addEventListener('wheel', function (event) {
+        event.preventDefault();
+        var rect = stage.getBoundingClientRect();
+        zoomAt(event.deltaY < 0 ? 1.25 : 0.8, event.clientX - rect.left, event.clientY - rect.top);
+    }, {passive: false});
+
+    var drag = null;
+    stage.addEventListener('pointerdown', function (event) {
+        drag = {x: event.clientX - offsetX, y: event.clientY - offsetY};
+        stage.setPointerCapture(event.pointerId);
+    });
+    stage.addEventListener('pointermove', function (event) {
+        if (!drag) return;
+        offsetX = event.clientX - drag.x;
+        offsetY = event.clientY - drag.y;
+        render();
+    });
+    stage.addEventListener('pointerup', function () { drag = null; });
+
+    viewer.querySelectorAll('[data-schematic-action]').forEach(function (button) {
+        button.addEventListener('click', function () {
+            var rect = stage.getBoundingClientRect();
+            var action = button.dataset.schematicAction;
+            if (action === 'fit') fit();
+            else if (action === 'close') viewer.hidden = true;
+            else zoomAt(action === 'in' ? 1.5 : 1 / 1.5, rect.width / 2, rect.height / 2);
+        });
+    });
+})();
@@ -1,3 +1,72 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from area.previews import MANIFEST_NAME
+from area.schematics import get_schematic_preview, preview_path, serve_schematic_preview
+
+CONTENT_HASH = 'a' * 40
+
+
+def fake_document(file_hash=CONTENT_HASH, restrictions=()):
+    """Đủ cho area.schematics + hook before_serve_document (giới hạn xem theo collection) mà không cần DB."""
+    return SimpleNamespace(
+        pk=5,
+        file=SimpleNamespace(name='documents/plan.pdf'),
+        file_hash=file_hash,
+        collection=SimpleNamespace(get_view_restrictions=lambda: list(restrictions)),
+    )
+
+
+class SchematicPreviewTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.enterContext(override_settings(SCHEMATIC_PREVIEW_ROOT=root.name))
+        page_dir = os.path.join(preview_path(CONTENT_HASH), 'p1')
+        os.makedirs(page_dir)
+        with open(os.path.join(page_dir, 'thumb.webp'), 'wb') as f:
+            f.write(b'RIFF-thumb')
+        with open(os.path.join(preview_path(CONTENT_HASH), MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump({'pages': [{'number': 1}], 'format': 'webp'}, f)
+
+    def serve(self, document, path='p1/thumb.webp', content_hash=CONTENT_HASH):
+        request = RequestFactory().get(f'/admin/area/schematics/5/{content_hash}/{path}')
+        return serve_schematic_preview(request, document, content_hash, path)
+
+    def test_manifest_points_at_permission_checked_view(self):
+        manifest = get_schematic_preview(fake_document())
+        self.assertEqual(manifest['base_url'], f'/admin/area/schematics/5/{CONTENT_HASH}/')
+        self.assertEqual(manifest['pages'], [{'number': 1}])
+
+    def test_missing_hash_is_computed_in_background(self):
+        document = fake_document(file_hash='')
+        with patch('area.schematics.run_in_background') as scheduled:
+            self.assertIsNone(get_schematic_preview(document))
+        scheduled.assert_called_once()
+        self.assertEqual(scheduled.call_args.args[1], 5)
+
+    def test_serves_tile_with_private_cache(self):
+        response = self.serve(fake_document())
+        self.addCleanup(response.close)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'RIFF-thumb')
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_view_restriction_of_document_applies(self):
+        restriction = SimpleNamespace(accept_request=lambda request: False, restriction_type='login')
+        response = self.serve(fake_document(restrictions=[restriction]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_rejects_other_hash_and_paths_outside_preview(self):
+        with self.assertRaises(Http404):
+            self.serve(fake_document(file_hash='b' * 40))
+        with self.assertRaises(Http404):
+            self.serve(fake_document(), path='../../secret.pdf')
+        with self.assertRaises(Http404):
+            self.serve(fake_document(), path='p2/thumb.webp')
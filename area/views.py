@@ -1,6 +1,7 @@
 # area/views.py
-from django.shortcuts import redirect
+from django.shortcuts import get_object_or_404, redirect
 from wagtail.admin import messages
+from wagtail.documents import get_document_model
 from django.utils.translation import gettext as _
 from django.core.paginator import Paginator
 from wagtail.snippets.views.snippets import (
@@ -20,6 +21,8 @@ from wagtail.snippets.views.snippets import (
 )
 
 from .models import FunctionalLocation
+from .rollups import get_rollup
+from .schematics import get_schematic_preview, serve_schematic_preview
 
 # === 1. INDEX VIEW (Danh sách) ===
 class FunctionalLocationIndexView(IndexView):
@@ -66,6 +69,12 @@ class FunctionalLocationInspectView(InspectView):
         req_copy = self.request.GET.copy()
         if 'p' in req_copy: del req_copy['p']
         context['current_query_string'] = req_copy.urlencode()
+
+        # 5. Ảnh xem trước bản vẽ P&ID (đã raster nền theo hash nội dung)
+        context['schematic_preview'] = get_schematic_preview(self.object.schematic_file)
+
+        # 6. Số liệu tổng hợp toàn nhánh (cache hai tầng, dùng chung giữa các worker)
+        context['rollup'] = get_rollup(self.object)
         
         return context
 
@@ -137,4 +146,9 @@ class FunctionalLocationPreviewOnCreate(PreviewOnCreate):
     pass
 
 class FunctionalLocationPreviewOnEdit(PreviewOnEdit):
-    pass
\ No newline at end of file
+    pass
+
+# === 4. ẢNH XEM TRƯỚC BẢN VẼ (Kiểm tra quyền như tài liệu gốc) ===
+def schematic_preview_file(request, document_id, content_hash, path):
+    document = get_object_or_404(get_document_model(), pk=document_id)
+    return serve_schematic_preview(request, document, content_hash, path)
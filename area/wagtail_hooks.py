@@ -3,7 +3,7 @@ from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet
 from wagtail.admin.ui.tables import UpdatedAtColumn
 from wagtail.admin.widgets.button import BaseButton
-from django.urls import reverse
+from django.urls import path, reverse
 from wagtail import hooks
 from django.utils.translation import gettext_lazy as _
 
@@ -22,7 +22,8 @@ from .views import (
     FunctionalLocationLockView,
     FunctionalLocationUnlockView,
     FunctionalLocationPreviewOnCreate,
-    FunctionalLocationPreviewOnEdit
+    FunctionalLocationPreviewOnEdit,
+    schematic_preview_file,
 )
 
 class FunctionalLocationViewSet(SnippetViewSet):
@@ -80,6 +81,13 @@ class FunctionalLocationViewSet(SnippetViewSet):
 
 register_snippet(FunctionalLocationViewSet)
 
+# Ảnh xem trước bản vẽ P&ID (qua view kiểm tra quyền, không dùng MEDIA_URL công khai)
+@hooks.register('register_admin_urls')
+def register_area_urls():
+    return [
+        path('area/schematics/<int:document_id>/<str:content_hash>/<path:path>', schematic_preview_file, name='area_schematic_preview'),
+    ]
+
 # 2. GOM NHÓM (Construct)
 @hooks.register('construct_snippet_listing_buttons')
 def construct_custom_snippet_buttons(buttons, snippet, user, context=None):
@@ -1,15 +1,24 @@
 import json
+import time
 import requests
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
-def get_best_prompt(prompt_type, app_name=None):
+from core import metrics, perf
+
+def _lookup_prompt(prompt_type, app_name=None):
     from core.models import AIPrompt
     if app_name:
         prompt = AIPrompt.objects.filter(prompt_type=prompt_type, scope='app', target_app=app_name, is_active=True).first()
         if prompt: return prompt.content
     prompt = AIPrompt.objects.filter(prompt_type=prompt_type, scope='system', is_active=True).first()
     if prompt: return prompt.content
+    return None
+
+def get_best_prompt(prompt_type, app_name=None):
+    from core.cache import prompt_cache
+    content = prompt_cache.get_or_set(f"{prompt_type}:{app_name or ''}", lambda: _lookup_prompt(prompt_type, app_name))
+    if content: return content
     
     # CẬP NHẬT PROMPT: Thêm ràng buộc Output chặt chẽ hơn cho SEA languages
     default_prompts = {
@@ -43,143 +52,196 @@ def get_best_prompt(prompt_type, app_name=None):
     }
     return default_prompts.get(prompt_type, "")
 
-def call_gemini_api(prompt_text):
-    api_key = getattr(settings, 'GEMINI_API_KEY', '')
+DEFAULT_GEMINI_API_BASE = "https://generativelanguage.googleapis.com"
+# Mã lỗi tạm thời: gọi lại sau một khoảng chờ (429 = bị giới hạn tần suất)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+def gemini_url(base_url=None):
+    """URL generateContent; GEMINI_API_BASE trỏ được sang máy chủ giả lập (manage.py ai_stub_server)."""
+    base = (base_url or getattr(settings, 'GEMINI_API_BASE', DEFAULT_GEMINI_API_BASE)).rstrip('/')
+    model = getattr(settings, 'GEMINI_MODEL', 'gemini-2.5-pro')
+    return f"{base}/v1beta/models/{model}:generateContent"
+
+def _retry_delay(attempt, response=None):
+    # Ưu tiên Retry-After của máy chủ, nếu không có thì chờ lũy thừa: 1s, 2s, 4s...
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), 60)
+        except ValueError:
+            pass
+    return getattr(settings, 'GEMINI_RETRY_BACKOFF', 1.0) * (2 ** attempt)
+
+def _clean_response_text(text):
+    # --- POST-PROCESSING (Hậu xử lý để làm sạch kết quả) ---
+    # 1. Loại bỏ các tiền tố phổ biến
+    prefixes_to_remove = [
+        "Translation:", "Translated text:", "Output:", "Result:", 
+        "Chinese:", "Vietnamese:", "English:", "Pinyin:", "Filipino:", "Tagalog:"
+    ]
+    for prefix in prefixes_to_remove:
+        if text.lower().startswith(prefix.lower()):
+            text = text[len(prefix):].strip()
+    
+    # 2. Loại bỏ dấu ngoặc kép
+    if text.startswith('"') and text.endswith('"'):
+        text = text[1:-1].strip()
+        
+    # 3. Loại bỏ tiếng Anh còn sót lại (chỉ lấy phần sau dấu hai chấm nếu có)
+    if ':' in text:
+        parts = text.split(':')
+        text = parts[-1].strip()
+
+    return text
+
+def call_gemini_api(prompt_text, prompt_type=None, base_url=None, api_key=None):
+    api_key = api_key or getattr(settings, 'GEMINI_API_KEY', '')
     if not api_key: return None
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-pro:generateContent?key={api_key}"
+    url = f"{gemini_url(base_url)}?key={api_key}"
     headers = {'Content-Type': 'application/json'}
     payload = {"contents": [{"parts": [{"text": prompt_text}]}]}
+    timeout = getattr(settings, 'GEMINI_TIMEOUT', 10)
+    max_retries = getattr(settings, 'GEMINI_MAX_RETRIES', 2)
+    started = time.perf_counter()
+    error = None
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        if response.status_code == 200:
-            text = response.json()['candidates'][0]['content']['parts'][0]['text'].strip()
-            
-            # --- POST-PROCESSING (Hậu xử lý để làm sạch kết quả) ---
-            # 1. Loại bỏ các tiền tố phổ biến
-            prefixes_to_remove = [
-                "Translation:", "Translated text:", "Output:", "Result:", 
-                "Chinese:", "Vietnamese:", "English:", "Pinyin:", "Filipino:", "Tagalog:"
-            ]
-            for prefix in prefixes_to_remove:
-                if text.lower().startswith(prefix.lower()):
-                    text = text[len(prefix):].strip()
-            
-            # 2. Loại bỏ dấu ngoặc kép
-            if text.startswith('"') and text.endswith('"'):
-                text = text[1:-1].strip()
-                
-            # 3. Loại bỏ tiếng Anh còn sót lại (chỉ lấy phần sau dấu hai chấm nếu có)
-            if ':' in text:
-                parts = text.split(':')
-                text = parts[-1].strip()
+        for attempt in range(max_retries + 1):
+            response, error = None, None
+            try:
+                with perf.timed('ai'):
+                    response = requests.post(url, headers=headers, json=payload, timeout=timeout)
+            except requests.Timeout:
+                error = 'timeout'
+            except requests.RequestException:
+                error = 'connection'
+
+            if response is not None:
+                if response.status_code == 200:
+                    text = response.json()['candidates'][0]['content']['parts'][0]['text'].strip()
+                    return _clean_response_text(text)
+                error = f"http_{response.status_code}"
+                if response.status_code not in RETRYABLE_STATUS:
+                    break
 
-            return text
-    except Exception: pass
+            if attempt < max_retries:
+                metrics.record_ai_retry(prompt_type)
+                time.sleep(_retry_delay(attempt, response))
+    except (KeyError, IndexError, TypeError, ValueError):
+        error = 'bad_response'
+    except Exception:
+        error = 'exception'
+    finally:
+        metrics.observe_ai_call(prompt_type, time.perf_counter() - started, error)
     return None
 
+@metrics.track_translation()
 def _translate_field_logic(instance, field_prefix, app_label, check_active_only=True):
-    from core.models import SystemLanguage
+    from core.languages import language_registry
+    from core.translation_providers import get_translation_chain
+    from core.translation_state import mark_translated, needs_translation, root_field
+
+    chain = get_translation_chain()
     
     f_vi = f"{field_prefix}_vi"
     f_zh = f"{field_prefix}_zh"
     f_en = f"{field_prefix}_en"
-    
-    val_vi = getattr(instance, f_vi, '') if hasattr(instance, f_vi) else ''
-    val_zh = getattr(instance, f_zh, '') if hasattr(instance, f_zh) else ''
-    val_en = getattr(instance, f_en, '') if hasattr(instance, f_en) else ''
+
+    def get(name):
+        return getattr(instance, name, '') if hasattr(instance, name) else ''
+
+    def fill(field, text, source):
+        setattr(instance, field, text)
+        mark_translated(instance, field, source)
+
+    # Nguồn gốc: trường VI/ZH do người dùng nhập (bản dịch tự động ghi trong translation_sources không tính)
+    tracked = getattr(instance, 'translation_sources', None) or {}
+    source_field = root_field(get, field_prefix, tracked)
+    if source_field not in (f_vi, f_zh):
+        source_field = None
 
     # --- BƯỚC 1: CHUẨN HÓA SANG TIẾNG ANH ---
-    if not val_en and hasattr(instance, f_en):
-        source_text = val_vi or val_zh
-        source_lang = "Vietnamese" if val_vi else "Chinese"
-        if source_text:
-            tmpl = get_best_prompt('translate_to_en', app_label)
-            prompt = tmpl.format(source_lang=source_lang, text=source_text)
-            res = call_gemini_api(prompt)
-            if res:
-                setattr(instance, f_en, res)
-                val_en = res
+    if source_field and hasattr(instance, f_en) and needs_translation(instance, f_en, source_field):
+        res = chain.translate(get(source_field), source_field[len(field_prefix) + 1:], 'en', app_label)
+        if res:
+            fill(f_en, res, source_field)
 
     # --- BƯỚC 2: DỊCH TỪ ANH SANG NGÔN NGỮ KHÁC ---
+    val_en = get(f_en)
     if val_en:
         # A. Dịch ngược về VI
-        if not val_vi and hasattr(instance, f_vi):
-            tmpl = get_best_prompt('translate_from_en', app_label)
-            prompt = tmpl.format(target_lang="Vietnamese", text=val_en)
-            res = call_gemini_api(prompt)
-            if res: setattr(instance, f_vi, res)
+        if source_field != f_vi and hasattr(instance, f_vi) and needs_translation(instance, f_vi, f_en):
+            res = chain.translate(val_en, 'en', 'vi', app_label)
+            if res: fill(f_vi, res, f_en)
 
         # B. Dịch sang ngôn ngữ khác
-        lang_query = SystemLanguage.objects.exclude(code__in=['vi', 'en'])
-        if check_active_only:
-            lang_query = lang_query.filter(is_active=True)
-        langs = list(lang_query.values('code', 'name'))
+        langs = language_registry.active() if check_active_only else language_registry.all()
 
         for lang in langs:
-            code = lang['code']
-            lang_name = lang['name']
+            code = lang.code
+            if code in ('vi', 'en'):
+                continue
             target_field = f"{field_prefix}_{code}"
             
-            if hasattr(instance, target_field) and not getattr(instance, target_field):
-                # Mapping tên ngôn ngữ rõ ràng hơn cho AI
-                prompt_lang_name = lang_name
-                if code == 'zh': prompt_lang_name = 'Simplified Chinese (Hanzi only)'
-                if code == 'fil': prompt_lang_name = 'Filipino (Tagalog)' # Cụ thể hóa cho Filipino
-                
-                tmpl = get_best_prompt('translate_from_en', app_label)
-                prompt = tmpl.format(target_lang=prompt_lang_name, text=val_en)
-                translated_text = call_gemini_api(prompt)
+            if target_field != source_field and hasattr(instance, target_field) and needs_translation(instance, target_field, f_en):
+                translated_text = chain.translate(val_en, 'en', code, app_label)
                 
                 if translated_text:
-                    setattr(instance, target_field, translated_text)
+                    fill(target_field, translated_text, f_en)
 
-                    # C. Pinyin cho Tiếng Trung
-                    if code == 'zh':
-                        pinyin_field = f"{field_prefix}_zh_pinyin"
-                        if hasattr(instance, pinyin_field) and not getattr(instance, pinyin_field):
-                            pinyin_tmpl = get_best_prompt('pinyin_converter', app_label)
-                            if not pinyin_tmpl: 
-                                pinyin_tmpl = "Role: Linguist. Task: Convert '{text}' to Pinyin. Constraint: Return ONLY Pinyin."
-                            
-                            pinyin_res = call_gemini_api(pinyin_tmpl.format(text=translated_text))
-                            if pinyin_res:
-                                setattr(instance, pinyin_field, pinyin_res)
+    # C. Pinyin cho Tiếng Trung (cả khi tiếng Trung là nguồn do người dùng nhập)
+    pinyin_field = f"{field_prefix}_zh_pinyin"
+    if get(f_zh) and hasattr(instance, pinyin_field) and needs_translation(instance, pinyin_field, f_zh):
+        pinyin_res = chain.to_pinyin(get(f_zh), app_label)
+        if pinyin_res:
+            fill(pinyin_field, pinyin_res, f_zh)
 
 
 def auto_generate_description_logic(instance, source_field='name', target_field='description'):
     """
-    Tự động sinh mô tả nếu cả VI và EN đều trống.
+    Tự động sinh mô tả nếu chưa có mô tả nguồn (VI do người dùng nhập) và mô tả EN trống / sinh từ tên cũ.
     Logic: Dùng Tên (EN hoặc VI) -> Sinh Mô tả (EN) -> Dịch Mô tả (EN) sang các tiếng khác.
     """
+    from core.translation_providers import get_translation_chain
+    from core.translation_state import mark_translated, needs_translation
+
     f_desc_vi = f"{target_field}_vi"
     f_desc_en = f"{target_field}_en"
     
     val_desc_vi = getattr(instance, f_desc_vi, '')
-    val_desc_en = getattr(instance, f_desc_en, '')
+    tracked = getattr(instance, 'translation_sources', None) or {}
     
-    # CHỈ CHẠY KHI CẢ VI VÀ EN ĐỀU TRỐNG
-    if not val_desc_vi and not val_desc_en:
+    # CHỈ CHẠY KHI KHÔNG CÓ MÔ TẢ VI NHẬP TAY VÀ EN TRỐNG / ĐÃ CŨ SO VỚI TÊN
+    if not val_desc_vi or f_desc_vi in tracked:
         # Lấy nguồn từ tên (đã được dịch chuẩn hóa ở bước trước đó)
         f_name_en = f"{source_field}_en"
         f_name_vi = f"{source_field}_vi"
         
-        name_source = getattr(instance, f_name_en, '') or getattr(instance, f_name_vi, '')
+        f_name = f_name_en if getattr(instance, f_name_en, '') else f_name_vi
+        name_source = getattr(instance, f_name, '')
         
-        if name_source:
+        if name_source and needs_translation(instance, f_desc_en, f_name):
             app_label = instance._meta.app_label
             # 1. Sinh mô tả tiếng Anh
-            tmpl = get_best_prompt('generate_desc', app_label)
-            prompt = tmpl.format(text=name_source)
-            
-            generated_desc = call_gemini_api(prompt)
+            generated_desc = get_translation_chain().describe(name_source, app_label)
             
             if generated_desc:
                 # Gán vào field tiếng Anh
                 setattr(instance, f_desc_en, generated_desc)
+                mark_translated(instance, f_desc_en, f_name)
                 
                 # Sau khi sinh xong tiếng Anh, gọi hàm dịch để lan ra các ngôn ngữ khác (bao gồm cả VI)
                 _translate_field_logic(instance, target_field, app_label, check_active_only=True)
 
+def translate_plain_text(text, target_lang, app_label=None, source_lang='vi'):
+    """
+    Dịch một đoạn văn bản tự do (không gắn với field của model), mã ngôn ngữ theo hậu tố trường (en, zh...).
+    Cùng chuỗi provider với _translate_field_logic (từ điển cục bộ trước, AI sau).
+    """
+    from core.translation_providers import get_translation_chain
+
+    if not text: return None
+    return get_translation_chain().translate(text, source_lang, target_lang, app_label)
+
 def auto_translate_label(label_instance):
     # SystemLabel luôn dịch hết để sẵn sàng
     _translate_field_logic(label_instance, 'text', label_instance.app, check_active_only=False)
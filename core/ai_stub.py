@@ -0,0 +1,187 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Máy chủ giả lập API Gemini (generateContent) để kiểm thử / đo tải pipeline dịch khi không có mạng.
+# Chạy: manage.py ai_stub_server, rồi đặt GEMINI_API_BASE=http://127.0.0.1:8765
+
+GENERATE_PATH_RE = re.compile(r'^/v1beta/models/[^/:]+:generateContent$')
+TERM_RE = re.compile(r"'([^']+)'")
+TARGET_RE = re.compile(r"\bto ([A-Z][\w ()]*?)\s*(?:\.|\n|$)")
+
+
+# =========================================================
+# 1. KẾT QUẢ GIẢ LẬP (TẤT ĐỊNH)
+# =========================================================
+def fake_completion(prompt):
+    """
+    Cùng prompt -> cùng kết quả. Nhận dạng các prompt mặc định của core.ai_services:
+    dịch ("... to Thai.") -> "<thuật ngữ> (Thai)", pinyin, sinh mô tả.
+    Không chứa dấu ':' (call_gemini_api cắt phần trước dấu hai chấm).
+    """
+    term_match = TERM_RE.search(prompt)
+    term = term_match.group(1) if term_match else prompt.strip().splitlines()[0][:60]
+    if 'Pinyin' in prompt:
+        return f"{term} (pinyin)"
+    if 'description' in prompt:
+        return f"Technical description of {term} in thermal power plant service."
+    target_match = TARGET_RE.search(prompt)
+    target = target_match.group(1) if target_match else 'translated'
+    return f"{term} ({target})"
+
+
+def completion_body(text):
+    return {
+        'candidates': [{
+            'content': {'parts': [{'text': text}], 'role': 'model'},
+            'finishReason': 'STOP',
+            'index': 0,
+        }],
+        'usageMetadata': {'promptTokenCount': 0, 'candidatesTokenCount': len(text.split())},
+    }
+
+
+def error_body(code, status, message):
+    return {'error': {'code': code, 'message': message, 'status': status}}
+
+
+# =========================================================
+# 2. CẤU HÌNH + TRẠNG THÁI
+# =========================================================
+@dataclass
+class StubConfig:
+    latency: float = 0.2        # giây mỗi request
+    jitter: float = 0.0         # +- ngẫu nhiên quanh latency
+    error_rate: float = 0.0     # tỷ lệ trả 500
+    throttle_rate: float = 0.0  # tỷ lệ trả 429 ngẫu nhiên
+    rpm: int = 0                # giới hạn request / phút (0 = không giới hạn), vượt -> 429 + Retry-After
+    retry_after: float = 1.0    # Retry-After (giây) cho 429 ngẫu nhiên
+    seed: int = 0
+
+
+class StubState:
+    """Bộ đếm dùng chung giữa các thread của máy chủ (GET /stats)."""
+
+    def __init__(self, config):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = {'requests': 0, 'ok': 0, 'throttled': 0, 'errors': 0}
+            self.active = 0
+            self.max_active = 0
+            self.window.clear()
+
+    def begin(self):
+        """Quyết định kết quả của một request: ('ok' | 'throttled' | 'error', độ trễ, retry_after)."""
+        config = self.config
+        with self.lock:
+            self.counts['requests'] += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            now = time.monotonic()
+
+            if config.rpm:
+                while self.window and self.window[0] <= now - 60:
+                    self.window.popleft()
+                if len(self.window) >= config.rpm:
+                    self.counts['throttled'] += 1
+                    return 'throttled', 0, max(0.0, self.window[0] + 60 - now)
+                self.window.append(now)
+
+            roll = self.rng.random()
+            latency = max(0.0, config.latency + self.rng.uniform(-config.jitter, config.jitter))
+            if roll < config.throttle_rate:
+                self.counts['throttled'] += 1
+                return 'throttled', 0, config.retry_after
+            if roll < config.throttle_rate + config.error_rate:
+                self.counts['errors'] += 1
+                return 'error', latency, None
+            self.counts['ok'] += 1
+            return 'ok', latency, None
+
+    def end(self):
+        with self.lock:
+            self.active -= 1
+
+    def snapshot(self):
+        with self.lock:
+            return {**self.counts, 'active': self.active, 'max_active': self.max_active}
+
+
+# =========================================================
+# 3. MÁY CHỦ HTTP
+# =========================================================
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'GeminiStub/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/stats':
+            return self._send(404, error_body(404, 'NOT_FOUND', 'Unknown path'))
+        if 'reset=1' in self.path:
+            self.server.state.reset()
+        self._send(200, self.server.state.snapshot())
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length)
+        if not GENERATE_PATH_RE.match(self.path.split('?')[0]):
+            return self._send(404, error_body(404, 'NOT_FOUND', 'Unknown path'))
+        try:
+            prompt = json.loads(raw)['contents'][0]['parts'][0]['text']
+        except (ValueError, KeyError, IndexError, TypeError):
+            return self._send(400, error_body(400, 'INVALID_ARGUMENT', 'Invalid generateContent payload'))
+
+        state = self.server.state
+        outcome, latency, retry_after = state.begin()
+        try:
+            if latency:
+                time.sleep(latency)
+            if outcome == 'throttled':
+                return self._send(
+                    429, error_body(429, 'RESOURCE_EXHAUSTED', 'Quota exceeded (stub)'),
+                    {'Retry-After': f"{retry_after:.0f}" if retry_after >= 1 else f"{retry_after:.2f}"},
+                )
+            if outcome == 'error':
+                return self._send(500, error_body(500, 'INTERNAL', 'Internal error (stub)'))
+            self._send(200, completion_body(fake_completion(prompt)))
+        finally:
+            state.end()
+
+
+def make_server(host='127.0.0.1', port=8765, config=None, verbose=False):
+    """ThreadingHTTPServer phục vụ generateContent + /stats. port=0 -> tự chọn cổng trống."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(config or StubConfig())
+    server.verbose = verbose
+    return server
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import renditions  # noqa: F401 (đăng ký signal tạo rendition khi tải ảnh)
+        from . import languages  # noqa: F401 (đăng ký signal vô hiệu danh sách ngôn ngữ)
+        from . import translation_providers  # noqa: F401 (đăng ký signal vô hiệu từ điển dịch cục bộ)
+        from . import coverage  # noqa: F401 (đăng ký signal vô hiệu báo cáo độ phủ bản dịch)
@@ -0,0 +1,78 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# HÀNG ĐỢI NỀN DÙNG CHUNG (BACKGROUND WORKERS)
+# =========================================================
+# - Thread pool: các tác vụ I/O (gọi API, ghi DB, gọi tiến trình ngoài) chạy sau khi request trả về.
+# - Process pool: các tác vụ nặng CPU (tách chữ PDF, raster ảnh). Dùng 'spawn' để an toàn khi
+#   được tạo từ bên trong thread của gunicorn; hàm chạy trong process pool KHÔNG được dùng ORM.
+
+_lock = threading.Lock()
+_thread_pool = None
+_process_pool = None
+
+
+def get_thread_pool():
+    global _thread_pool
+    with _lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_THREAD_WORKERS', 2),
+                thread_name_prefix='bg',
+            )
+        return _thread_pool
+
+
+def get_process_pool():
+    global _process_pool
+    with _lock:
+        # Tiến trình con chết bất thường (VD: hết RAM khi raster bản vẽ lớn) làm pool hỏng vĩnh viễn -> tạo lại
+        if _process_pool is None or getattr(_process_pool, '_broken', False):
+            _process_pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_PROCESS_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _process_pool
+
+
+def _task_name(func):
+    return getattr(func, '__name__', type(func).__name__)
+
+
+def _run_safely(func, args, kwargs, queued=False):
+    try:
+        with metrics.track_task(_task_name(func), queued=queued):
+            return func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background task {getattr(func, '__name__', func)} failed")
+    finally:
+        # Thread nền không đi qua vòng đời request -> tự đóng kết nối DB cũ
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Chạy func trong thread nền SAU KHI transaction hiện tại commit
+    (cùng nguyên tắc với transaction.on_commit ở SystemLabel/Detail).
+    Đặt BACKGROUND_TASKS_EAGER = True để chạy đồng bộ (tiện cho script / kiểm thử).
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        transaction.on_commit(lambda: _run_safely(func, args, kwargs))
+    else:
+        transaction.on_commit(lambda: _submit(func, args, kwargs))
+
+
+def _submit(func, args, kwargs):
+    # Độ sâu hàng đợi (Prometheus): +1 khi gửi, -1 khi thread bắt đầu chạy
+    metrics.task_queued(_task_name(func))
+    get_thread_pool().submit(_run_safely, func, args, kwargs, True)
@@ -0,0 +1,313 @@
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+# name -> Benchmark (theo thứ tự đăng ký)
+BENCHMARKS = {}
+
+
+class Benchmark:
+    """Một phép đo: setup(ctx) -> hàm không đối số được đo thời gian + số câu SQL."""
+
+    def __init__(self, name, setup, description='', warmup=1):
+        self.name = name
+        self.setup = setup
+        self.description = description
+        # warmup=0: đo trạng thái lạnh (mỗi lần chạy tự xóa cache)
+        self.warmup = warmup
+
+
+def benchmark(name, description='', warmup=1):
+    def decorator(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, description, warmup)
+        return setup
+    return decorator
+
+
+def benchmark_dir():
+    return str(getattr(settings, 'BENCHMARK_DIR', settings.BASE_DIR / 'var' / 'benchmarks'))
+
+
+# =========================================================
+# 1. MÔI TRƯỜNG ĐO
+# =========================================================
+@contextmanager
+def rolled_back():
+    """Chạy trong giao dịch rồi hủy: phép đo có ghi DB không để lại dữ liệu, on_commit không chạy."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+class _StubResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self._text = text
+
+    def json(self):
+        return {'candidates': [{'content': {'parts': [{'text': self._text}]}}]}
+
+
+@contextmanager
+def stub_ai(latency=0.02):
+    """
+    Thay requests.post của core.ai_services bằng endpoint giả: trả về ngay sau `latency` giây.
+    Đo được chi phí của pipeline dịch (prompt, số lần gọi, ghi DB) mà không phụ thuộc mạng / hạn mức Gemini.
+    """
+    calls = []
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        calls.append(url)
+        time.sleep(latency)
+        prompt = json['contents'][0]['parts'][0]['text']
+        term = prompt.split("'")[1] if prompt.count("'") >= 2 else 'term'
+        return _StubResponse(f"{term} (stub)")
+
+    with override_settings(GEMINI_API_KEY=getattr(settings, 'GEMINI_API_KEY', '') or 'benchmark'), \
+            mock.patch('core.ai_services.requests.post', side_effect=fake_post):
+        yield calls
+
+
+class BenchmarkContext:
+    """Dữ liệu dùng chung giữa các phép đo (đối tượng mẫu, client đã đăng nhập)."""
+
+    def __init__(self, ai_latency=0.02):
+        self.ai_latency = ai_latency
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from django.contrib.auth import get_user_model
+            from django.test import Client
+
+            user = get_user_model().objects.filter(is_superuser=True, is_active=True).first()
+            if user is None:
+                raise LookupError("Cần ít nhất một superuser để đo các trang Admin.")
+            self._client = Client()
+            self._client.force_login(user)
+        return self._client
+
+    def get(self, url):
+        response = self.client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} -> {response.status_code}")
+        return response
+
+
+# =========================================================
+# 2. CÁC PHÉP ĐO
+# =========================================================
+def _label_keys(limit=200):
+    from core.models import SystemLabel
+
+    keys = list(SystemLabel.objects.order_by('app', 'key').values_list('app', 'key')[:limit])
+    if not keys:
+        raise LookupError("Chưa có SystemLabel (chạy scan_system_labels trước).")
+    return keys
+
+
+@benchmark('label_lookup_cold', "get_label_text cho 200 nhãn sau khi xóa cache (DB + cache chung)", warmup=0)
+def label_lookup_cold(ctx):
+    from core.cache import label_cache
+    from core.utils import get_label_text
+
+    keys = _label_keys()
+
+    def run():
+        label_cache.clear()
+        for app, key in keys:
+            get_label_text(app, key)
+    return run
+
+
+@benchmark('label_lookup_warm', "get_label_text cho 200 nhãn đã có trong LRU của worker")
+def label_lookup_warm(ctx):
+    from core.utils import get_label_text
+
+    keys = _label_keys()
+
+    def run():
+        for app, key in keys:
+            get_label_text(app, key)
+    return run
+
+
+@benchmark('label_template_render', "Render template có 200 thẻ {% get_label %} (cache ấm)")
+def label_template_render(ctx):
+    from django.template import Context, Template
+
+    source = "{% load core_tags %}" + "".join(
+        f"<span>{{% get_label '{app}' '{key}' %}}</span>" for app, key in _label_keys()
+    )
+    template = Template(source)
+    return lambda: template.render(Context({}))
+
+
+def _admin_view(name, url_name, model_path=None, filters=None):
+    """Đăng ký phép đo một trang Admin; có model_path -> trang Inspect của đối tượng mẫu đầu tiên."""
+    def setup(ctx):
+        from django.apps import apps
+        from django.urls import reverse
+
+        args = []
+        if model_path:
+            model = apps.get_model(model_path)
+            obj = model.objects.filter(**(filters or {})).order_by('pk').first()
+            if obj is None:
+                raise LookupError(f"Không có {model.__name__} để đo (chạy seed_plant trước).")
+            args = [obj.pk]
+        url = reverse(url_name, args=args)
+        return lambda: ctx.get(url)
+
+    benchmark(name, f"GET {url_name}")(setup)
+
+
+_admin_view('area_index', 'wagtailsnippets_area_functionallocation:list')
+_admin_view('area_inspect', 'wagtailsnippets_area_functionallocation:inspect', 'area.FunctionalLocation', {'depth': 3})
+_admin_view('equipment_index', 'wagtailsnippets_equipment_equipment:list')
+_admin_view('equipment_inspect', 'wagtailsnippets_equipment_equipment:inspect', 'equipment.Equipment', {'values__isnull': False})
+_admin_view('detail_index', 'wagtailsnippets_details_detail:list')
+_admin_view('detail_inspect', 'wagtailsnippets_details_detail:inspect', 'details.Detail')
+
+
+@benchmark('scan_system_labels', "manage.py scan_system_labels (trong giao dịch được hủy)")
+def scan_system_labels(ctx):
+    import io
+
+    from django.core.management import call_command
+
+    def run():
+        with rolled_back():
+            call_command('scan_system_labels', stdout=io.StringIO())
+    return run
+
+
+@benchmark('detail_auto_translate', "Detail.trigger_auto_translate (chỉ có tên VI) với AI giả lập")
+def detail_auto_translate(ctx):
+    from details.models import Detail
+
+    def run():
+        # run_benchmarks() đã thay endpoint AI bằng stub_ai()
+        with rolled_back():
+            detail = Detail.objects.bulk_create([Detail(name_vi="Áp suất bao hơi", default_unit='bar')])[0]
+            detail.trigger_auto_translate()
+    return run
+
+
+# =========================================================
+# 3. CHẠY + SO SÁNH
+# =========================================================
+def measure(run, repeat=5, warmup=1):
+    for _ in range(warmup):
+        run()
+    durations, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            run()
+            durations.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    return {
+        'median_ms': round(statistics.median(durations), 3),
+        'min_ms': round(min(durations), 3),
+        'max_ms': round(max(durations), 3),
+        'queries': int(statistics.median(queries)),
+        'runs': repeat,
+    }
+
+
+def run_benchmarks(names=None, repeat=5, ai_latency=0.02, on_result=None):
+    ctx = BenchmarkContext(ai_latency=ai_latency)
+    results = {}
+    # Mọi phép đo đều chạy với AI giả lập: không phép đo nào được gọi Gemini thật
+    with stub_ai(ai_latency), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for name, bench in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            try:
+                result = measure(bench.setup(ctx), repeat=repeat, warmup=bench.warmup)
+            except Exception as e:
+                result = {'error': f"{type(e).__name__}: {e}"}
+            results[name] = result
+            if on_result:
+                on_result(name, result)
+    return results
+
+
+def environment():
+    from area.models import FunctionalLocation
+    from core.models import SystemLabel
+    from details.models import Detail, EquipmentValue
+    from equipment.models import Equipment
+
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        revision = ''
+    return {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'revision': revision,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'dataset': {
+            'locations': FunctionalLocation.objects.count(),
+            'equipment': Equipment.objects.count(),
+            'details': Detail.objects.count(),
+            'values': EquipmentValue.objects.count(),
+            'labels': SystemLabel.objects.count(),
+        },
+    }
+
+
+def compare(results, baseline, threshold=0.2, noise_ms=1.0):
+    """
+    So với baseline: chậm hơn quá `threshold` (tỷ lệ) và quá `noise_ms` tuyệt đối, hoặc thêm câu SQL -> hồi quy.
+    Trả về danh sách dict theo từng phép đo có trong cả hai bên.
+    """
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or 'error' in current or 'error' in previous:
+            continue
+        old_ms, new_ms = previous['median_ms'], current['median_ms']
+        change = (new_ms - old_ms) / old_ms if old_ms else 0.0
+        slower = change > threshold and new_ms - old_ms > noise_ms
+        more_queries = current['queries'] > previous['queries']
+        rows.append({
+            'name': name,
+            'baseline_ms': old_ms,
+            'median_ms': new_ms,
+            'change': round(change, 3),
+            'baseline_queries': previous['queries'],
+            'queries': current['queries'],
+            'regression': slower or more_queries,
+        })
+    return rows
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_report(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,286 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from . import metrics, perf
+
+try:
+    import fcntl
+except ImportError:  # Windows: chỉ khóa được giữa các thread trong một tiến trình
+    fcntl = None
+
+# Giá trị "không tồn tại" vẫn được cache (tránh truy vấn DB lặp lại cho khóa thiếu)
+MISSING = '__MISSING__'
+
+DEFAULT_LOCAL_SIZE = 2048
+# Thời gian tối đa một worker dùng bản sao cục bộ trước khi hỏi lại tầng chung
+# (cũng là độ trễ tối đa để thay đổi ở worker khác có hiệu lực)
+DEFAULT_LOCAL_TTL = 30
+
+
+# =========================================================
+# 1. TẦNG 1: LRU TRONG TIẾN TRÌNH
+# =========================================================
+class LocalLRU:
+    """Từ điển LRU có giới hạn số phần tử và thời hạn, an toàn khi dùng từ nhiều thread."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# =========================================================
+# 2. BỘ ĐẾM NGUYÊN TỬ Ở CACHE CHUNG (Phiên bản namespace, số thứ tự nhật ký thay đổi)
+# =========================================================
+# Backend có incr nguyên tử thật sự (Redis INCR, memcached incr, LocMemCache giữ khóa)
+ATOMIC_INCR_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django_redis.cache.RedisCache',
+)
+FILE_BACKEND = 'django.core.cache.backends.filebased.FileBasedCache'
+_thread_lock = threading.Lock()
+
+
+def counter_seed():
+    """
+    Giá trị khởi tạo khi khóa bộ đếm chưa có / đã bị cull: theo thời gian (µs), không phải 1
+    -> không bao giờ quay về một phiên bản cũ còn sót khóa trong cache chung
+    (µs thay vì ms: khởi tạo lại ngay trong cùng mili giây, hoặc bộ đếm đã tăng nhanh hơn đồng hồ).
+    """
+    return time.time_ns() // 1000
+
+
+def _backend_path(cache):
+    return f"{type(cache).__module__}.{type(cache).__qualname__}"
+
+
+@contextmanager
+def _file_lock(cache):
+    # FileBasedCache.incr = get + set: khóa tệp trong thư mục cache -> nguyên tử giữa các worker trên một máy
+    os.makedirs(cache._dir, exist_ok=True)
+    with _thread_lock, open(os.path.join(cache._dir, 'counters.lock'), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _counter_lock(cache):
+    backend = _backend_path(cache)
+    if backend in ATOMIC_INCR_BACKENDS:
+        return nullcontext()
+    if backend == FILE_BACKEND:
+        return _file_lock(cache)
+    raise ImproperlyConfigured(
+        f"Cache '{backend}' không có incr nguyên tử giữa các worker: dùng CACHE_BACKEND=redis, file hoặc locmem."
+    )
+
+
+def read_counter(cache, key):
+    """Giá trị hiện tại của bộ đếm (khởi tạo bằng counter_seed() nếu chưa có)."""
+    value = cache.get(key)
+    if value is None:
+        with _counter_lock(cache):
+            # add() trong khóa: hai worker khởi tạo cùng lúc không ghi đè nhau (FileBasedCache.add không nguyên tử)
+            cache.add(key, counter_seed(), None)
+        value = cache.get(key)
+    return value
+
+
+def incr_counter(cache, key):
+    """Tăng bộ đếm một đơn vị, nguyên tử giữa mọi worker. Trả về giá trị mới."""
+    with _counter_lock(cache):
+        if _backend_path(cache) == FILE_BACKEND:
+            value = cache.get(key)
+            value = (counter_seed() if value is None else value) + 1
+            cache.set(key, value, None)
+            return value
+        for _attempt in range(3):
+            cache.add(key, counter_seed(), None)
+            try:
+                return cache.incr(key)
+            except ValueError:
+                # Khóa vừa bị xóa / cull giữa add() và incr() -> khởi tạo lại
+                continue
+        raise RuntimeError(f"Cannot increment shared counter {key}")
+
+
+# =========================================================
+# 3. CACHE HAI TẦNG THEO NAMESPACE
+# =========================================================
+class TwoTierCache:
+    """
+    LRU cục bộ (nhanh, không tốn I/O) đứng trước cache dùng chung (settings.CACHES: file / Redis).
+      - Đọc: LRU -> cache chung -> hàm tạo giá trị (chỉ một worker phải tính, các worker khác dùng lại).
+      - Xóa cả namespace: tăng số phiên bản lưu ở cache chung; mọi khóa cũ tự hết hiệu lực ở
+        tất cả worker sau tối đa local_ttl giây (không cần liệt kê / xóa từng khóa).
+    """
+
+    def __init__(self, namespace, timeout=3600, local_size=None, local_ttl=None, alias=None):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.alias = alias or getattr(settings, 'PROJECT_CACHE_ALIAS', 'default')
+        self.local = LocalLRU(
+            local_size or getattr(settings, 'PROJECT_CACHE_LOCAL_SIZE', DEFAULT_LOCAL_SIZE),
+            local_ttl if local_ttl is not None else getattr(settings, 'PROJECT_CACHE_LOCAL_TTL', DEFAULT_LOCAL_TTL),
+        )
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def _version_key(self):
+        return f"{self.namespace}:version"
+
+    def version(self):
+        """Phiên bản hiện tại của namespace (được cache cục bộ như một khóa thường)."""
+        key = self._version_key()
+        version = self.local.get(key)
+        if version is None:
+            version = read_counter(self.shared, key)
+            self.local.set(key, version)
+        return version
+
+    def make_key(self, key):
+        return f"{self.namespace}:v{self.version()}:{key}"
+
+    def get(self, key, default=None):
+        full_key = self.make_key(key)
+        value = self.local.get(full_key)
+        if value is None:
+            value = self.shared.get(full_key)
+            if value is None:
+                return default
+            self.local.set(full_key, value)
+        return value
+
+    def set(self, key, value, timeout=None):
+        full_key = self.make_key(key)
+        self.shared.set(full_key, value, self.timeout if timeout is None else timeout)
+        self.local.set(full_key, value)
+
+    def get_or_set(self, key, producer, timeout=None):
+        """Trả về giá trị đã cache hoặc gọi producer(); kết quả None được cache dưới dạng MISSING."""
+        value = self.get(key)
+        perf.incr(f"cache.{self.namespace}.{'miss' if value is None else 'hit'}")
+        metrics.record_cache(self.namespace, value is not None)
+        if value is None:
+            value = producer()
+            self.set(key, MISSING if value is None else value, timeout)
+        return None if value == MISSING else value
+
+    def delete(self, key):
+        full_key = self.make_key(key)
+        self.shared.delete(full_key)
+        self.local.delete(full_key)
+
+    def clear(self):
+        """Vô hiệu toàn bộ namespace ở mọi worker. Trả về phiên bản mới."""
+        key = self._version_key()
+        version = incr_counter(self.shared, key)
+        self.local.clear()
+        self.local.set(key, version)
+        return version
+
+
+# =========================================================
+# 4. NHẬT KÝ THAY ĐỔI DÙNG CHUNG (Cập nhật tăng dần giữa các worker)
+# =========================================================
+class ChangeLog:
+    """
+    Số thứ tự tăng dần (incr_counter: nguyên tử ở cache chung) -> mục thay đổi (VD: "equipment:12").
+    Worker giữ cấu trúc dữ liệu lớn trong bộ nhớ (mảng gợi ý, từ điển dịch) đọc các mục từ lần đồng bộ trước
+    và chỉ cập nhật đúng những đối tượng đó, thay vì dựng lại toàn bộ sau mỗi lần lưu ở worker khác.
+    """
+
+    def __init__(self, namespace, timeout=1200, max_catch_up=1000, alias=None):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.max_catch_up = max_catch_up
+        self.alias = alias or getattr(settings, 'PROJECT_CACHE_ALIAS', 'default')
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def _key(self, name):
+        return f"{self.namespace}:{name}"
+
+    def current(self):
+        """Số thứ tự của thay đổi mới nhất."""
+        return read_counter(self.shared, self._key('seq'))
+
+    def append(self, item):
+        """
+        Ghi một mục. Trả về số thứ tự. Khóa số thứ tự bị mất -> khởi tạo lại theo thời gian (nhảy vọt)
+        -> mọi worker thấy khoảng cách quá max_catch_up và đồng bộ lại toàn bộ.
+        """
+        seq = incr_counter(self.shared, self._key('seq'))
+        self.shared.set(self._key(seq), item, self.timeout)
+        return seq
+
+    def since(self, seq):
+        """
+        (số thứ tự mới nhất, [các mục sau 'seq' theo thứ tự]).
+        Danh sách là None khi không thể cập nhật tăng dần: tụt lại quá max_catch_up, mục đã hết hạn,
+        hoặc cache chung bị xóa -> cần đồng bộ lại toàn bộ.
+        """
+        current = self.current()
+        if seq == current:
+            return current, []
+        if seq is None or current < seq or current - seq > self.max_catch_up:
+            return current, None
+        keys = [self._key(n) for n in range(seq + 1, current + 1)]
+        items = self.shared.get_many(keys)
+        if len(items) != len(keys):
+            return current, None
+        return current, [items[key] for key in keys]
+
+
+# =========================================================
+# 5. CÁC NAMESPACE DÙNG TRONG DỰ ÁN
+# =========================================================
+label_cache = TwoTierCache('labels', timeout=24 * 3600)
+prompt_cache = TwoTierCache('prompts', timeout=24 * 3600)
+tree_cache = TwoTierCache('tree', timeout=3600)
+suggest_cache = TwoTierCache('suggest', timeout=600)
@@ -0,0 +1,80 @@
+from django.apps import apps
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import TwoTierCache
+
+# Báo cáo độ phủ bản dịch: tính lại tối đa mỗi 5 phút, hoặc ngay khi nhãn / thông số / ngôn ngữ thay đổi
+coverage_cache = TwoTierCache('coverage', timeout=300)
+
+# (model, tiền tố trường đa ngôn ngữ, trường phân nhóm theo phân hệ - None = cả model là một phân hệ)
+COVERAGE_SOURCES = [
+    ('core.SystemLabel', 'text', 'app'),
+    ('details.Detail', 'name', None),
+]
+
+
+def _aggregates(fields):
+    """Một COUNT(...) FILTER (WHERE ...) cho mỗi (ngôn ngữ, trạng thái) -> cả bảng chỉ cần một truy vấn."""
+    aggregates = {'total': Count('pk')}
+    for code, field in fields.items():
+        aggregates[f"{code}__empty"] = Count('pk', filter=Q(**{field: ''}) | Q(**{f"{field}__isnull": True}))
+        aggregates[f"{code}__stale"] = Count('pk', filter=Q(translation_stale__has_key=field))
+    return aggregates
+
+
+def model_coverage(model_label, prefix, group_field, codes):
+    """Danh sách {'app', 'total', 'languages': {mã: {'filled', 'empty', 'stale'}}} theo từng phân hệ."""
+    model = apps.get_model(model_label)
+    available = set(model.translated_field_names())
+    fields = {code: f"{prefix}_{code}" for code in codes if f"{prefix}_{code}" in available}
+
+    queryset = model._default_manager.order_by()
+    if group_field:
+        rows = list(queryset.values(group_field).annotate(**_aggregates(fields)).order_by(group_field))
+    else:
+        rows = [{**queryset.aggregate(**_aggregates(fields)), group_field: None}]
+
+    report = []
+    for row in rows:
+        languages = {}
+        for code in fields:
+            empty, stale = row[f"{code}__empty"], row[f"{code}__stale"]
+            languages[code] = {'filled': row['total'] - empty, 'empty': empty, 'stale': stale}
+        report.append({
+            'app': row[group_field] if group_field else model._meta.app_label,
+            'total': row['total'],
+            'languages': languages,
+        })
+    return report
+
+
+def coverage_report():
+    """{'codes': [...], 'models': [{'model', 'prefix', 'group_field', 'rows': [...]}]} - có cache."""
+    def produce():
+        from core.models import SystemLanguage
+
+        codes = list(SystemLanguage.objects.order_by('-is_core', 'code').values_list('code', flat=True))
+        return {
+            'codes': codes,
+            'models': [
+                {
+                    'model': model_label,
+                    'prefix': prefix,
+                    'group_field': group_field,
+                    'rows': model_coverage(model_label, prefix, group_field, codes),
+                }
+                for model_label, prefix, group_field in COVERAGE_SOURCES
+            ],
+        }
+
+    return coverage_cache.get_or_set('report', produce)
+
+
+@receiver([post_save, post_delete], sender='core.SystemLabel')
+@receiver([post_save, post_delete], sender='details.Detail')
+@receiver([post_save, post_delete], sender='core.SystemLanguage')
+def invalidate_coverage(sender, raw=False, **kwargs):
+    if not raw:
+        coverage_cache.clear()
@@ -0,0 +1,35 @@
+import django_filters
+from django.db.models import Q
+from wagtail.admin.filters import WagtailFilterSet
+
+from .languages import language_registry
+
+
+def language_choices():
+    return [(lang.code, f"{lang.flag} {lang.name}") for lang in language_registry.all()]
+
+
+class TranslationFilterSet(WagtailFilterSet):
+    """
+    Lọc bản ghi thiếu bản dịch / có bản dịch cũ theo ngôn ngữ (?missing=th, ?stale=th).
+    Dùng cho danh sách SystemLabel, Detail; báo cáo độ phủ (core.coverage) liên kết tới đây.
+    """
+    missing = django_filters.ChoiceFilter(label="Thiếu bản dịch", choices=language_choices, method='filter_missing')
+    stale = django_filters.ChoiceFilter(label="Bản dịch cũ", choices=language_choices, method='filter_stale')
+
+    def _field(self, code):
+        model = self.queryset.model
+        field = f"{model.translated_prefixes[0]}_{code}"
+        return field if field in model.translated_field_names() else None
+
+    def filter_missing(self, queryset, name, value):
+        field = self._field(value)
+        if field is None:
+            return queryset.none()
+        return queryset.filter(Q(**{field: ''}) | Q(**{f"{field}__isnull": True}))
+
+    def filter_stale(self, queryset, name, value):
+        field = self._field(value)
+        if field is None:
+            return queryset.none()
+        return queryset.filter(translation_stale__has_key=field)
@@ -0,0 +1,70 @@
+import threading
+from typing import NamedTuple
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import TwoTierCache
+from .models import SystemLanguage
+
+# Chỉ dùng làm "đồng hồ phiên bản" dùng chung: worker khác sửa ngôn ngữ -> worker này nạp lại
+language_cache = TwoTierCache('languages', timeout=None)
+
+
+class LanguageInfo(NamedTuple):
+    code: str
+    name: str
+    flag: str
+    is_active: bool
+    is_core: bool
+
+
+class LanguageRegistry:
+    """
+    Danh sách SystemLanguage nạp một lần cho mỗi tiến trình (thay cho truy vấn lặp lại trong từng request).
+    Vô hiệu bằng signal save/delete; worker khác nhận thay đổi qua phiên bản namespace của core.cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._languages = None
+        self._version = None
+
+    def _load(self):
+        version = language_cache.version()
+        if self._languages is not None and version == self._version:
+            return self._languages
+        with self._lock:
+            rows = SystemLanguage.objects.order_by('-is_core', 'code').values_list(
+                'code', 'name', 'flag', 'is_active', 'is_core'
+            )
+            self._languages = tuple(LanguageInfo(*row) for row in rows)
+            self._version = version
+        return self._languages
+
+    def all(self):
+        return list(self._load())
+
+    def active(self):
+        return [lang for lang in self._load() if lang.is_active]
+
+    def active_codes(self):
+        return [lang.code for lang in self._load() if lang.is_active]
+
+    def inactive_codes(self):
+        return [lang.code for lang in self._load() if not lang.is_active]
+
+    def get(self, code):
+        return next((lang for lang in self._load() if lang.code == code), None)
+
+    def invalidate(self):
+        self._languages = None
+        language_cache.clear()
+
+
+language_registry = LanguageRegistry()
+
+
+@receiver([post_save, post_delete], sender=SystemLanguage)
+def invalidate_language_registry(sender, **kwargs):
+    language_registry.invalidate()
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from core.ai_stub import StubConfig, base_url, make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Chạy máy chủ giả lập API Gemini (generateContent) để kiểm thử / đo tải pipeline dịch khi không có mạng. "
+        "Trỏ ứng dụng vào đây bằng GEMINI_API_BASE=http://<host>:<port>. GET /stats xem số liệu (?reset=1 để đặt lại)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.2, help='Độ trễ mỗi request (giây)')
+        parser.add_argument('--jitter', type=float, default=0.0, help='Dao động ngẫu nhiên +- quanh độ trễ (giây)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Tỷ lệ request trả 500 (0..1)')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='Tỷ lệ request trả 429 ngẫu nhiên (0..1)')
+        parser.add_argument('--rpm', type=int, default=0, help='Giới hạn request / phút, vượt -> 429 (0 = không giới hạn)')
+        parser.add_argument('--retry-after', type=float, default=1.0, help='Giá trị Retry-After (giây) cho 429 ngẫu nhiên')
+        parser.add_argument('--seed', type=int, default=0, help='Hạt giống ngẫu nhiên (cùng seed -> cùng chuỗi lỗi)')
+        parser.add_argument('--verbose', action='store_true', help='In từng request')
+
+    def handle(self, *args, **options):
+        config = StubConfig(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            throttle_rate=options['throttle_rate'],
+            rpm=options['rpm'],
+            retry_after=options['retry_after'],
+            seed=options['seed'],
+        )
+        server = make_server(options['host'], options['port'], config, verbose=options['verbose'])
+        self.stdout.write(self.style.WARNING(f"🚀 MÁY CHỦ AI GIẢ LẬP: {base_url(server)}"))
+        self.stdout.write(f"   {config}")
+        self.stdout.write(f"   GEMINI_API_BASE={base_url(server)}  (Ctrl+C để dừng)\n")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        stats = server.state.snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ ĐÃ DỪNG. {stats['requests']} request: {stats['ok']} OK, {stats['throttled']} 429, "
+            f"{stats['errors']} lỗi, đồng thời tối đa {stats['max_active']}."
+        ))
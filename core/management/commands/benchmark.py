@@ -0,0 +1,93 @@
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Đo các đường nóng (nhãn, template, trang Admin, scan_system_labels, dịch tự động với AI giả lập), "
+        "ghi kết quả JSON và so sánh với baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', choices=list(benchmarks.BENCHMARKS), help='Chỉ chạy các phép đo này')
+        parser.add_argument('--list', action='store_true', help='Liệt kê các phép đo rồi thoát')
+        parser.add_argument('--repeat', type=int, default=5, help='Số lần đo mỗi phép đo (lấy trung vị)')
+        parser.add_argument('--ai-latency', type=float, default=0.02, help='Độ trễ (giây) của endpoint AI giả lập')
+        parser.add_argument('--output', help='Tệp JSON kết quả. Mặc định: BENCHMARK_DIR/<thời điểm>.json')
+        parser.add_argument('--baseline', help='Tệp baseline để so sánh. Mặc định: BENCHMARK_DIR/baseline.json')
+        parser.add_argument('--save-baseline', action='store_true', help='Ghi kết quả lần này làm baseline mới')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Ngưỡng chậm hơn (tỷ lệ) bị coi là hồi quy')
+        parser.add_argument(
+            '--seed',
+            action='store_true',
+            help='Sinh bộ dữ liệu chuẩn (seed_plant --seed 42, cỡ nhỏ) nếu chưa có, để kết quả so sánh được giữa các máy'
+        )
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, bench in benchmarks.BENCHMARKS.items():
+                self.stdout.write(f"   {name:<24} {bench.description}")
+            return
+
+        if options['seed']:
+            from area.models import FunctionalLocation
+
+            if not FunctionalLocation.objects.filter(depth=1, kks_code='SEED42').exists():
+                call_command(
+                    'seed_plant', units=2, systems=10, equipment=20, specs=10, seed=42, stdout=self.stdout,
+                )
+
+        directory = benchmarks.benchmark_dir()
+        baseline_path = options['baseline'] or os.path.join(directory, 'baseline.json')
+        report = benchmarks.environment()
+        self.stdout.write(self.style.WARNING(
+            f"🚀 BENCHMARK ({report['database']}, {report['dataset']['equipment']} thiết bị, "
+            f"{report['dataset']['values']} giá trị, {report['dataset']['labels']} nhãn)\n"
+        ))
+
+        def on_result(name, result):
+            if 'error' in result:
+                self.stdout.write(self.style.ERROR(f"   ❌ {name:<24} {result['error']}"))
+            else:
+                self.stdout.write(
+                    f"   - {name:<24} {result['median_ms']:>10.2f} ms  {result['queries']:>5} SQL"
+                    f"  (min {result['min_ms']:.2f} / max {result['max_ms']:.2f})"
+                )
+
+        report['results'] = benchmarks.run_benchmarks(
+            names=options['only'], repeat=options['repeat'], ai_latency=options['ai_latency'], on_result=on_result,
+        )
+        report['ai_latency'] = options['ai_latency']
+
+        output = options['output'] or os.path.join(directory, f"{report['created'].replace(':', '')}.json")
+        benchmarks.save_report(output, report)
+        self.stdout.write(f"\n   Kết quả: {output}")
+
+        regressions = []
+        if os.path.exists(baseline_path) and not options['save_baseline']:
+            baseline = benchmarks.load_report(baseline_path)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n📊 So với baseline {baseline.get('revision') or ''} ({baseline.get('created', '?')}):"
+            ))
+            for row in benchmarks.compare(report['results'], baseline.get('results', {}), options['threshold']):
+                line = (
+                    f"   {row['name']:<24} {row['baseline_ms']:>10.2f} -> {row['median_ms']:>10.2f} ms "
+                    f"({row['change']:+.0%})  SQL {row['baseline_queries']} -> {row['queries']}"
+                )
+                if row['regression']:
+                    regressions.append(row['name'])
+                    self.stdout.write(self.style.ERROR(f"❌{line}"))
+                else:
+                    self.stdout.write(f"  {line}")
+
+        if options['save_baseline'] or not os.path.exists(baseline_path):
+            benchmarks.save_report(baseline_path, report)
+            self.stdout.write(f"   Baseline: {baseline_path}")
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} phép đo bị hồi quy: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT!"))
@@ -0,0 +1,87 @@
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+# Chỉ mục tìm kiếm phụ thuộc backend (FTS5 của SQLite / tsvector của PostgreSQL) -> dựng lại bằng 'update_index'
+DERIVED_MODELS = {'wagtailsearch.IndexEntry', 'wagtailsearch.SQLiteFTSIndexEntry'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Sao chép toàn bộ dữ liệu giữa hai CSDL (VD: SQLite cũ -> PostgreSQL), giữ nguyên khóa chính. "
+        "CSDL đích phải được 'migrate' trước."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default='sqlite_source', help='Alias CSDL nguồn (settings.DATABASES)')
+        parser.add_argument('--target', default='default', help='Alias CSDL đích')
+        parser.add_argument('--flush', action='store_true', help='Xóa sạch dữ liệu CSDL đích trước khi chép')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        source, target = options['source'], options['target']
+        if source not in connections.databases or target not in connections.databases:
+            raise CommandError(f"Không tìm thấy alias CSDL '{source}' hoặc '{target}'.")
+        if source == target:
+            raise CommandError("Nguồn và đích phải khác nhau.")
+
+        tables = set(connections[source].introspection.table_names()) & set(
+            connections[target].introspection.table_names()
+        )
+        models = [
+            model for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+            and model._meta.label not in DERIVED_MODELS
+            and model._meta.db_table in tables
+        ]
+
+        if options['flush']:
+            # Không chạy post_migrate: content types / permissions sẽ được chép từ nguồn (giữ nguyên id)
+            call_command('flush', database=target, interactive=False, inhibit_post_migrate=True, verbosity=0)
+        else:
+            not_empty = [m._meta.label for m in models if m._default_manager.using(target).exists()]
+            if not_empty:
+                raise CommandError(f"CSDL đích đã có dữ liệu ({', '.join(not_empty[:5])}...). Dùng --flush.")
+
+        self.stdout.write(self.style.WARNING(f"🚀 SAO CHÉP DỮ LIỆU: {source} -> {target}\n"))
+
+        # Ràng buộc khóa ngoại được tạo dạng DEFERRABLE INITIALLY DEFERRED -> chép theo thứ tự bất kỳ
+        # trong một transaction, kiểm tra khi commit
+        with transaction.atomic(using=target):
+            for model in models:
+                count = self._copy_model(model, source, target, options['batch_size'])
+                if count:
+                    self.stdout.write(f"   - {model._meta.label}: {count}")
+
+            # Đặt lại sequence (PostgreSQL) để bản ghi mới không trùng khóa chính đã chép
+            connection = connections[target]
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT! Chạy 'manage.py update_index' để dựng lại chỉ mục tìm kiếm."))
+
+    def _copy_model(self, model, source, target, batch_size):
+        manager = model._base_manager
+        count, batch = 0, []
+        for obj in manager.using(source).order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                count += self._insert(model, batch, target)
+                batch = []
+        if batch:
+            count += self._insert(model, batch, target)
+        return count
+
+    def _insert(self, model, objs, target):
+        # Ghi thô (raw=True) cho mọi model: bulk_create chạy pre_save -> auto_now / auto_now_add bị đặt lại
+        # thành thời điểm chép. Kế thừa nhiều bảng (VD: các Page của Wagtail): bảng cha đã được chép qua
+        # model cha, chỉ ghi bảng riêng của model con. Không gửi signal -> không đánh chỉ mục tìm kiếm giữa chừng
+        manager = model._base_manager
+        fields = model._meta.local_concrete_fields
+        step = connections[target].ops.bulk_batch_size(fields, objs) or len(objs)
+        for i in range(0, len(objs), step):
+            manager._insert(objs[i:i + step], fields=fields, using=target, raw=True)
+        return len(objs)
@@ -0,0 +1,46 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.storage import ContentAddressedStorage, file_fields
+
+
+class Command(BaseCommand):
+    help = "Chuyển tệp media hiện có vào kho lưu theo nội dung (cas/). Chạy 'gc_media' sau đó để xóa bản cũ."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Chỉ đếm, không chuyển')
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            self.stdout.write(self.style.ERROR("❌ STORAGES['default'] chưa dùng core.storage.ContentAddressedStorage."))
+            return
+
+        self.stdout.write(self.style.WARNING("🚀 CHUYỂN MEDIA VÀO KHO THEO NỘI DUNG\n"))
+        total_moved = 0
+        for model, field in file_fields():
+            if field.storage is not default_storage:
+                continue
+            moved = 0
+            rows = (
+                model._default_manager.exclude(**{f"{field.name}__isnull": True})
+                .exclude(**{field.name: ''})
+                .values_list('pk', field.name)
+            )
+            for pk, name in rows.iterator():
+                if default_storage.is_content_addressed(name) or default_storage.is_exempt(name):
+                    continue
+                if not default_storage.exists(name):
+                    self.stdout.write(self.style.ERROR(f"   ❌ Thiếu tệp: {name}"))
+                    continue
+                moved += 1
+                if options['dry_run']:
+                    continue
+                with default_storage.open(name, 'rb') as f:
+                    new_name = default_storage.save(name, f, max_length=field.max_length)
+                # update(): không kích hoạt signal (dịch, raster, trích xuất) cho dữ liệu không đổi
+                model._default_manager.filter(pk=pk).update(**{field.name: new_name})
+            if moved:
+                self.stdout.write(f"   - {model._meta.label}.{field.name}: {moved}")
+            total_moved += moved
+
+        self.stdout.write(self.style.SUCCESS(f"\n✅ HOÀN TẤT! {total_moved} tệp."))
@@ -0,0 +1,79 @@
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from wagtail.documents import get_document_model
+
+from core.storage import referenced_names
+
+# Các thư mục chứa tệp do FileField quản lý (chỉ quét những nơi này)
+DEFAULT_GC_ROOTS = ['cas', 'documents', 'original_images', 'images', 'tts']
+
+
+class Command(BaseCommand):
+    help = "Dọn tệp media không còn được tham chiếu (mark & sweep): blob trong cas/, tệp cũ, audio, ảnh xem trước bản vẽ."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Chỉ liệt kê, không xóa')
+        parser.add_argument(
+            '--min-age', type=float, default=6,
+            help='Chỉ xóa tệp cũ hơn số giờ này (tránh xóa tệp đang tải lên nhưng chưa lưu bản ghi)'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        cutoff = time.time() - options['min_age'] * 3600
+        media_root = str(settings.MEDIA_ROOT)
+        stats = {'files': 0, 'bytes': 0, 'previews': 0}
+
+        self.stdout.write(self.style.WARNING(f"🚀 DỌN MEDIA{' (DRY RUN)' if dry_run else ''}\n"))
+
+        # 1. MARK: mọi tên tệp đang được tham chiếu
+        referenced = referenced_names()
+        self.stdout.write(f"   - Đang được tham chiếu: {len(referenced)} tệp")
+
+        # 2. SWEEP: tệp trong các thư mục quản lý không còn ai dùng
+        for root in getattr(settings, 'GC_MEDIA_ROOTS', DEFAULT_GC_ROOTS):
+            for dirpath, dirnames, filenames in os.walk(os.path.join(media_root, root)):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    name = os.path.relpath(path, media_root).replace(os.sep, '/')
+                    if name in referenced:
+                        continue
+                    stat = os.stat(path)
+                    if stat.st_mtime > cutoff:
+                        continue
+                    stats['files'] += 1
+                    # Blob có hard link khác còn dùng -> xóa tên này không giải phóng dung lượng
+                    if stat.st_nlink == 1:
+                        stats['bytes'] += stat.st_size
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f"     x {name}")
+                    if not dry_run:
+                        os.remove(path)
+
+        # 3. Ảnh xem trước bản vẽ (theo hash nội dung) của tài liệu không còn tồn tại
+        from area.schematics import preview_root
+        previews = preview_root()
+        if os.path.isdir(previews):
+            hashes = set(get_document_model().objects.exclude(file_hash='').values_list('file_hash', flat=True))
+            for entry in os.scandir(previews):
+                if entry.is_dir() and entry.name not in hashes and entry.stat().st_mtime <= cutoff:
+                    stats['previews'] += 1
+                    if not dry_run:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+
+        if not dry_run:
+            self._remove_empty_dirs(media_root)
+
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT!"))
+        self.stdout.write(f"   - Tệp không dùng: {stats['files']} ({stats['bytes'] / 1048576:.1f} MB giải phóng)")
+        self.stdout.write(f"   - Bộ ảnh xem trước bản vẽ: {stats['previews']}")
+
+    def _remove_empty_dirs(self, media_root):
+        for root in getattr(settings, 'GC_MEDIA_ROOTS', DEFAULT_GC_ROOTS):
+            for dirpath, dirnames, filenames in os.walk(os.path.join(media_root, root), topdown=False):
+                if not os.listdir(dirpath) and dirpath != os.path.join(media_root, root):
+                    os.rmdir(dirpath)
@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Q
+
+from core import pinyin
+from core.models import SystemLabel
+from core.translation_state import source_hash
+from details.models import Detail
+
+# (model, trường chữ Hán, trường pinyin)
+PINYIN_FIELDS = {
+    'detail': (Detail, 'name_zh', 'name_zh_pinyin'),
+    'label': (SystemLabel, 'text_zh', 'text_zh_pinyin'),
+}
+
+
+class Command(BaseCommand):
+    help = "Sinh Pinyin offline (core.pinyin) cho Detail.name_zh và SystemLabel.text_zh - không gọi AI."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=list(PINYIN_FIELDS),
+            default=list(PINYIN_FIELDS),
+            help='Bảng cần xử lý. Mặc định: tất cả'
+        )
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='Sinh lại cả những dòng đã có Pinyin (mặc định chỉ dòng trống hoặc Pinyin tự động đã cũ)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Số bản ghi mỗi lô bulk_update')
+
+    def handle(self, *args, **options):
+        if not pinyin.available():
+            raise CommandError("Chưa cài pypinyin (pip install pypinyin).")
+
+        self.stdout.write(self.style.WARNING("🚀 SINH PINYIN OFFLINE\n"))
+        batch_size = options['batch_size']
+
+        for name in options['models']:
+            model, source_field, target_field = PINYIN_FIELDS[name]
+            queryset = model.objects.exclude(**{source_field: ''}).order_by('pk')
+            if not options['overwrite']:
+                queryset = queryset.filter(Q(**{target_field: ''}) | Q(translation_stale__has_key=target_field))
+
+            # Ghi cùng lúc Pinyin + nguồn bản dịch (như mark_translated) + translation_stale + phiên bản:
+            # lần dịch sau biết Pinyin là bản tự động của chữ Hán hiện tại, báo cáo độ phủ không còn đếm là cũ,
+            # save_translations() đang chạy dở thấy phiên bản đổi -> nạp lại thay vì ghi đè
+            fields = [target_field, 'translation_sources', 'translation_stale', 'translation_version']
+            columns = ('pk', source_field, target_field, 'translation_sources', 'translation_stale')
+            batch, updated = [], 0
+            with transaction.atomic():
+                for obj in queryset.select_for_update().only(*columns).iterator(chunk_size=batch_size):
+                    value = pinyin.to_pinyin(getattr(obj, source_field))
+                    if value and value != getattr(obj, target_field):
+                        self.fill(obj, source_field, target_field, value)
+                        batch.append(obj)
+                    if len(batch) >= batch_size:
+                        model.objects.bulk_update(batch, fields)
+                        updated += len(batch)
+                        batch = []
+                if batch:
+                    model.objects.bulk_update(batch, fields)
+                    updated += len(batch)
+            self.stdout.write(f"   - {model.__name__}.{target_field}: {updated}")
+
+        self.invalidate_caches()
+        self.stdout.write("   (Chạy 'manage.py rebuild_search_entries' để chỉ mục tìm kiếm nhận Pinyin mới)")
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT!"))
+
+    @staticmethod
+    def fill(obj, source_field, target_field, value):
+        setattr(obj, target_field, value)
+        entry = [source_field, source_hash(getattr(obj, source_field))]
+        obj.translation_sources = {**obj.translation_sources, target_field: entry}
+        obj.translation_stale = {field: source for field, source in obj.translation_stale.items() if field != target_field}
+        obj.translation_version = F('translation_version') + 1
+
+    def invalidate_caches(self):
+        # bulk_update không phát signal
+        from core.cache import label_cache
+        from core.coverage import coverage_cache
+        from core.translation_providers import glossary
+        from search.suggest import suggestion_index
+
+        label_cache.clear()
+        coverage_cache.clear()
+        glossary.invalidate()
+        suggestion_index.invalidate()
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from area.models import FunctionalLocation
+from equipment.models import Equipment
+from core.tts import AUDIO_LANGUAGES, generate_audio_batch, get_tts_engine
+
+
+class Command(BaseCommand):
+    help = "Sinh audio TTS hàng loạt cho Thiết bị / Khu vực (chỉ sinh lại khi văn bản nguồn thay đổi)."
+
+    MODELS = {'equipment': Equipment, 'area': FunctionalLocation}
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=list(self.MODELS),
+            default=list(self.MODELS),
+            help='Loại đối tượng cần sinh audio'
+        )
+        parser.add_argument(
+            '--languages',
+            nargs='+',
+            choices=list(AUDIO_LANGUAGES),
+            help='Hậu tố field audio (vi, en, cn). Mặc định: tất cả field có trên model'
+        )
+        parser.add_argument('--workers', type=int, default=4, help='Số luồng tổng hợp song song')
+        parser.add_argument('--force', action='store_true', help='Tổng hợp lại kể cả khi audio đã khớp nội dung')
+
+    def handle(self, *args, **options):
+        engine = get_tts_engine()
+        self.stdout.write(self.style.WARNING(f"🚀 SINH AUDIO TTS (engine: {engine.name})\n"))
+
+        for key in options['models']:
+            queryset = self.MODELS[key].objects.all().order_by('pk')
+            stats = generate_audio_batch(
+                queryset.iterator(chunk_size=500),
+                suffixes=options['languages'],
+                workers=options['workers'],
+                force=options['force'],
+                engine=engine,
+            )
+            summary = ', '.join(f"{status}: {count}" for status, count in sorted(stats.items())) or '-'
+            self.stdout.write(f"   - {key}: {summary}")
+
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT!"))
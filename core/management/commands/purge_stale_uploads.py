@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Xóa các phiên tải lên theo từng phần bị bỏ dở (kèm tệp tạm)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48, help='Xóa phiên không hoạt động quá số giờ này')
+
+    def handle(self, *args, **options):
+        count = purge_stale_uploads(timezone.now() - timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f"✅ Đã xóa {count} phiên tải lên."))
@@ -0,0 +1,346 @@
+import random
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from area.models import FunctionalLocation
+from core.translation_state import initial_sources
+from details.models import Detail, EquipmentValue
+from equipment.models import Equipment, EquipmentDigital
+
+# Mã KKS của nút gốc do lệnh này tạo (dùng để nhận diện khi --clear)
+SEED_ROOT_PREFIX = 'SEED'
+
+LANGUAGES = ('vi', 'en', 'zh', 'th', 'lo', 'km', 'id', 'ms', 'my', 'fil')
+
+# =========================================================
+# DỮ LIỆU MẪU (KKS + thông số đa ngôn ngữ)
+# =========================================================
+# (mã hệ thống KKS, tên)
+SYSTEMS = [
+    ('LAC', "Hệ thống bơm nước cấp"),
+    ('LAB', "Đường ống nước cấp"),
+    ('LBA', "Đường hơi chính"),
+    ('LCA', "Hệ thống nước ngưng"),
+    ('HLB', "Quạt gió cấp"),
+    ('HNC', "Quạt khói"),
+    ('HFB', "Hệ thống cấp than"),
+    ('PAB', "Nước làm mát tuần hoàn"),
+    ('MAA', "Tuabin cao áp"),
+    ('MKA', "Máy phát điện"),
+    ('BBA', "Tủ phân phối trung thế"),
+    ('QFB', "Khí nén điều khiển"),
+]
+
+# (mã thiết bị KKS, tên)
+COMPONENTS = [
+    ('AP', "Bơm"),
+    ('AA', "Van"),
+    ('AN', "Quạt"),
+    ('AC', "Bộ trao đổi nhiệt"),
+    ('BB', "Bồn chứa"),
+    ('CP', "Cảm biến áp suất"),
+    ('CT', "Cảm biến nhiệt độ"),
+    ('CF', "Đồng hồ lưu lượng"),
+]
+
+MANUFACTURERS = ['Siemens', 'ABB', 'KSB', 'Flowserve', 'Emerson', 'Yokogawa', 'Schneider Electric', 'Grundfos']
+
+# Đại lượng: (đơn vị, khoảng giá trị, tên theo ngôn ngữ, pinyin)
+QUANTITIES = [
+    ('bar', (1, 250), {
+        'vi': "Áp suất", 'en': "pressure", 'zh': "压力", 'th': "ความดัน", 'lo': "ຄວາມດັນ", 'km': "សម្ពាធ",
+        'id': "Tekanan", 'ms': "Tekanan", 'my': "ဖိအား", 'fil': "presyon"}, "yālì"),
+    ('°C', (20, 560), {
+        'vi': "Nhiệt độ", 'en': "temperature", 'zh': "温度", 'th': "อุณหภูมิ", 'lo': "ອຸນຫະພູມ", 'km': "សីតុណ្ហភាព",
+        'id': "Suhu", 'ms': "Suhu", 'my': "အပူချိန်", 'fil': "temperatura"}, "wēndù"),
+    ('t/h', (5, 1800), {
+        'vi': "Lưu lượng", 'en': "flow rate", 'zh': "流量", 'th': "อัตราการไหล", 'lo': "ອັດຕາການໄຫຼ", 'km': "អត្រាលំហូរ",
+        'id': "Laju aliran", 'ms': "Kadar aliran", 'my': "စီးနှုန်း", 'fil': "daloy"}, "liúliàng"),
+    ('rpm', (300, 3000), {
+        'vi': "Tốc độ quay", 'en': "rotational speed", 'zh': "转速", 'th': "ความเร็วรอบ", 'lo': "ຄວາມໄວຮອບ", 'km': "ល្បឿនបង្វិល",
+        'id': "Kecepatan putar", 'ms': "Kelajuan putaran", 'my': "လည်ပတ်နှုန်း", 'fil': "bilis ng ikot"}, "zhuànsù"),
+    ('kW', (1, 12000), {
+        'vi': "Công suất", 'en': "power", 'zh': "功率", 'th': "กำลังไฟฟ้า", 'lo': "ກຳລັງໄຟຟ້າ", 'km': "អានុភាព",
+        'id': "Daya", 'ms': "Kuasa", 'my': "စွမ်းအား", 'fil': "lakas"}, "gōnglǜ"),
+    ('kV', (0.4, 22), {
+        'vi': "Điện áp", 'en': "voltage", 'zh': "电压", 'th': "แรงดันไฟฟ้า", 'lo': "ແຮງດັນໄຟຟ້າ", 'km': "តង់ស្យុង",
+        'id': "Tegangan", 'ms': "Voltan", 'my': "ဗို့အား", 'fil': "boltahe"}, "diànyā"),
+    ('A', (1, 2500), {
+        'vi': "Dòng điện", 'en': "current", 'zh': "电流", 'th': "กระแสไฟฟ้า", 'lo': "ກະແສໄຟຟ້າ", 'km': "ចរន្ត",
+        'id': "Arus", 'ms': "Arus", 'my': "လျှပ်စီး", 'fil': "kuryente"}, "diànliú"),
+    ('mm', (50, 3000), {
+        'vi': "Mức", 'en': "level", 'zh': "液位", 'th': "ระดับ", 'lo': "ລະດັບ", 'km': "កម្រិត",
+        'id': "Ketinggian", 'ms': "Paras", 'my': "အဆင့်", 'fil': "antas"}, "yèwèi"),
+    ('mm/s', (0.5, 12), {
+        'vi': "Độ rung", 'en': "vibration", 'zh': "振动", 'th': "การสั่นสะเทือน", 'lo': "ການສັ່ນສະເທືອນ", 'km': "រំញ័រ",
+        'id': "Getaran", 'ms': "Getaran", 'my': "တုန်ခါမှု", 'fil': "panginginig"}, "zhèndòng"),
+    ('%', (60, 99), {
+        'vi': "Hiệu suất", 'en': "efficiency", 'zh': "效率", 'th': "ประสิทธิภาพ", 'lo': "ປະສິດທິພາບ", 'km': "ប្រសិទ្ធភាព",
+        'id': "Efisiensi", 'ms': "Kecekapan", 'my': "စွမ်းဆောင်ရည်", 'fil': "kahusayan"}, "xiàolǜ"),
+]
+
+# Tiền tố / hậu tố theo ngôn ngữ ({q} = tên đại lượng), pinyin
+QUALIFIERS = [
+    ({'vi': "{q} đầu vào", 'en': "Inlet {q}", 'zh': "入口{q}", 'th': "{q}ขาเข้า", 'lo': "{q}ຂາເຂົ້າ", 'km': "{q}ចូល",
+      'id': "{q} masuk", 'ms': "{q} masuk", 'my': "ဝင်ပေါက် {q}", 'fil': "{q} sa pasukan"}, "Rùkǒu"),
+    ({'vi': "{q} đầu ra", 'en': "Outlet {q}", 'zh': "出口{q}", 'th': "{q}ขาออก", 'lo': "{q}ຂາອອກ", 'km': "{q}ចេញ",
+      'id': "{q} keluar", 'ms': "{q} keluar", 'my': "ထွက်ပေါက် {q}", 'fil': "{q} sa labasan"}, "Chūkǒu"),
+    ({'vi': "{q} định mức", 'en': "Rated {q}", 'zh': "额定{q}", 'th': "{q}พิกัด", 'lo': "{q}ພິກັດ", 'km': "{q}កំណត់",
+      'id': "{q} nominal", 'ms': "{q} terkadar", 'my': "သတ်မှတ် {q}", 'fil': "Rated na {q}"}, "Édìng"),
+    ({'vi': "{q} tối đa", 'en': "Maximum {q}", 'zh': "最大{q}", 'th': "{q}สูงสุด", 'lo': "{q}ສູງສຸດ", 'km': "{q}អតិបរមា",
+      'id': "{q} maksimum", 'ms': "{q} maksimum", 'my': "အများဆုံး {q}", 'fil': "Pinakamataas na {q}"}, "Zuìdà"),
+    ({'vi': "{q} tối thiểu", 'en': "Minimum {q}", 'zh': "最小{q}", 'th': "{q}ต่ำสุด", 'lo': "{q}ຕ່ຳສຸດ", 'km': "{q}អប្បបរមា",
+      'id': "{q} minimum", 'ms': "{q} minimum", 'my': "အနည်းဆုံး {q}", 'fil': "Pinakamababang {q}"}, "Zuìxiǎo"),
+    ({'vi': "{q} thiết kế", 'en': "Design {q}", 'zh': "设计{q}", 'th': "{q}ออกแบบ", 'lo': "{q}ອອກແບບ", 'km': "{q}រចនា",
+      'id': "{q} desain", 'ms': "{q} reka bentuk", 'my': "ဒီဇိုင်း {q}", 'fil': "Disenyong {q}"}, "Shèjì"),
+]
+
+DESCRIPTIONS = {
+    'vi': "Thông số {name} của thiết bị, đơn vị {unit}.",
+    'en': "Equipment parameter: {name} ({unit}).",
+    'zh': "设备参数：{name}（{unit}）。",
+}
+
+
+def detail_rows(count, languages):
+    """
+    Danh sách dict trường cho `count` Detail (tổ hợp đại lượng x tiền tố, đánh số khi vượt quá số tổ hợp).
+    Chỉ điền các cột ngôn ngữ trong `languages` (cột khác để trống cho luồng dịch tự động).
+    """
+    rows = []
+    combos = [(quantity, qualifier) for qualifier in QUALIFIERS for quantity in QUANTITIES]
+    for index in range(count):
+        (unit, _range, names, pinyin), (templates, pinyin_prefix) = combos[index % len(combos)]
+        suffix = f" #{index // len(combos) + 1}" if index >= len(combos) else ''
+        row = {'default_unit': unit}
+        for lang in languages:
+            name = templates[lang].format(q=names[lang]) + suffix
+            name = name[0].upper() + name[1:]
+            row[f'name_{lang}'] = name
+            template = DESCRIPTIONS.get(lang)
+            row[f'description_{lang}'] = template.format(name=name.lower() if lang == 'vi' else name, unit=unit) if template else name
+        if 'zh' in languages:
+            row['name_zh_pinyin'] = f"{pinyin_prefix} {pinyin}{suffix}"
+        # Bản dịch seed coi như khớp nguồn (như migration backfill) -> sửa tên sau này chỉ dịch lại phần bị cũ
+        row['translation_sources'] = initial_sources(row, [field for field in row if field != 'default_unit'],
+                                                     ('name', 'description'))
+        rows.append(row)
+    return rows
+
+
+def value_range(unit):
+    for quantity_unit, bounds, _names, _pinyin in QUANTITIES:
+        if quantity_unit == unit:
+            return bounds
+    return (0, 100)
+
+
+def system_codes(unit_no, count):
+    """KKS cấp hệ thống: 10LAC10, 10LAB10, ... rồi 10LAC20 khi hết danh mục."""
+    codes = []
+    for index in range(count):
+        code, name = SYSTEMS[index % len(SYSTEMS)]
+        group = (index // len(SYSTEMS) + 1) * 10
+        codes.append((f"{unit_no}{code}{group:02d}", f"{name} {group // 10}"))
+    return codes
+
+
+# =========================================================
+# LỆNH
+# =========================================================
+class Command(BaseCommand):
+    help = (
+        "Sinh dữ liệu nhà máy giả lập có cấu trúc KKS (Khối -> Hệ thống -> Thiết bị -> Thông số) để đo hiệu năng. "
+        "VD ~1 triệu giá trị thông số: --units 4 --systems 50 --equipment 250 --specs 20"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--units', type=int, default=2, help='Số khối (tổ máy)')
+        parser.add_argument('--systems', type=int, default=10, help='Số hệ thống mỗi khối')
+        parser.add_argument('--equipment', type=int, default=20, help='Số thiết bị mỗi hệ thống')
+        parser.add_argument('--specs', type=int, default=8, help='Số giá trị thông số mỗi thiết bị')
+        parser.add_argument('--details', type=int, default=120, help='Số loại thông số (Detail) trong thư viện')
+        parser.add_argument(
+            '--languages',
+            nargs='+',
+            choices=LANGUAGES,
+            default=list(LANGUAGES),
+            help='Các cột ngôn ngữ được điền sẵn cho Detail. Mặc định: tất cả'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Hạt giống ngẫu nhiên (cùng seed -> cùng dữ liệu)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Số bản ghi mỗi lô bulk insert')
+        parser.add_argument('--clear', action='store_true', help='Xóa dữ liệu giả lập đã sinh trước đó')
+        parser.add_argument('--index', action='store_true', help='Chạy rebuild_search_entries sau khi sinh dữ liệu')
+
+    def handle(self, *args, **options):
+        if options['specs'] > options['details']:
+            raise CommandError("--specs không được lớn hơn --details (mỗi thiết bị chỉ có một giá trị cho mỗi thông số).")
+
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        self.stdout.write(self.style.WARNING("🚀 SINH DỮ LIỆU NHÀ MÁY GIẢ LẬP\n"))
+
+        if options['clear']:
+            self.clear_seeded()
+
+        with transaction.atomic():
+            root, systems = self.create_tree(options)
+            self.stdout.write(f"   - Khu vực: {len(systems) + options['units'] + 1} nút (gốc {root.kks_code})")
+
+            details = Detail.objects.bulk_create(
+                [Detail(**row) for row in detail_rows(options['details'], options['languages'])],
+                batch_size=batch_size,
+            )
+            self.stdout.write(f"   - Thông số (Detail): {len(details)}")
+
+        totals = {'equipment': 0, 'values': 0}
+        for system_index, (location_id, system_kks) in enumerate(systems):
+            # Mỗi hệ thống một giao dịch: bộ nhớ ổn định, tiến độ được ghi dần
+            with transaction.atomic():
+                equipments = self.create_equipment(rng, location_id, system_kks, options['equipment'], batch_size)
+                totals['values'] += self.create_values(rng, equipments, details, options['specs'], batch_size)
+            totals['equipment'] += len(equipments)
+            if (system_index + 1) % 10 == 0 or system_index + 1 == len(systems):
+                self.stdout.write(
+                    f"   - {system_index + 1}/{len(systems)} hệ thống: "
+                    f"{totals['equipment']} thiết bị, {totals['values']} giá trị "
+                    f"({time.perf_counter() - started:.1f}s)"
+                )
+
+        self.invalidate_caches()
+
+        if options['index']:
+            call_command('rebuild_search_entries', batch_size=batch_size, stdout=self.stdout)
+        else:
+            self.stdout.write("   (Bản ghi bulk không đi qua signal -> chạy 'manage.py rebuild_search_entries' để tìm kiếm thấy dữ liệu mới)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✅ HOÀN TẤT! {totals['equipment']} thiết bị, {totals['values']} giá trị thông số "
+            f"trong {time.perf_counter() - started:.1f}s."
+        ))
+
+    # -----------------------------------------------------
+    # Cây KKS: Nhà máy -> Khối -> Hệ thống (ít nút -> load_bulk, đi qua save() bình thường)
+    # -----------------------------------------------------
+    def create_tree(self, options):
+        root_kks = f"{SEED_ROOT_PREFIX}{options['seed']}"
+        if FunctionalLocation.objects.filter(depth=1, kks_code=root_kks).exists():
+            raise CommandError(f"Đã có dữ liệu giả lập {root_kks}. Dùng --clear để sinh lại hoặc đổi --seed.")
+
+        units = []
+        for unit_index in range(options['units']):
+            unit_no = (unit_index + 1) * 10
+            units.append({
+                'data': {'name': f"Khối {unit_index + 1}", 'kks_code': str(unit_no)},
+                'children': [
+                    {'data': {'name': name, 'kks_code': kks}}
+                    for kks, name in system_codes(unit_no, options['systems'])
+                ],
+            })
+        FunctionalLocation.load_bulk([{
+            'data': {'name': f"Nhà máy giả lập (seed {options['seed']})", 'kks_code': root_kks},
+            'children': units,
+        }])
+
+        root = FunctionalLocation.objects.get(depth=1, kks_code=root_kks)
+        systems = list(
+            FunctionalLocation.objects.filter(path__startswith=root.path, depth=3)
+            .order_by('path').values_list('pk', 'kks_code')
+        )
+        return root, systems
+
+    # -----------------------------------------------------
+    # Thiết bị + hồ sơ số (bulk_create: bỏ qua save() -> không gọi TTS / chỉ mục)
+    # -----------------------------------------------------
+    def create_equipment(self, rng, location_id, system_kks, count, batch_size):
+        equipments = []
+        for index in range(count):
+            code, name = COMPONENTS[index % len(COMPONENTS)]
+            number = index // len(COMPONENTS) + 1
+            equipments.append(Equipment(
+                name=f"{name} {system_kks} #{number}",
+                kks_code=f"{system_kks}{code}{number:03d}",
+                location_id=location_id,
+                manufacturer=rng.choice(MANUFACTURERS),
+                model_number=f"{code}-{rng.randint(100, 9999)}",
+            ))
+        equipments = Equipment.objects.bulk_create(equipments, batch_size=batch_size)
+
+        EquipmentDigital.objects.bulk_create([
+            EquipmentDigital(
+                equipment_id=equipment.pk,
+                ip_address=f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                mac_address=':'.join(f"{rng.randint(0, 255):02X}" for _ in range(6)),
+                protocol=rng.choice(('modbus', 'opcua', 'mqtt', 'snmp')),
+                is_online=rng.random() < 0.8,
+                firmware_version=f"{rng.randint(1, 5)}.{rng.randint(0, 9)}.{rng.randint(0, 20)}",
+            )
+            for equipment in equipments
+        ], batch_size=batch_size)
+        return equipments
+
+    def create_values(self, rng, equipments, details, specs, batch_size):
+        batch, total = [], 0
+        for equipment in equipments:
+            for order, detail in enumerate(rng.sample(details, specs)):
+                low, high = value_range(detail.default_unit)
+                batch.append(EquipmentValue(
+                    equipment_id=equipment.pk,
+                    detail_id=detail.pk,
+                    value=f"{rng.uniform(low, high):.2f}".rstrip('0').rstrip('.'),
+                    sort_order=order,
+                ))
+            if len(batch) >= batch_size:
+                EquipmentValue.objects.bulk_create(batch, batch_size=batch_size)
+                total += len(batch)
+                batch = []
+        if batch:
+            EquipmentValue.objects.bulk_create(batch, batch_size=batch_size)
+            total += len(batch)
+        return total
+
+    # -----------------------------------------------------
+    # Dọn dữ liệu cũ / cache
+    # -----------------------------------------------------
+    def clear_seeded(self):
+        from search.indexing import remove_objects
+
+        roots = list(FunctionalLocation.objects.filter(depth=1, kks_code__startswith=SEED_ROOT_PREFIX))
+        for root in roots:
+            with transaction.atomic():
+                equipments = Equipment.objects.filter(location__path__startswith=root.path)
+                values = EquipmentValue.objects.filter(equipment__in=equipments)
+                equipment_ids = list(equipments.values_list('pk', flat=True))
+                value_ids = list(values.values_list('pk', flat=True))
+                detail_ids = set(values.values_list('detail_id', flat=True))
+                # Xóa thô: không nạp hàng triệu đối tượng qua Collector / signal
+                EquipmentValue.objects.filter(equipment__in=equipments)._raw_delete(EquipmentValue.objects.db)
+                EquipmentDigital.objects.filter(equipment__in=equipments)._raw_delete(EquipmentDigital.objects.db)
+                equipments._raw_delete(Equipment.objects.db)
+                # Detail chỉ còn được tham chiếu bởi dữ liệu giả lập
+                orphan_ids = detail_ids - set(
+                    EquipmentValue.objects.filter(detail_id__in=detail_ids).values_list('detail_id', flat=True)
+                )
+                Detail.objects.filter(pk__in=orphan_ids)._raw_delete(Detail.objects.db)
+                FunctionalLocation.objects.filter(path__startswith=root.path).delete()
+                # Xóa thô không phát signal -> tự gỡ bản ghi chỉ mục tìm kiếm (Khu vực đã gỡ qua signal của delete())
+                remove_objects('value', value_ids)
+                remove_objects('equipment', equipment_ids)
+                remove_objects('detail', orphan_ids)
+            self.stdout.write(f"   - Đã xóa dữ liệu giả lập {root.kks_code}")
+        if roots:
+            self.invalidate_caches()
+
+    def invalidate_caches(self):
+        from core.cache import tree_cache
+        from core.coverage import coverage_cache
+        from search.suggest import suggestion_index
+
+        tree_cache.clear()
+        coverage_cache.clear()
+        suggestion_index.invalidate()
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from area.models import FunctionalLocation
+from equipment.models import Equipment
+from core.renditions import ALL_RENDITION_SPECS, RENDITION_SETS, Image, warm_images
+
+
+class Command(BaseCommand):
+    help = "Tạo trước rendition WebP cho ảnh Khu vực / Thiết bị (các kích thước dùng trong grid và trang chi tiết)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sets',
+            nargs='+',
+            choices=list(RENDITION_SETS),
+            help='Nhóm rendition cần tạo. Mặc định: tất cả'
+        )
+        parser.add_argument('--all-images', action='store_true', help='Tạo cho mọi ảnh trong thư viện, không chỉ ảnh đang được gán')
+        parser.add_argument('--workers', type=int, default=4, help='Số luồng xử lý song song')
+
+    def handle(self, *args, **options):
+        specs = ALL_RENDITION_SPECS
+        if options['sets']:
+            specs = [spec for name in options['sets'] for spec in RENDITION_SETS[name]]
+
+        images = Image.objects.all()
+        if not options['all_images']:
+            used_ids = set(Equipment.objects.filter(image__isnull=False).values_list('image_id', flat=True))
+            used_ids |= set(FunctionalLocation.objects.filter(image__isnull=False).values_list('image_id', flat=True))
+            images = images.filter(pk__in=used_ids)
+
+        self.stdout.write(self.style.WARNING(f"🚀 TẠO RENDITION ({len(specs)} kích thước / ảnh)\n"))
+        count, renditions = warm_images(list(images.order_by('pk')), specs=specs, workers=options['workers'])
+        self.stdout.write(self.style.SUCCESS(f"\n✅ HOÀN TẤT! {count} ảnh, {renditions} rendition."))
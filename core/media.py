@@ -0,0 +1,258 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+logger = logging.getLogger(__name__)
+
+# Biến thể audio bitrate thấp (cho đường truyền chậm) lưu trong MEDIA_ROOT
+AUDIO_VARIANT_DIR = 'variants/audio'
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# =========================================================
+# 1. METADATA & RANGE
+# =========================================================
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """
+    Phân tích header Range (chỉ hỗ trợ một khoảng).
+    Trả về (start, end) bao gồm 2 đầu, None nếu bỏ qua header, 'invalid' nếu không thỏa mãn được (416).
+    """
+    if not header or ',' in header:
+        # Nhiều khoảng (multipart/byteranges) hiếm khi dùng -> trả cả tệp (hợp lệ theo RFC 9110)
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N : N byte cuối
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+
+def _if_range_matches(request, etag, mtime):
+    if_range = request.headers.get('if-range')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    date = parse_http_date_safe(if_range)
+    return date is not None and int(mtime) <= date
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _offload_response(path, content_type):
+    """
+    Giao việc gửi tệp cho web server (settings.MEDIA_SENDFILE):
+      - 'x-accel-redirect' (nginx): location nội bộ MEDIA_SENDFILE_URL_PREFIX trỏ tới MEDIA_ROOT
+      - 'x-sendfile' (Apache mod_xsendfile / lighttpd)
+    Web server tự xử lý Range -> worker gunicorn được giải phóng ngay.
+    """
+    method = getattr(settings, 'MEDIA_SENDFILE', None)
+    if not method:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if method == 'x-accel-redirect':
+        media_root = os.path.realpath(settings.MEDIA_ROOT)
+        real_path = os.path.realpath(path)
+        if os.path.commonpath([media_root, real_path]) != media_root:
+            return None
+        prefix = getattr(settings, 'MEDIA_SENDFILE_URL_PREFIX', '/protected-media/')
+        relative = os.path.relpath(real_path, media_root).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(relative)
+    elif method == 'x-sendfile':
+        response['X-Sendfile'] = path
+    else:
+        return None
+    return response
+
+
+# =========================================================
+# 2. PHỤC VỤ TỆP (Range / ETag / Last-Modified / Sendfile)
+# =========================================================
+def serve_file(request, path, content_type=None):
+    """
+    Trả về response cho một tệp trên đĩa:
+      - 304 khi ETag / Last-Modified khớp
+      - 206 khi có header Range (tua audio, mở bản vẽ lớn theo từng phần)
+      - X-Accel-Redirect / X-Sendfile khi đã cấu hình
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        # 304 không mang Content-Length (RFC 9110 §8.6): client có thể hiểu 0 là độ dài bản đã cache
+        return not_modified
+
+    response = _offload_response(path, content_type)
+    if response is None:
+        size = stat.st_size
+        byte_range = None
+        if _if_range_matches(request, etag, stat.st_mtime):
+            byte_range = parse_range(request.headers.get('range'), size)
+
+        if byte_range == 'invalid':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            response.body_length = 0
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(_iter_range(path, start, length), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = length
+            response.body_length = length
+        else:
+            # FileResponse dùng wsgi.file_wrapper -> gunicorn gửi bằng sendfile(2)
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response['Content-Length'] = size
+            response.body_length = size
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
+
+
+def sendfile(request, filename, mimetype=None, **kwargs):
+    """Backend cho wagtail.utils.sendfile (settings.SENDFILE_BACKEND = 'core.media')."""
+    return serve_file(request, filename, content_type=mimetype)
+
+
+def restore_content_length(response):
+    """
+    wagtail.utils.sendfile ghi đè Content-Length bằng kích thước cả tệp cho mọi response
+    -> đặt lại theo thân thật sự của serve_file (206: độ dài khoảng, 416: 0, 304: bỏ header).
+    """
+    if response.status_code == 304:
+        del response['Content-Length']
+        return response
+    body_length = getattr(response, 'body_length', None)
+    if body_length is not None:
+        response['Content-Length'] = body_length
+    return response
+
+
+# =========================================================
+# 3. BIẾN THỂ AUDIO BITRATE THẤP (ffmpeg)
+# =========================================================
+_pending_variants = set()
+_pending_lock = threading.Lock()
+
+
+def wants_low_bandwidth(request):
+    """?variant=low hoặc trình duyệt bật chế độ tiết kiệm dữ liệu (Save-Data: on)."""
+    variant = request.GET.get('variant')
+    if variant:
+        return variant == 'low'
+    return request.headers.get('save-data', '').lower() == 'on'
+
+
+def audio_variant_path(path):
+    stat = os.stat(path)
+    bitrate = getattr(settings, 'MEDIA_AUDIO_LOW_BITRATE', '32k')
+    key = hashlib.sha1(f"{path}\x00{stat.st_size}\x00{stat.st_mtime_ns}\x00{bitrate}".encode('utf-8')).hexdigest()
+    return os.path.join(settings.MEDIA_ROOT, AUDIO_VARIANT_DIR, key[:2], f"{key}.mp3")
+
+
+def transcode_audio(source, target):
+    """Chuyển sang MP3 mono bitrate thấp. Ghi ra tệp tạm rồi đổi tên để không phục vụ tệp dở dang."""
+    binary = shutil.which('ffmpeg')
+    if not binary:
+        return False
+    bitrate = getattr(settings, 'MEDIA_AUDIO_LOW_BITRATE', '32k')
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.mp3', dir=os.path.dirname(target))
+    os.close(fd)
+    try:
+        subprocess.run(
+            [binary, '-y', '-loglevel', 'error', '-i', source, '-ac', '1', '-ar', '22050',
+             '-codec:a', 'libmp3lame', '-b:a', bitrate, tmp_path],
+            capture_output=True, timeout=300, check=True,
+        )
+        os.replace(tmp_path, target)
+        return True
+    except Exception as e:
+        logger.error(f"Audio transcode error for {source}: {e}")
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _transcode_job(source, target):
+    try:
+        transcode_audio(source, target)
+    finally:
+        with _pending_lock:
+            _pending_variants.discard(target)
+
+
+def get_audio_variant(path):
+    """
+    Đường dẫn biến thể bitrate thấp nếu đã có sẵn; nếu chưa thì lên lịch chuyển mã nền
+    và trả về None (lần này phục vụ tệp gốc).
+    """
+    if not shutil.which('ffmpeg'):
+        return None
+    target = audio_variant_path(path)
+    if os.path.exists(target):
+        return target
+    with _pending_lock:
+        if target in _pending_variants:
+            return None
+        _pending_variants.add(target)
+    from core.background import run_in_background
+    run_in_background(_transcode_job, path, target)
+    return None
+
+
+def serve_audio(request, path):
+    if wants_low_bandwidth(request):
+        variant = get_audio_variant(path)
+        if variant:
+            path = variant
+    response = serve_file(request, path)
+    patch_vary_headers(response, ['Save-Data'])
+    response['Cache-Control'] = 'private, max-age=3600'
+    return response
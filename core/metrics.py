@@ -0,0 +1,169 @@
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    # Tùy chọn: pip install prometheus-client (không có -> mọi hàm bên dưới không làm gì)
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+# =========================================================
+# ĐỊNH NGHĨA METRIC
+# =========================================================
+# Nhiều worker gunicorn: đặt PROMETHEUS_MULTIPROC_DIR (xem gunicorn.conf.py) -> mỗi worker ghi
+# số liệu ra tệp mmap trong thư mục đó, /metrics cộng gộp lại khi được scrape.
+DB_QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        'powerplant_request_duration_seconds', 'Thời gian xử lý request theo viewset / view',
+        ['view', 'method'],
+    )
+    REQUESTS = Counter(
+        'powerplant_requests_total', 'Số request theo viewset / view và mã trạng thái',
+        ['view', 'method', 'status'],
+    )
+    REQUEST_DB_QUERIES = Histogram(
+        'powerplant_request_db_queries', 'Số câu SQL mỗi request',
+        ['view'], buckets=DB_QUERY_BUCKETS,
+    )
+    CACHE_LOOKUPS = Counter(
+        'powerplant_cache_lookups_total', 'Tra cứu core.cache theo namespace (labels, prompts, tree, suggest...)',
+        ['namespace', 'result'],
+    )
+    AI_LATENCY = Histogram(
+        'powerplant_ai_call_duration_seconds', 'Thời gian gọi Gemini theo loại prompt',
+        ['prompt_type'], buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+    )
+    AI_ERRORS = Counter(
+        'powerplant_ai_call_errors_total', 'Lỗi gọi Gemini theo loại prompt',
+        ['prompt_type', 'reason'],
+    )
+    AI_RETRIES = Counter(
+        'powerplant_ai_call_retries_total', 'Số lần gọi lại Gemini theo loại prompt',
+        ['prompt_type'],
+    )
+    TRANSLATION_LOOKUPS = Counter(
+        'powerplant_translation_lookups_total', 'Bản dịch theo provider đã trả lời (none = không provider nào dịch được)',
+        ['provider'],
+    )
+    TRANSLATIONS_IN_PROGRESS = Gauge(
+        'powerplant_translations_in_progress', 'Số trường đang được dịch tự động',
+        multiprocess_mode='livesum',
+    )
+    BACKGROUND_QUEUED = Gauge(
+        'powerplant_background_tasks_queued', 'Tác vụ nền đang chờ trong hàng đợi thread',
+        ['task'], multiprocess_mode='livesum',
+    )
+    BACKGROUND_DURATION = Histogram(
+        'powerplant_background_task_duration_seconds', 'Thời gian chạy tác vụ nền',
+        ['task'], buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900),
+    )
+    BACKGROUND_ERRORS = Counter(
+        'powerplant_background_task_errors_total', 'Tác vụ nền lỗi',
+        ['task'],
+    )
+
+
+def enabled():
+    return prometheus_client is not None and getattr(settings, 'METRICS_ENABLED', True)
+
+
+def view_label(request):
+    """Nhãn ít biến thể (không chứa id): namespace viewset của Wagtail, hoặc tên URL."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.namespace or match.url_name or match.view_name or 'unnamed'
+
+
+# =========================================================
+# GHI NHẬN
+# =========================================================
+def observe_request(request, response, request_metrics):
+    if not enabled():
+        return
+    view = view_label(request)
+    REQUEST_LATENCY.labels(view, request.method).observe(request_metrics.elapsed())
+    REQUESTS.labels(view, request.method, str(response.status_code)).inc()
+    REQUEST_DB_QUERIES.labels(view).observe(request_metrics.counts['db'])
+
+
+def record_cache(namespace, hit):
+    if enabled():
+        CACHE_LOOKUPS.labels(namespace, 'hit' if hit else 'miss').inc()
+
+
+def observe_ai_call(prompt_type, seconds, error=None):
+    if not enabled():
+        return
+    prompt_type = prompt_type or 'other'
+    AI_LATENCY.labels(prompt_type).observe(seconds)
+    if error:
+        AI_ERRORS.labels(prompt_type, error).inc()
+
+
+def record_ai_retry(prompt_type):
+    if enabled():
+        AI_RETRIES.labels(prompt_type or 'other').inc()
+
+
+def record_translation_lookup(provider):
+    if enabled():
+        TRANSLATION_LOOKUPS.labels(provider).inc()
+
+
+@contextmanager
+def track_translation():
+    if not enabled():
+        yield
+        return
+    TRANSLATIONS_IN_PROGRESS.inc()
+    try:
+        yield
+    finally:
+        TRANSLATIONS_IN_PROGRESS.dec()
+
+
+def task_queued(name):
+    if enabled():
+        BACKGROUND_QUEUED.labels(name).inc()
+
+
+@contextmanager
+def track_task(name, queued=True):
+    """Bao quanh thân tác vụ nền: rời hàng đợi -> đo thời gian chạy, đếm lỗi."""
+    if not enabled():
+        yield
+        return
+    if queued:
+        BACKGROUND_QUEUED.labels(name).dec()
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        BACKGROUND_ERRORS.labels(name).inc()
+        raise
+    finally:
+        BACKGROUND_DURATION.labels(name).observe(time.perf_counter() - started)
+
+
+# =========================================================
+# XUẤT (GET /metrics)
+# =========================================================
+def render_latest():
+    """(bytes, content_type) theo định dạng văn bản của Prometheus."""
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,145 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from . import metrics, perf
+
+
+class NotModifiedMiddleware:
+    """
+    Gỡ Content-Length khỏi response 304: CommonMiddleware tự thêm "Content-Length: 0" cho mọi response
+    không streaming, nhưng 304 chỉ được mang độ dài của thân 200 đầy đủ (RFC 9110 §8.6)
+    -> client / proxy có thể ghi đè độ dài bản đã cache bằng 0. Đặt trước CommonMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.status_code == 304:
+            del response['Content-Length']
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Đo từng request: số câu SQL + thời gian, cache nhãn hit/miss, số lần gọi AI, rendition sinh mới.
+      - Header Server-Timing (xem trong tab Network / Timing của DevTools).
+      - Bảng thu gọn cuối trang Admin cho superuser (PERF_PANEL).
+    Chỉ lấy mẫu PERF_SAMPLE_RATE phần request (superuser trong Admin luôn được đo) -> để bật được trên production.
+    Khi bật Prometheus (core.metrics) mọi request đều được đếm để vẽ histogram, nhưng header / bảng vẫn theo mẫu.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', 0.05)
+        self.show_panel = getattr(settings, 'PERF_PANEL', True)
+        self.admin_prefix = getattr(settings, 'PERF_ADMIN_PREFIX', '/admin/')
+        self.export = metrics.enabled()
+
+    def wants_panel(self, request):
+        return (
+            self.show_panel
+            and request.path.startswith(self.admin_prefix)
+            and getattr(request, 'user', None) is not None
+            and request.user.is_superuser
+        )
+
+    def __call__(self, request):
+        panel = self.wants_panel(request)
+        sampled = panel or random.random() < self.sample_rate
+        if not sampled and not self.export:
+            return self.get_response(request)
+
+        request_metrics, token = perf.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(perf.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            perf.stop(token)
+
+        if self.export:
+            metrics.observe_request(request, response, request_metrics)
+        if sampled:
+            response['Server-Timing'] = perf.server_timing(request_metrics)
+        if panel:
+            self.inject_panel(response, request_metrics)
+        return response
+
+    def inject_panel(self, response, request_metrics):
+        if response.streaming or not response.get('Content-Type', '').startswith('text/html'):
+            return
+        content = response.content
+        index = content.rfind(b'</body>')
+        if index == -1:
+            return
+        label_hits, label_misses = request_metrics.cache_totals('labels')
+        cache_hits, cache_misses = request_metrics.cache_totals()
+        html = render_to_string('core/admin/perf_panel.html', {
+            'total_ms': request_metrics.elapsed() * 1000,
+            'db_count': request_metrics.counts['db'],
+            'db_ms': request_metrics.durations['db'] * 1000,
+            'label_hits': label_hits,
+            'label_misses': label_misses,
+            'cache_hits': cache_hits,
+            'cache_misses': cache_misses,
+            'ai_count': request_metrics.counts['ai'],
+            'ai_ms': request_metrics.durations['ai'] * 1000,
+            'rendition_count': request_metrics.counts['rendition'],
+        }).encode(response.charset)
+        response.content = content[:index] + html + content[index:]
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = len(response.content)
+
+
+class ProfilingMiddleware:
+    """
+    Superuser thêm ?_profile=1 vào URL bất kỳ trong Admin -> chạy request dưới profiler (core.profiling)
+    và trả về cây lời gọi thay cho trang (gồm cả render template, ORM, treebeard).
+    ?_profile=download -> tải tệp profile. Mỗi profile được lưu vào kho vòng để so sánh sau.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PROFILING_ENABLED', True)
+        self.admin_prefix = getattr(settings, 'PERF_ADMIN_PREFIX', '/admin/')
+
+    def __call__(self, request):
+        mode = request.GET.get('_profile')
+        if (
+            not mode
+            or not self.enabled
+            or not request.path.startswith(self.admin_prefix)
+            or not getattr(request, 'user', None)
+            or not request.user.is_superuser
+        ):
+            return self.get_response(request)
+
+        from . import profiling
+
+        started = time.perf_counter()
+        response, html, download = profiling.profile_call(lambda: self.get_response(request))
+        profile_id = profiling.save_profile({
+            'path': request.get_full_path(),
+            'method': request.method,
+            'status': response.status_code,
+            'user': request.user.get_username(),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        }, html, download)
+
+        if mode == 'download':
+            result = HttpResponse(download[1], content_type='application/octet-stream')
+            result['Content-Disposition'] = f'attachment; filename="{profile_id}-{download[0]}"'
+            return result
+        result = HttpResponse(html)
+        result['X-Profile-Url'] = reverse('core_profile_detail', args=[profile_id])
+        return result
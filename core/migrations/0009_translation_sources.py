@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:24
+
+from django.db import migrations, models
+
+
+def backfill_translation_sources(apps, schema_editor):
+    # Bản dịch có sẵn được coi là khớp với văn bản nguồn hiện tại -> không bị dịch lại hàng loạt
+    from core.translation_state import initial_sources
+
+    Model = apps.get_model('core', 'SystemLabel')
+    prefixes = ('text',)
+    fields = [f.attname for f in Model._meta.concrete_fields if any(f.attname.startswith(f"{p}_") for p in prefixes)]
+    batch = []
+    for obj in Model.objects.only('pk', *fields).iterator(chunk_size=2000):
+        obj.translation_sources = initial_sources(obj.__dict__, fields, prefixes)
+        if obj.translation_sources:
+            batch.append(obj)
+        if len(batch) >= 2000:
+            Model.objects.bulk_update(batch, ['translation_sources'])
+            batch = []
+    if batch:
+        Model.objects.bulk_update(batch, ['translation_sources'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemlabel',
+            name='translation_sources',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Nguồn bản dịch'),
+        ),
+        migrations.RunPython(backfill_translation_sources, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_translation_sources'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemlabel',
+            name='translation_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Phiên bản bản dịch'),
+        ),
+    ]
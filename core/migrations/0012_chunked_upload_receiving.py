@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_translation_stale'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chunkedupload',
+            name='status',
+            field=models.CharField(choices=[('uploading', 'Đang tải lên'), ('receiving', 'Đang nhận dữ liệu'), ('complete', 'Hoàn tất')], default='uploading', max_length=20),
+        ),
+    ]
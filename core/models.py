@@ -1,10 +1,15 @@
-from django.db import models
+import uuid
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import models, router
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_save, post_migrate
+from django.db.models.signals import post_save, post_delete, post_migrate
 from django.dispatch import receiver
 from django.core.management import call_command
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
+from wagtail.documents import get_document_model_string
 from django.db import transaction
 
 # =========================================================
@@ -61,10 +66,166 @@ class AIPrompt(models.Model):
     class Meta: verbose_name = _("Cấu hình AI Prompt"); verbose_name_plural = _("Cấu hình AI Prompt")
 
 # =========================================================
-# 3. SYSTEM LABEL (CẬP NHẬT CÁC TRƯỜNG CỤ THỂ)
+# 3. THEO DÕI NGUỒN BẢN DỊCH (DÙNG CHUNG CHO MODEL ĐA NGÔN NGỮ)
+# =========================================================
+class TranslationTrackingMixin(models.Model):
+    """
+    Ghi nhớ giá trị các trường đa ngôn ngữ lúc nạp từ DB để biết lần save() này đổi trường nào,
+    và lưu hash văn bản nguồn của từng bản dịch (core.translation_state).
+    -> Sửa trường không liên quan (VD: đơn vị) không kích hoạt dịch; nguồn đổi -> chỉ dịch lại các trường đích bị cũ.
+
+    Ghi đồng thời (người sửa trong Admin + nhiều worker dịch) không mất dữ liệu:
+    - save() của bản ghi đã có chỉ ghi các trường đa ngôn ngữ thực sự sửa (không ghi đè bản dịch worker vừa lưu).
+    - Kết quả dịch được lưu bằng save_translations(): UPDATE có điều kiện theo translation_version (optimistic lock),
+      xung đột -> nạp lại và chỉ giữ trường đích chưa bị ai sửa, văn bản nguồn vẫn khớp hash.
+    """
+    # Tiền tố các nhóm trường đa ngôn ngữ: 'name' -> name_vi, name_en, ...
+    translated_prefixes = ()
+    # Số lần thử lại UPDATE có điều kiện khi phiên bản bị đổi giữa chừng
+    translation_save_attempts = 3
+
+    translation_sources = models.JSONField(default=dict, blank=True, editable=False, verbose_name=_("Nguồn bản dịch"))
+    translation_version = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Phiên bản bản dịch"))
+    # Bản dịch tự động có nguồn đã đổi nhưng chưa dịch lại (provider lỗi / ngôn ngữ chưa bật): {trường đích: trường nguồn}
+    translation_stale = models.JSONField(default=dict, blank=True, editable=False, verbose_name=_("Bản dịch cũ"))
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def translated_field_names(cls):
+        return [
+            f.attname for f in cls._meta.concrete_fields
+            if any(f.attname.startswith(f"{prefix}_") for prefix in cls.translated_prefixes)
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.mark_translation_clean()
+        return instance
+
+    def mark_translation_clean(self):
+        deferred = self.get_deferred_fields()
+        self._translation_snapshot = {
+            name: getattr(self, name) for name in self.translated_field_names() if name not in deferred
+        }
+
+    def translation_changes(self):
+        """Các trường đa ngôn ngữ đã đổi so với lúc nạp (mọi trường nếu là bản ghi mới)."""
+        snapshot = getattr(self, '_translation_snapshot', None)
+        if self._state.adding or snapshot is None:
+            return {name for name in self.translated_field_names() if getattr(self, name)}
+        return {name for name, value in snapshot.items() if getattr(self, name) != value}
+
+    def _partial_update_fields(self):
+        """Trường cần ghi khi người dùng save() bản ghi đã có: mọi trường trừ trường đa ngôn ngữ không sửa."""
+        skipped = set(self.translated_field_names()) - self.translation_changed
+        skipped |= {'translation_sources', 'translation_version', 'translation_stale'} | self.get_deferred_fields()
+        return [f.attname for f in self._meta.concrete_fields if not f.primary_key and f.attname not in skipped]
+
+    def save(self, *args, **kwargs):
+        from core.translation_state import mark_edits, stale_fields
+
+        self.translation_changed = self.translation_changes()
+        existing = not self._state.adding and hasattr(self, '_translation_snapshot') and not kwargs.get('force_insert')
+        if kwargs.get('update_fields') is not None:
+            self.translation_changed &= set(kwargs['update_fields'])
+        elif existing:
+            kwargs['update_fields'] = self._partial_update_fields()
+
+        bumped = bool(self.translation_changed) and existing
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        # Đọc translation_sources -> gộp -> ghi trong cùng một giao dịch, khóa hàng tới khi ghi xong:
+        # save_translations() của worker dịch không chen vào giữa (nếu chen, UPDATE của nó thấy phiên bản đổi -> thử lại)
+        with transaction.atomic(using=using) if bumped else nullcontext():
+            if self.translation_changed:
+                if bumped:
+                    # Gộp vào translation_sources mới nhất trong DB (worker có thể vừa ghi bản dịch khác)
+                    current = (
+                        type(self)._default_manager.using(using).select_for_update()
+                        .filter(pk=self.pk).values_list('translation_sources', flat=True).first()
+                    )
+                    if current is not None:
+                        self.translation_sources = current
+                    self.translation_version = models.F('translation_version') + 1
+                mark_edits(self, self.translation_changed, self.translated_prefixes)
+                self.translation_stale = stale_fields(self)
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {*kwargs['update_fields'], 'translation_sources', 'translation_version', 'translation_stale'}
+            super().save(*args, **kwargs)
+        if bumped:
+            self.refresh_from_db(fields=['translation_version'])
+        self.mark_translation_clean()
+
+    def translation_baseline(self):
+        """Trạng thái trước khi chạy pipeline dịch - truyền lại cho save_translations()."""
+        return {
+            'values': {name: getattr(self, name) for name in self.translated_field_names()},
+            'sources': dict(self.translation_sources),
+            'version': self.translation_version,
+        }
+
+    def save_translations(self, baseline):
+        """
+        Lưu các trường pipeline dịch vừa điền (so với `baseline`) bằng UPDATE có điều kiện
+        `translation_version = phiên bản lúc đọc`. Không khóa hàng, không ghi đè chỉnh sửa xen giữa.
+        Trả về tập trường đã lưu.
+        """
+        from core.translation_state import source_hash, stale_fields
+
+        model = type(self)
+        fields = self.translated_field_names()
+        updates = {name: getattr(self, name) for name in fields if getattr(self, name) != baseline['values'][name]}
+        entries = {name: self.translation_sources[name] for name in updates if name in self.translation_sources}
+        current_values, current_sources, version = baseline['values'], baseline['sources'], baseline['version']
+
+        for _attempt in range(self.translation_save_attempts):
+            if not updates:
+                return set()
+            sources = {**current_sources, **entries}
+            for name in fields:
+                setattr(self, name, updates.get(name, current_values[name]))
+            self.translation_sources = sources
+            stale = stale_fields(self)
+            saved = model._default_manager.filter(pk=self.pk, translation_version=version).update(
+                translation_sources=sources, translation_stale=stale, translation_version=version + 1, **updates
+            )
+            if saved:
+                # update() không phát signal -> tự vô hiệu báo cáo độ phủ bản dịch
+                from core.coverage import coverage_cache
+                coverage_cache.clear()
+                self.translation_stale = stale
+                self.translation_version = version + 1
+                self.mark_translation_clean()
+                return set(updates)
+
+            # Xung đột: nạp lại, chỉ giữ trường đích chưa bị sửa và có văn bản nguồn chưa đổi
+            row = model._default_manager.filter(pk=self.pk).values(*fields, 'translation_sources', 'translation_version').first()
+            if row is None:
+                return set()
+            current_sources, version = row['translation_sources'], row['translation_version']
+            updates = {name: value for name, value in updates.items() if row[name] == current_values[name]}
+            dropped = True
+            while dropped:
+                # Nguồn là trường cũng đang được ghi (VD: name_en -> name_th) thì so với giá trị sắp ghi
+                dropped = [
+                    name for name in updates
+                    if name in entries and source_hash(updates.get(entries[name][0], row.get(entries[name][0]))) != entries[name][1]
+                ]
+                for name in dropped:
+                    updates.pop(name)
+            entries = {name: entry for name, entry in entries.items() if name in updates}
+            current_values = {name: row[name] for name in fields}
+        return set()
+
+# =========================================================
+# 4. SYSTEM LABEL (CẬP NHẬT CÁC TRƯỜNG CỤ THỂ)
 # =========================================================
 # @register_snippet
-class SystemLabel(models.Model):
+class SystemLabel(TranslationTrackingMixin, models.Model):
+    translated_prefixes = ('text',)
+
     # ... (Các field giữ nguyên) ...
     APP_CHOICES = [
         ('common', _('Dùng chung (Common)')),
@@ -115,7 +276,8 @@ class SystemLabel(models.Model):
 
         # 2. Sử dụng on_commit để gọi AI dịch thuật SAU KHI giao dịch save hoàn tất
         # Điều này tránh việc API call (chậm) giữ khóa DB quá lâu
-        if self.text_vi or self.text_zh:
+        # Chỉ khi trường đa ngôn ngữ thực sự thay đổi (sửa app / description không tốn lời gọi AI)
+        if self.translation_changed and (self.text_vi or self.text_zh):
             transaction.on_commit(lambda: self.trigger_auto_translate())
 
     def trigger_auto_translate(self):
@@ -127,22 +289,53 @@ class SystemLabel(models.Model):
         
         # Refresh object từ DB để đảm bảo dữ liệu mới nhất
         self.refresh_from_db()
+        baseline = self.translation_baseline()
         
         # Gọi AI dịch thuật (Hàm này sẽ gọi API và update field)
-        updated_instance = auto_translate_label(self)
+        auto_translate_label(self)
         
-        # Lưu lại các thay đổi do AI tạo ra (dịch bổ sung)
-        # Sử dụng update_fields để chỉ update các trường ngôn ngữ, tránh conflict
-        # Tuy nhiên, auto_translate_label trả về instance đã set attribute, ta cần save lại.
-        # Để an toàn với SQLite, ta dùng super().save() một lần nữa ở đây.
-        # Vì nó nằm trong on_commit nên sẽ là một transaction mới, ít gây lock hơn.
-        super(SystemLabel, self).save()
+        # Lưu lại các thay đổi do AI tạo ra (dịch bổ sung) bằng UPDATE có điều kiện theo phiên bản:
+        # chỉ các trường vừa dịch, không ghi đè chỉnh sửa của người dùng trong lúc chờ API (không giữ khóa hàng)
+        if self.save_translations(baseline):
+            # update() không phát signal post_save -> tự vô hiệu cache nhãn + cập nhật từ điển dịch
+            from core.cache import label_cache
+            from core.translation_providers import glossary
+            label_cache.clear()
+            glossary.update(self)
 
     def __str__(self): return f"[{self.get_app_display()}] {self.key}"
     class Meta: verbose_name = _("Nhãn giao diện"); unique_together = ('app', 'key')
 
 # =========================================================
-# 4. SIGNALS & DATA SEEDING
+# 5. TẢI LÊN THEO TỪNG PHẦN (CHUNKED / RESUMABLE UPLOAD)
+# =========================================================
+class ChunkedUpload(models.Model):
+    """
+    Phiên tải lên tài liệu lớn theo từng phần. Dữ liệu được ghi nối tiếp vào tệp tạm
+    (core.uploads.upload_temp_path); 'offset' = số byte đã nhận -> client hỏi lại để tải tiếp sau khi mất mạng.
+    """
+    STATUS_CHOICES = [
+        ('uploading', _('Đang tải lên')),
+        # Một request đang ghi phần tiếp theo (core.uploads._claim)
+        ('receiving', _('Đang nhận dữ liệu')),
+        ('complete', _('Hoàn tất')),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    document = models.ForeignKey(get_document_model_string(), null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self): return f"{self.filename} ({self.offset}/{self.total_size})"
+    class Meta: verbose_name = _("Phiên tải lên"); verbose_name_plural = _("Phiên tải lên")
+
+# =========================================================
+# 6. SIGNALS & DATA SEEDING
 # =========================================================
 @receiver(post_save, sender=SystemLanguage)
 def trigger_scan_on_new_language(sender, instance, created, **kwargs):
@@ -150,6 +343,17 @@ def trigger_scan_on_new_language(sender, instance, created, **kwargs):
         try: call_command('scan_system_labels')
         except: pass
 
+@receiver([post_save, post_delete], sender=SystemLabel)
+def invalidate_label_cache(sender, **kwargs):
+    # Vô hiệu cache nhãn ở mọi worker (core.cache)
+    from core.cache import label_cache
+    label_cache.clear()
+
+@receiver([post_save, post_delete], sender=AIPrompt)
+def invalidate_prompt_cache(sender, **kwargs):
+    from core.cache import prompt_cache
+    prompt_cache.clear()
+
 @receiver(post_migrate)
 def create_default_languages(sender, **kwargs):
     if sender.name == 'core':
@@ -171,4 +375,4 @@ def create_default_languages(sender, **kwargs):
             ('fil', 'Tiếng Filipino', '🇵🇭'),
         ]
         for code, name, flag in sea_langs:
-            SystemLanguage.objects.get_or_create(code=code, defaults={'name': name, 'flag': flag, 'is_core': False})
\ No newline at end of file
+            SystemLanguage.objects.get_or_create(code=code, defaults={'name': name, 'flag': flag, 'is_core': False})
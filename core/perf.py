@@ -0,0 +1,120 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Số liệu của request hiện tại (None nếu request không được lấy mẫu / đang chạy trong thread nền)
+_current = ContextVar('perf_metrics', default=None)
+
+
+class RequestMetrics:
+    """Bộ đếm + tổng thời gian (giây) theo tên cho một request."""
+
+    __slots__ = ('started', 'counts', 'durations')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.counts = defaultdict(int)
+        self.durations = defaultdict(float)
+
+    def incr(self, name, amount=1):
+        self.counts[name] += amount
+
+    def add(self, name, seconds):
+        self.counts[name] += 1
+        self.durations[name] += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def cache_totals(self, namespace=None):
+        """(hit, miss) của core.cache, cho một namespace hoặc tất cả."""
+        hits = misses = 0
+        for name, count in self.counts.items():
+            if not name.startswith('cache.'):
+                continue
+            _, ns, kind = name.split('.', 2)
+            if namespace and ns != namespace:
+                continue
+            if kind == 'hit':
+                hits += count
+            else:
+                misses += count
+        return hits, misses
+
+
+def current():
+    return _current.get()
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+# =========================================================
+# GHI NHẬN (Gọi được ở mọi nơi; không làm gì nếu request không được lấy mẫu)
+# =========================================================
+def incr(name, amount=1):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.incr(name, amount)
+
+
+@contextmanager
+def timed(name):
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - started)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrapper: đếm số câu SQL và tổng thời gian của request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add('db', time.perf_counter() - started)
+
+
+# =========================================================
+# XUẤT RA HEADER SERVER-TIMING
+# =========================================================
+def server_timing(metrics):
+    def entry(name, seconds=None, desc=None):
+        parts = [name]
+        if seconds is not None:
+            parts.append(f"dur={seconds * 1000:.1f}")
+        if desc:
+            parts.append(f'desc="{desc}"')
+        return ';'.join(parts)
+
+    counts, durations = metrics.counts, metrics.durations
+    entries = [
+        entry('total', metrics.elapsed()),
+        entry('db', durations['db'], f"{counts['db']} queries"),
+    ]
+    label_hits, label_misses = metrics.cache_totals('labels')
+    if label_hits or label_misses:
+        entries.append(entry('label', desc=f"hit {label_hits} / miss {label_misses}"))
+    cache_hits, cache_misses = metrics.cache_totals()
+    if cache_hits or cache_misses:
+        entries.append(entry('cache', desc=f"hit {cache_hits} / miss {cache_misses}"))
+    if counts['ai']:
+        entries.append(entry('ai', durations['ai'], f"{counts['ai']} calls"))
+    if counts['rendition']:
+        entries.append(entry('rendition', desc=f"{counts['rendition']} generated"))
+    return ', '.join(entries)
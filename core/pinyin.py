@@ -0,0 +1,147 @@
+import re
+import threading
+import unicodedata
+
+try:
+    # Tùy chọn: pip install pypinyin (từ điển chữ + cụm từ có dấu thanh, chạy hoàn toàn offline)
+    from pypinyin import Style, load_phrases_dict, pinyin
+    from pypinyin.seg import mmseg
+except ImportError:  # pragma: no cover
+    pinyin = None
+
+HAN_RE = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]')
+HAN_RUN_RE = re.compile(r'([\u3400-\u9fff\uf900-\ufaff]+)')
+
+# =========================================================
+# TỪ VỰNG KỸ THUẬT NHIỆT ĐIỆN
+# =========================================================
+# Bổ sung cho từ điển của pypinyin: cụm từ chuyên ngành (để tách từ đúng) và chữ đa âm
+# đọc khác nghĩa thông dụng (差压 chā, 给水 jǐ, 调节 tiáo, 重油 zhòng...)
+TECHNICAL_PHRASES = {
+    '超临界': "chāo lín jiè",
+    '亚临界': "yà lín jiè",
+    '锅炉': "guō lú",
+    '汽包': "qì bāo",
+    '汽轮机': "qì lún jī",
+    '发电机': "fā diàn jī",
+    '励磁机': "lì cí jī",
+    '给水': "jǐ shuǐ",
+    '给水泵': "jǐ shuǐ bèng",
+    '给煤机': "gěi méi jī",
+    '磨煤机': "mó méi jī",
+    '省煤器': "shěng méi qì",
+    '过热器': "guò rè qì",
+    '再热器': "zài rè qì",
+    '空气预热器': "kōng qì yù rè qì",
+    '除氧器': "chú yǎng qì",
+    '凝汽器': "níng qì qì",
+    '凝结水': "níng jié shuǐ",
+    '循环水': "xún huán shuǐ",
+    '冷却': "lěng què",
+    '冷却水': "lěng què shuǐ",
+    '主蒸汽': "zhǔ zhēng qì",
+    '引风机': "yǐn fēng jī",
+    '送风机': "sòng fēng jī",
+    '一次风机': "yī cì fēng jī",
+    '脱硫': "tuō liú",
+    '脱硝': "tuō xiāo",
+    '差压': "chā yā",
+    '压差': "yā chā",
+    '温差': "wēn chā",
+    '偏差': "piān chā",
+    '调节': "tiáo jié",
+    '调节阀': "tiáo jié fá",
+    '调速': "tiáo sù",
+    '调压': "tiáo yā",
+    '调度': "diào dù",
+    '重油': "zhòng yóu",
+    '重启': "chóng qǐ",
+    '行程': "xíng chéng",
+    '开关': "kāi guān",
+    '长度': "cháng dù",
+    '转速': "zhuàn sù",
+    '转子': "zhuàn zǐ",
+    '转换': "zhuǎn huàn",
+    '传感器': "chuán gǎn qì",
+    '变送器': "biàn sòng qì",
+    '变压器': "biàn yā qì",
+    '断路器': "duàn lù qì",
+    '轴承': "zhóu chéng",
+    '入口': "rù kǒu",
+    '出口': "chū kǒu",
+    '额定': "é dìng",
+    '液位': "yè wèi",
+    '水位': "shuǐ wèi",
+    '流量': "liú liàng",
+    '数量': "shù liàng",
+    '着火': "zháo huǒ",
+}
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def available():
+    return pinyin is not None
+
+
+def _ensure_phrases():
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            # load_phrases_dict huấn luyện lại bộ tách từ mmseg -> cụm kỹ thuật được giữ nguyên
+            load_phrases_dict({phrase: [[s] for s in syllables.split()] for phrase, syllables in TECHNICAL_PHRASES.items()})
+            _loaded = True
+
+
+def _join_syllables(syllables):
+    # Âm tiết bắt đầu bằng a/o/e trong cùng một từ cần dấu cách âm: xī'ān, píng'ān
+    word = syllables[0]
+    for syllable in syllables[1:]:
+        base = unicodedata.normalize('NFD', syllable)[:1].lower()
+        word += f"'{syllable}" if base in 'aoe' else syllable
+    return word
+
+
+def to_pinyin(text):
+    """
+    Hanzi -> Pinyin có dấu thanh, ghép theo từ, viết hoa chữ đầu (VD: '超临界锅炉' -> 'Chāolínjiè guōlú').
+    Ký tự không phải chữ Hán được giữ nguyên. None nếu không có pypinyin hoặc không có chữ Hán.
+    """
+    if pinyin is None or not text or not HAN_RE.search(text):
+        return None
+    _ensure_phrases()
+
+    words = []
+    # Chỉ đưa đoạn chữ Hán vào mmseg; đoạn còn lại (mã KKS, số, ngoặc...) giữ nguyên: '锅炉10LAC10'
+    for index, run in enumerate(HAN_RUN_RE.split(text)):
+        if index % 2 == 0:
+            if run.strip():
+                words.append(run.strip())
+            continue
+        words.extend(_join_syllables(syllables) for syllables in _han_words(run))
+
+    result = ' '.join(words)
+    # Dấu câu không tách khỏi từ đứng trước, ngoặc mở không tách khỏi từ đứng sau
+    result = re.sub(r'\s+([,.;:!?)\]，。；：！？）])', r'\1', result)
+    result = re.sub(r'([(\[（])\s+', r'\1', result)
+    return result[:1].upper() + result[1:]
+
+
+def _han_words(run):
+    # mmseg tách chữ lẻ với từ không có trong từ điển (西安 -> 西/安): các chữ lẻ liền nhau ghép thành một từ
+    words, singles = [], []
+    for segment in mmseg.seg.cut(run):
+        syllables = [item[0] for item in pinyin(segment, style=Style.TONE, errors='default')]
+        if len(segment) == 1:
+            singles.extend(syllables)
+            continue
+        if singles:
+            words.append(singles)
+            singles = []
+        words.append(syllables)
+    if singles:
+        words.append(singles)
+    return words
@@ -0,0 +1,122 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.utils.html import escape
+
+try:
+    # Tùy chọn: pip install pyinstrument (profile lấy mẫu, cây lời gọi dạng HTML tương tác)
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover
+    Profiler = None
+
+PROFILE_ID_RE = re.compile(r'^\d{19}-[0-9a-f]{8}$')
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILE_DIR', settings.BASE_DIR / 'var' / 'profiles'))
+
+
+def max_profiles():
+    return getattr(settings, 'PROFILE_MAX_ENTRIES', 30)
+
+
+# =========================================================
+# 1. CHẠY PROFILER QUANH MỘT LỜI GỌI
+# =========================================================
+def profile_call(func):
+    """
+    Chạy func() dưới profiler. Trả về (kết quả, html, (tên tệp tải về, bytes)).
+    pyinstrument: lấy mẫu theo PROFILE_INTERVAL giây (chi phí thấp, phù hợp dữ liệu thật trên production).
+    Không có pyinstrument -> cProfile (đếm mọi lời gọi, chậm hơn), xuất bảng pstats + tệp .prof (snakeviz).
+    """
+    if Profiler is not None:
+        profiler = Profiler(interval=getattr(settings, 'PROFILE_INTERVAL', 0.001), async_mode='disabled')
+        profiler.start()
+        try:
+            result = func()
+        finally:
+            profiler.stop()
+        html = profiler.output_html()
+        return result, html, ('profile.html', html.encode('utf-8'))
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(80)
+    html = f"<!doctype html><meta charset='utf-8'><pre>{escape(stream.getvalue())}</pre>"
+    stats_path = os.path.join(profile_dir(), f".tmp-{uuid.uuid4().hex}.prof")
+    os.makedirs(profile_dir(), exist_ok=True)
+    try:
+        profiler.dump_stats(stats_path)
+        with open(stats_path, 'rb') as f:
+            raw = f.read()
+    finally:
+        os.remove(stats_path)
+    return result, html, ('profile.prof', raw)
+
+
+# =========================================================
+# 2. KHO LƯU VÒNG (RING BUFFER) TRÊN ĐĨA
+# =========================================================
+# Dùng chung giữa các worker; chỉ giữ PROFILE_MAX_ENTRIES bản mới nhất để so sánh trước/sau.
+def save_profile(meta, html, download):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    download_name, raw = download
+    meta = {**meta, 'id': profile_id, 'created': time.time(), 'download': download_name}
+
+    with open(os.path.join(directory, f"{profile_id}.html"), 'w', encoding='utf-8') as f:
+        f.write(html)
+    if download_name.endswith('.prof'):
+        with open(os.path.join(directory, f"{profile_id}.raw"), 'wb') as f:
+            f.write(raw)
+    # Ghi meta sau cùng: danh sách chỉ thấy profile đã ghi đủ
+    with open(os.path.join(directory, f"{profile_id}.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    _trim(directory)
+    return profile_id
+
+
+def _trim(directory):
+    ids = sorted(name[:-5] for name in os.listdir(directory) if name.endswith('.json'))
+    for profile_id in ids[:max(0, len(ids) - max_profiles())]:
+        for ext in ('json', 'html', 'raw'):
+            try:
+                os.remove(os.path.join(directory, f"{profile_id}.{ext}"))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(directory, name), encoding='utf-8') as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return profiles
+
+
+def profile_file(profile_id, download=False):
+    """Đường dẫn tệp HTML (hoặc tệp tải về) của profile; None nếu id sai / đã bị xoay vòng."""
+    if not PROFILE_ID_RE.match(profile_id or ''):
+        return None
+    html_path = os.path.join(profile_dir(), f"{profile_id}.html")
+    raw_path = os.path.join(profile_dir(), f"{profile_id}.raw")
+    # pyinstrument: tệp tải về chính là trang HTML (tự chứa)
+    path = raw_path if download and os.path.exists(raw_path) else html_path
+    return path if os.path.exists(path) else None
@@ -0,0 +1,70 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from wagtail.images import get_image_model
+
+logger = logging.getLogger(__name__)
+
+Image = get_image_model()
+
+# =========================================================
+# CÁC RENDITION DÙNG TRONG TEMPLATE (Giữ đồng bộ với thẻ {% srcset_image %})
+# =========================================================
+RENDITION_SETS = {
+    # Thẻ grid ở trang danh sách Khu vực / Thiết bị (khung w-28 = 112px; 2x cho màn hình HiDPI)
+    'card': ['fill-112x112|format-webp|preserve-svg', 'fill-224x224|format-webp|preserve-svg'],
+    # Thiết bị con trên trang chi tiết Khu vực (khung w-24 = 96px)
+    'child_card': ['fill-96x96|format-webp|preserve-svg', 'fill-192x192|format-webp|preserve-svg'],
+    # Ảnh chính trang chi tiết Khu vực
+    'area_inspect': ['width-256|format-webp|preserve-svg', 'width-512|format-webp|preserve-svg', 'width-800|format-webp|preserve-svg'],
+    # Ảnh chính trang chi tiết Thiết bị
+    'equipment_inspect': ['width-400|format-webp|preserve-svg', 'width-600|format-webp|preserve-svg', 'width-900|format-webp|preserve-svg'],
+}
+
+ALL_RENDITION_SPECS = [spec for specs in RENDITION_SETS.values() for spec in specs]
+
+
+def warm_image(image, specs=None):
+    """Tạo trước các rendition còn thiếu (get_renditions chỉ sinh những bản chưa có). Trả về số rendition."""
+    try:
+        return len(image.get_renditions(*(specs or ALL_RENDITION_SPECS)))
+    except Exception as e:
+        logger.error(f"Rendition warm-up error for image {image.pk}: {e}")
+        return 0
+
+
+def warm_image_by_id(image_id, specs=None):
+    image = Image.objects.filter(pk=image_id).first()
+    if image:
+        warm_image(image, specs)
+
+
+def warm_images(images, specs=None, workers=4):
+    """
+    Sinh rendition song song theo luồng (Pillow nhả GIL khi resize / encode WebP).
+    Trả về (số ảnh, số rendition).
+    """
+    def _job(image):
+        try:
+            return warm_image(image, specs)
+        finally:
+            close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_job, images))
+    return len(results), sum(results)
+
+
+# =========================================================
+# SIGNAL: Sinh nền ngay sau khi tải ảnh lên
+# =========================================================
+@receiver(post_save, sender=Image)
+def warm_on_image_upload(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Lưu metadata (file_hash, file_size, focal point...) bằng update_fields -> không sinh lại
+    if raw or update_fields:
+        return
+    from core.background import run_in_background
+    run_in_background(warm_image_by_id, instance.pk)
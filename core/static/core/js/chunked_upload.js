@@ -0,0 +1,127 @@
+// core/static/core/js/chunked_upload.js
+// Tải tệp lớn theo từng phần (PUT + Content-Range). Mã phiên lưu trong localStorage
+// theo (tên, kích thước, ngày sửa) -> chọn lại cùng tệp sau khi mất mạng sẽ tải tiếp từ offset server báo.
+(function () {
+    var form = document.querySelector('[data-chunked-upload]');
+    if (!form) return;
+
+    var config = JSON.parse(document.getElementById('wagtail-config').textContent);
+    var progress = form.querySelector('[data-progress]');
+    var statusEl = form.querySelector('[data-status]');
+    var MAX_RETRIES = 8;
+
+    function request(method, url, body, headers) {
+        var init = {method: method, credentials: 'same-origin', headers: headers || {}};
+        init.headers[config.CSRF_HEADER_NAME || 'X-CSRFToken'] = config.CSRF_TOKEN;
+        if (body !== undefined) init.body = body;
+        return fetch(url, init).then(function (response) {
+            return response.json().catch(function () { return {}; }).then(function (data) {
+                data._status = response.status;
+                return data;
+            });
+        });
+    }
+
+    function sleep(ms) {
+        return new Promise(function (resolve) { setTimeout(resolve, ms); });
+    }
+
+    function storageKey(file) {
+        return 'chunked-upload:' + file.name + ':' + file.size + ':' + file.lastModified;
+    }
+
+    function uploadUrl(id, action) {
+        return form.dataset.baseUrl + id + '/' + (action ? action + '/' : '');
+    }
+
+    function show(offset, size, text) {
+        progress.value = size ? Math.floor(offset * 100 / size) : 0;
+        statusEl.textContent = text;
+    }
+
+    function getSession(file) {
+        var saved = localStorage.getItem(storageKey(file));
+        var resume = saved
+            ? request('GET', uploadUrl(saved)).then(function (data) {
+                // 'receiving': request trước của phiên còn đang ghi -> vẫn tải tiếp được (server báo 409 tới khi xong)
+                return data._status === 200 && (data.status === 'uploading' || data.status === 'receiving') ? data : null;
+            })
+            : Promise.resolve(null);
+        return resume.then(function (session) {
+            if (session) return session;
+            return request('POST', form.dataset.startUrl, JSON.stringify({filename: file.name, size: file.size}), {
+                'Content-Type': 'application/json'
+            }).then(function (data) {
+                if (data._status !== 200) throw new Error(data.error || 'Không tạo được phiên tải lên.');
+                localStorage.setItem(storageKey(file), data.id);
+                return data;
+            });
+        });
+    }
+
+    function sendChunks(file, session) {
+        var offset = session.offset;
+        var retries = 0;
+
+        function next() {
+            if (offset >= file.size) return Promise.resolve();
+            var end = Math.min(offset + session.chunk_size, file.size) - 1;
+            show(offset, file.size, 'Đang gửi ' + Math.floor(offset / 1048576) + ' / ' + Math.ceil(file.size / 1048576) + ' MB');
+            return request('PUT', uploadUrl(session.id, 'chunk'), file.slice(offset, end + 1), {
+                'Content-Range': 'bytes ' + offset + '-' + end + '/' + file.size,
+                'Content-Type': 'application/octet-stream'
+            }).then(function (data) {
+                if (data._status === 200 || data._status === 409) {
+                    // 409: server đã có phần này hoặc offset lệch -> đi tiếp từ offset server báo
+                    var moved = typeof data.offset === 'number' && data.offset !== offset;
+                    if (typeof data.offset === 'number') offset = data.offset;
+                    retries = 0;
+                    // 409 mà offset không đổi: phần này đang được request khác ghi -> chờ rồi gửi lại
+                    return data._status === 409 && !moved ? sleep(1000).then(next) : next();
+                }
+                throw new Error(data.error || 'HTTP ' + data._status);
+            }).catch(function (error) {
+                if (++retries > MAX_RETRIES) throw error;
+                show(offset, file.size, 'Mất kết nối, thử lại (' + retries + '/' + MAX_RETRIES + ')...');
+                return sleep(Math.min(30000, 1000 * Math.pow(2, retries))).then(function () {
+                    return request('GET', uploadUrl(session.id)).then(function (data) {
+                        if (typeof data.offset === 'number') offset = data.offset;
+                        return next();
+                    }, next);
+                });
+            });
+        }
+        return next();
+    }
+
+    form.addEventListener('submit', function (event) {
+        event.preventDefault();
+        var file = form.querySelector('input[type=file]').files[0];
+        if (!file) return;
+        var button = form.querySelector('button[type=submit]');
+        var collection = form.querySelector('[name=collection]');
+        button.disabled = true;
+
+        getSession(file).then(function (session) {
+            return sendChunks(file, session).then(function () {
+                show(file.size, file.size, 'Đang kiểm tra và lưu tài liệu...');
+                return request('POST', uploadUrl(session.id, 'complete'), JSON.stringify({
+                    title: form.querySelector('[name=title]').value,
+                    collection: collection ? collection.value : null
+                }), {'Content-Type': 'application/json'});
+            });
+        }).then(function (data) {
+            if (data._status !== 200) throw new Error(data.error || 'HTTP ' + data._status);
+            localStorage.removeItem(storageKey(file));
+            statusEl.innerHTML = '';
+            var link = document.createElement('a');
+            link.href = data.document.edit_url;
+            link.textContent = data.document.title;
+            statusEl.append(data.deduplicated ? 'Đã có tài liệu trùng nội dung: ' : 'Đã tạo tài liệu: ', link);
+        }).catch(function (error) {
+            statusEl.textContent = 'Lỗi: ' + error.message + ' (chọn lại tệp để tải tiếp)';
+        }).finally(function () {
+            button.disabled = false;
+        });
+    });
+})();
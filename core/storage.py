@@ -0,0 +1,156 @@
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+
+from . import perf
+
+# Thư mục gốc của kho lưu theo nội dung (content-addressed store)
+CAS_PREFIX = 'cas/'
+
+# Những đường dẫn đã tự khử trùng lặp / là dữ liệu dẫn xuất -> lưu như FileSystemStorage thường:
+#   - tts/cache/: tên tệp đã là hash(văn bản, giọng đọc) (core.tts)
+#   - images/: rendition của Wagtail (sinh lại được, Wagtail tự xóa khi ảnh gốc đổi)
+DEFAULT_EXEMPT_PREFIXES = ('tts/cache/', 'images/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Lưu tệp theo SHA-256 nội dung: cas/<2 ký tự đầu>/<sha256>/<tên gốc>.
+      - Cùng nội dung + cùng tên -> dùng lại đúng tệp đã có (không ghi thêm byte nào).
+      - Cùng nội dung + khác tên -> hard link tới blob đã có (giữ tên tải xuống thân thiện, không tốn thêm dung lượng).
+    Nhiều bản ghi có thể trỏ tới cùng một tệp nên delete() KHÔNG xóa tệp trong cas/;
+    tệp không còn được tham chiếu sẽ được dọn bởi lệnh 'manage.py gc_media'.
+    """
+
+    def __init__(self, *args, exempt_prefixes=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.exempt_prefixes = tuple(
+            exempt_prefixes or getattr(settings, 'CAS_EXEMPT_PREFIXES', DEFAULT_EXEMPT_PREFIXES)
+        )
+
+    def is_content_addressed(self, name):
+        return name.startswith(CAS_PREFIX)
+
+    def is_exempt(self, name):
+        return name.replace('\\', '/').startswith(self.exempt_prefixes)
+
+    # ---------------------------------------------------------
+    # GHI
+    # ---------------------------------------------------------
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        if self.is_exempt(name):
+            if name.startswith('images/'):
+                # Rendition Wagtail sinh trong request (bulk_create -> không có signal để bắt)
+                perf.incr('rendition')
+            return super().save(name, content, max_length=max_length)
+
+        validate_file_name(name, allow_relative_path=True)
+        digest = self.content_hash(content)
+        target = self.blob_name(digest, self.get_valid_name(os.path.basename(name)), max_length)
+        validate_file_name(target, allow_relative_path=True)
+
+        if self.exists(target) or self._link_existing_blob(digest, target):
+            # Dùng lại blob cũ: làm mới mtime -> gc_media (--min-age) không xóa blob vừa được tham chiếu lại
+            # trong giao dịch chưa commit (bước mark chưa thấy bản ghi mới)
+            os.utime(self.path(target))
+            return target
+
+        # Ghi ra tên tạm rồi đổi tên nguyên tử -> không bao giờ lộ blob ghi dở
+        temp_name = super()._save(f"{CAS_PREFIX}tmp/{uuid.uuid4().hex}", content)
+        os.makedirs(os.path.dirname(self.path(target)), exist_ok=True)
+        os.replace(self.path(temp_name), self.path(target))
+        return target
+
+    @staticmethod
+    def content_hash(content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def blob_dir(digest):
+        return f"{CAS_PREFIX}{digest[:2]}/{digest}"
+
+    def blob_name(self, digest, filename, max_length=None):
+        directory = self.blob_dir(digest)
+        if max_length:
+            # FileField mặc định max_length=100: rút gọn tên gốc (giữ phần mở rộng) cho vừa
+            available = max_length - len(directory) - 1
+            root, ext = os.path.splitext(filename)
+            if len(filename) > available:
+                filename = root[:max(1, available - len(ext))] + ext
+        return f"{directory}/{filename}"
+
+    def _link_existing_blob(self, digest, target):
+        directory = self.path(self.blob_dir(digest))
+        try:
+            existing = next((entry.path for entry in os.scandir(directory) if entry.is_file()), None)
+        except FileNotFoundError:
+            return False
+        if existing is None:
+            return False
+        try:
+            os.link(existing, self.path(target))
+        except FileExistsError:
+            pass
+        except OSError:
+            # Hệ thống tệp không hỗ trợ hard link -> ghi bản sao như bình thường
+            return False
+        return True
+
+    # ---------------------------------------------------------
+    # TÊN & XÓA
+    # ---------------------------------------------------------
+    def get_available_name(self, name, max_length=None):
+        # Tên trong cas/ xác định bởi nội dung -> trùng tên nghĩa là trùng nội dung, không cần thêm hậu tố
+        if self.is_content_addressed(name):
+            return name
+        return super().get_available_name(name, max_length=max_length)
+
+    def delete(self, name):
+        if name and self.is_content_addressed(name):
+            return
+        super().delete(name)
+
+
+# =========================================================
+# THAM CHIẾU (Dùng cho gc_media / dedupe_media)
+# =========================================================
+def file_fields():
+    """[(model, field)] cho mọi FileField/ImageField trên các model (Document, Image, Rendition, audio_*...)."""
+    from django.apps import apps
+    from django.db.models import FileField
+
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField)
+    ]
+
+
+def referenced_names():
+    """Tập tên tệp đang được bản ghi nào đó tham chiếu (bước 'mark' của GC)."""
+    names = set()
+    for model, field in file_fields():
+        names.update(
+            model._default_manager.exclude(**{f"{field.name}__isnull": True})
+            .exclude(**{field.name: ''})
+            .values_list(field.name, flat=True)
+            .iterator()
+        )
+    return names
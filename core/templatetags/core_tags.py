@@ -1,4 +1,5 @@
 from django import template
+from django.urls import reverse
 from django.utils.safestring import mark_safe
 from core.utils import get_label_text
 
@@ -18,4 +19,15 @@ def get_label(app, key, default_text=None):
     if label_content:
         return mark_safe(label_content)
     
-    return ""
\ No newline at end of file
+    return ""
+
+@register.simple_tag
+def audio_url(file_field, variant=None):
+    """
+    URL phát audio TTS qua core.media (hỗ trợ tua / Range, biến thể bitrate thấp).
+    Sử dụng: {% audio_url object.audio_vi %} hoặc {% audio_url object.audio_vi 'low' %}
+    """
+    if not file_field:
+        return ""
+    url = reverse('core_stream_audio', args=[file_field.name])
+    return f"{url}?variant={variant}" if variant else url
@@ -1,3 +1,1076 @@
-from django.test import TestCase
+import os
+import re
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import F
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from wagtail.utils.sendfile import sendfile as wagtail_sendfile
+
+from core.ai_services import call_gemini_api
+from core.ai_stub import StubConfig, base_url, fake_completion, make_server
+from core.benchmarks import compare
+from core.cache import ChangeLog, TwoTierCache
+from core.languages import LanguageInfo, LanguageRegistry, language_cache
+from core.management.commands.seed_plant import detail_rows, system_codes
+from core.media import parse_range, restore_content_length, sendfile as media_sendfile
+from core.middleware import NotModifiedMiddleware
+from core.storage import CAS_PREFIX, ContentAddressedStorage
+from core.translation_providers import (
+    Glossary, GlossaryProvider, TranslationChain, TranslationProvider, build_chain, normalize_term,
+)
+from core.translation_preview import sse_event, stream_events, stream_translations
+from core.translation_state import initial_sources, is_stale, mark_translated, needs_translation, stale_fields
+from core.tts import (
+    KEY_LOCK_STRIPES, BaseTTSEngine, _lock_for, audio_cache_key, generate_audio, generate_audio_for_object_id,
+    get_source_text, get_tts_engine,
+)
+from core.uploads import UploadError, append_chunk, complete_upload, upload_temp_path
+from core import perf, pinyin, profiling
+from core.views import metrics_endpoint
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+
+    def test_ignored_and_unsatisfiable(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        self.assertIsNone(parse_range('items=0-1', 100))
+        self.assertEqual(parse_range('bytes=100-', 100), 'invalid')
+        self.assertEqual(parse_range('bytes=-0', 100), 'invalid')
+
+
+class DocumentContentLengthTests(SimpleTestCase):
+    """Response của wagtail.utils.sendfile (backend core.media) sau khi serve_document sửa Content-Length."""
+
+    def setUp(self):
+        document = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        document.write(b'x' * 100)
+        document.close()
+        self.addCleanup(os.remove, document.name)
+        self.path = document.name
+
+    def serve(self, **headers):
+        request = RequestFactory().get('/documents/1/a.pdf', headers=headers)
+        response = restore_content_length(wagtail_sendfile(request, self.path, backend=media_sendfile))
+        self.addCleanup(response.close)
+        return response
+
+    def test_full_and_partial_content(self):
+        self.assertEqual(self.serve()['Content-Length'], '100')
+        response = self.serve(range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '10')
+
+    def test_unsatisfiable_range_has_empty_body(self):
+        response = self.serve(range='bytes=500-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Length'], '0')
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_not_modified_has_empty_body(self):
+        response = self.serve(if_none_match=self.serve()['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.has_header('Content-Length'))
+
+    def test_common_middleware_length_is_removed_from_not_modified(self):
+        from django.middleware.common import CommonMiddleware
+
+        etag = self.serve()['ETag']
+        handler = NotModifiedMiddleware(CommonMiddleware(
+            lambda request: restore_content_length(wagtail_sendfile(request, self.path, backend=media_sendfile))
+        ))
+        response = handler(RequestFactory().get('/documents/1/a.pdf', headers={'if_none_match': etag}))
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.has_header('Content-Length'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'two-tier-tests'}})
+class TwoTierCacheTests(SimpleTestCase):
+    def test_producer_runs_once_and_none_is_cached(self):
+        cache = TwoTierCache('test-once')
+        calls = []
+        producer = lambda: calls.append(1)  # noqa: E731 (trả về None)
+        self.assertIsNone(cache.get_or_set('k', producer))
+        self.assertIsNone(cache.get_or_set('k', producer))
+        self.assertEqual(len(calls), 1)
+
+    def test_second_worker_reads_shared_tier_and_sees_clear(self):
+        # Hai đối tượng cùng namespace = hai worker (LRU riêng, cache chung)
+        worker_a = TwoTierCache('test-workers', local_ttl=0)
+        worker_b = TwoTierCache('test-workers', local_ttl=0)
+        worker_a.set('label', 'Bơm')
+        self.assertEqual(worker_b.get_or_set('label', lambda: 'DB'), 'Bơm')
+
+        worker_a.clear()
+        self.assertIsNone(worker_b.get('label'))
+        self.assertEqual(worker_b.get_or_set('label', lambda: 'DB'), 'DB')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'languages-tests'}})
+class LanguageRegistryTests(SimpleTestCase):
+    def setUp(self):
+        # Nạp sẵn danh sách như thể đã đọc từ DB (SimpleTestCase chặn truy vấn -> chứng minh không có query)
+        self.registry = LanguageRegistry()
+        self.registry._languages = (
+            LanguageInfo('vi', 'Tiếng Việt', '🇻🇳', True, True),
+            LanguageInfo('en', 'English', '🇺🇸', True, True),
+            LanguageInfo('th', 'Tiếng Thái', '🇹🇭', False, False),
+        )
+        self.registry._version = language_cache.version()
+
+    def test_lookups_use_loaded_snapshot(self):
+        self.assertEqual(self.registry.active_codes(), ['vi', 'en'])
+        self.assertEqual(self.registry.inactive_codes(), ['th'])
+        self.assertEqual(self.registry.get('en').name, 'English')
+        self.assertIsNone(self.registry.get('xx'))
+
+    def test_change_in_other_worker_forces_reload(self):
+        language_cache.clear()
+        with self.assertRaises(AssertionError):
+            # Phiên bản đổi -> nạp lại từ DB (bị SimpleTestCase chặn)
+            self.registry.active_codes()
+
+
+class ServerTimingTests(SimpleTestCase):
+    def test_records_only_inside_sampled_request(self):
+        perf.incr('ai')  # Không có request đang đo -> bỏ qua
+        metrics, token = perf.start()
+        try:
+            perf.incr('cache.labels.hit', 3)
+            perf.incr('cache.labels.miss')
+            metrics.add('db', 0.002)
+            metrics.add('ai', 0.5)
+        finally:
+            perf.stop(token)
+        self.assertIsNone(perf.current())
+
+        header = perf.server_timing(metrics)
+        self.assertIn('db;dur=2.0;desc="1 queries"', header)
+        self.assertIn('label;desc="hit 3 / miss 1"', header)
+        self.assertIn('ai;dur=500.0;desc="1 calls"', header)
+        self.assertNotIn('rendition', header)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_ALLOWED_IPS=['127.0.0.1'], METRICS_TOKEN='')
+class MetricsEndpointTests(SimpleTestCase):
+    def test_only_allowed_addresses_can_scrape(self):
+        factory = RequestFactory()
+        response = metrics_endpoint(factory.get('/metrics', REMOTE_ADDR='127.0.0.1'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'powerplant_requests_total', response.content)
+        with self.assertRaises(PermissionDenied):
+            metrics_endpoint(factory.get('/metrics', REMOTE_ADDR='10.1.2.3'))
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token_replaces_ip_allow_list(self):
+        factory = RequestFactory()
+        with self.assertRaises(PermissionDenied):
+            metrics_endpoint(factory.get('/metrics', REMOTE_ADDR='127.0.0.1'))
+        response = metrics_endpoint(factory.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret'))
+        self.assertEqual(response.status_code, 200)
+
+
+class ProfileStoreTests(SimpleTestCase):
+    def test_ring_buffer_keeps_newest_profiles(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(PROFILE_DIR=directory, PROFILE_MAX_ENTRIES=2):
+            ids = [
+                profiling.save_profile({'path': f'/admin/{i}/'}, '<html></html>', ('profile.html', b''))
+                for i in range(3)
+            ]
+            self.assertEqual([p['path'] for p in profiling.list_profiles()], ['/admin/2/', '/admin/1/'])
+            self.assertIsNone(profiling.profile_file(ids[0]))
+            self.assertTrue(profiling.profile_file(ids[2], download=True).endswith('.html'))
+            self.assertIsNone(profiling.profile_file('../../etc/passwd'))
+
+
+class SeedPlantTests(SimpleTestCase):
+    def test_system_codes_follow_kks_and_wrap_catalogue(self):
+        codes = system_codes(20, 14)
+        self.assertEqual(codes[0][0], '20LAC10')
+        self.assertEqual(codes[12][0], '20LAC20')
+        self.assertEqual(len({kks for kks, _name in codes}), 14)
+
+    def test_detail_rows_fill_only_requested_languages(self):
+        rows = detail_rows(3, ['vi', 'zh'])
+        self.assertEqual(rows[0]['name_vi'], 'Áp suất đầu vào')
+        self.assertEqual(rows[0]['name_zh_pinyin'], 'Rùkǒu yālì')
+        self.assertNotIn('name_en', rows[0])
+        self.assertEqual(detail_rows(3, ['vi', 'zh']), rows)
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    def test_flags_slower_runs_and_extra_queries(self):
+        baseline = {
+            'labels': {'median_ms': 10.0, 'queries': 0},
+            'area_index': {'median_ms': 100.0, 'queries': 20},
+            'tiny': {'median_ms': 0.1, 'queries': 0},
+        }
+        results = {
+            'labels': {'median_ms': 11.0, 'queries': 0},
+            'area_index': {'median_ms': 90.0, 'queries': 25},
+            'tiny': {'median_ms': 0.5, 'queries': 0},
+            'new': {'median_ms': 1.0, 'queries': 0},
+        }
+        rows = {row['name']: row for row in compare(results, baseline, threshold=0.2)}
+        self.assertFalse(rows['labels']['regression'])
+        self.assertTrue(rows['area_index']['regression'])
+        # Chậm hơn 400% nhưng dưới ngưỡng nhiễu tuyệt đối
+        self.assertFalse(rows['tiny']['regression'])
+        self.assertNotIn('new', rows)
+
+
+class AIStubServerTests(SimpleTestCase):
+    def start_server(self, **config):
+        server = make_server(port=0, config=StubConfig(latency=0, **config))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_fake_completion_is_deterministic(self):
+        prompt = "Task: Translate the term 'Boiler' from English to Thai.\nExample Input (to Filipino): 'Boiler'"
+        self.assertEqual(fake_completion(prompt), 'Boiler (Thai)')
+        self.assertEqual(fake_completion(prompt), fake_completion(prompt))
+
+    def test_call_gemini_api_uses_configured_base_url(self):
+        server = self.start_server()
+        prompt = "Task: Translate the term 'Lò hơi' from Vietnamese to English.\nConstraint: Return ONLY the term."
+        with override_settings(GEMINI_API_BASE=base_url(server), GEMINI_API_KEY='test'):
+            self.assertEqual(call_gemini_api(prompt, 'translate_to_en'), 'Lò hơi (English)')
+        self.assertEqual(server.state.snapshot()['ok'], 1)
+
+    def test_throttled_calls_are_retried_then_give_up(self):
+        server = self.start_server(throttle_rate=1.0, retry_after=0)
+        with override_settings(GEMINI_API_BASE=base_url(server), GEMINI_API_KEY='test', GEMINI_MAX_RETRIES=2):
+            self.assertIsNone(call_gemini_api("Translate the term 'Van' to English.", 'translate_to_en'))
+        stats = server.state.snapshot()
+        self.assertEqual((stats['requests'], stats['throttled']), (3, 3))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'change-log-tests'}})
+class ChangeLogTests(SimpleTestCase):
+    def test_items_since_sequence_in_order(self):
+        log = ChangeLog('test-changes')
+        start = log.current()
+        log.append('equipment:1')
+        log.append('equipment:2')
+        self.assertEqual(log.since(start), (start + 2, ['equipment:1', 'equipment:2']))
+        self.assertEqual(log.since(start + 2), (start + 2, []))
+
+    def test_full_resync_when_too_far_behind_or_unknown(self):
+        log = ChangeLog('test-changes-limit', max_catch_up=2)
+        start = log.current()
+        for n in range(3):
+            log.append(n)
+        self.assertIsNone(log.since(start)[1])
+        self.assertIsNone(log.since(None)[1])
+        self.assertEqual(log.since(start + 1)[1], [1, 2])
+
+
+def append_changes(namespace, count, results):
+    results.put([ChangeLog(namespace).append(n) for n in range(count)])
+
+
+class FileCacheCounterTests(SimpleTestCase):
+    """FileBasedCache.incr không nguyên tử -> bộ đếm dùng khóa tệp; kiểm tra bằng nhiều tiến trình thật."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory.name,
+        }}))
+
+    @skipUnless(hasattr(os, 'fork'), "cần fork")
+    def test_concurrent_appends_get_unique_sequence_numbers(self):
+        import multiprocessing
+
+        context = multiprocessing.get_context('fork')
+        log = ChangeLog('test-concurrent')
+        start = log.current()
+        results = context.Queue()
+        workers = [context.Process(target=append_changes, args=('test-concurrent', 25, results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        seqs = [seq for _ in workers for seq in results.get(timeout=60)]
+        for worker in workers:
+            worker.join()
+        self.assertEqual(sorted(seqs), list(range(start + 1, start + 101)))
+        self.assertEqual(log.current(), start + 100)
+        self.assertEqual(len(log.since(start)[1]), 100)
+
+    def test_lost_version_key_never_returns_to_old_version(self):
+        from django.core.cache import caches
+
+        cache = TwoTierCache('test-seed', local_ttl=0)
+        cache.set('label', 'cũ')
+        old_version = cache.version()
+        caches['default'].delete(cache._version_key())
+        self.assertGreater(cache.version(), old_version)
+        self.assertIsNone(cache.get('label'))
+
+    def test_non_atomic_backend_is_refused(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            with self.assertRaises(ImproperlyConfigured):
+                ChangeLog('test-refused').append('x')
+
+
+class FakeGlossary(Glossary):
+    """Từ điển đọc từ dict {(model, pk): {mã: bản dịch}} dùng chung giữa các "worker" thay cho DB."""
+
+    def __init__(self, rows):
+        super().__init__(poll_interval=0)
+        self.db = rows
+        self.full_loads = 0
+
+    def _read_rows(self, index, pks=None):
+        model_label = self.sources[index][0]
+        if pks is None and index == 0:
+            self.full_loads += 1
+        for (label, pk), values in sorted(self.db.items()):
+            if label == model_label and (pks is None or pk in pks):
+                yield pk, values
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'glossary-tests'}})
+class GlossaryTests(SimpleTestCase):
+    def setUp(self):
+        self.db = {('details.Detail', 1): {'vi': 'Áp suất', 'en': 'Pressure'}}
+
+    def detail(self, pk, **values):
+        from details.models import Detail
+
+        self.db[('details.Detail', pk)] = {k[len('name_'):]: v for k, v in values.items()}
+        return Detail(pk=pk, **values)
+
+    def test_save_updates_entry_in_place_without_reload(self):
+        glossary = FakeGlossary(self.db)
+        self.assertEqual(glossary.lookup('áp  SUẤT', 'vi', 'en'), 'Pressure')
+        for pk in range(2, 50):
+            glossary.update(self.detail(pk, name_vi=f"Nhãn {pk}", name_en=f"Label {pk}"))
+            self.assertEqual(glossary.lookup(f"Nhãn {pk}", 'vi', 'en'), f"Label {pk}")
+        glossary.update(self.detail(1, name_vi='Áp suất mới', name_en='New pressure'))
+        self.assertIsNone(glossary.lookup('Áp suất', 'vi', 'en'))
+        self.assertEqual(glossary.lookup('Áp suất mới', 'vi', 'en'), 'New pressure')
+        self.assertEqual(glossary.full_loads, 1)
+
+    def test_other_worker_rereads_only_changed_rows(self):
+        worker_a, worker_b = FakeGlossary(self.db), FakeGlossary(self.db)
+        self.assertEqual(worker_b.lookup('Áp suất', 'vi', 'en'), 'Pressure')
+        worker_a.update(self.detail(1, name_vi='Áp suất', name_en='Gauge pressure'))
+        self.assertEqual(worker_b.lookup('Áp suất', 'vi', 'en'), 'Gauge pressure')
+        self.assertEqual(worker_b.full_loads, 1)
+
+        worker_a.invalidate()
+        worker_b.lookup('Áp suất', 'vi', 'en')
+        self.assertEqual(worker_b.full_loads, 2)
+
+    def test_only_human_entered_translations_are_learned(self):
+        from core.translation_state import mark_edits
+        from details.models import Detail
+
+        glossary = FakeGlossary(self.db)
+        glossary.lookup('Áp suất', 'vi', 'en')
+        detail = Detail(pk=8, name_vi='Van xả', name_en='Drain valve', name_th='วาล์ว')
+        mark_translated(detail, 'name_en', 'name_vi')
+        mark_translated(detail, 'name_th', 'name_en')
+        glossary.update(detail)
+        # Bản dịch máy chưa duyệt không được dùng cho bản ghi khác
+        self.assertIsNone(glossary.lookup('Van xả', 'vi', 'en'))
+        self.assertIsNone(glossary.lookup('Drain valve', 'en', 'th'))
+
+        detail.name_en = 'Drain valve'
+        mark_edits(detail, {'name_en'}, Detail.translated_prefixes)
+        glossary.update(detail)
+        self.assertEqual(glossary.lookup('Van xả', 'vi', 'en'), 'Drain valve')
+        self.assertIsNone(glossary.lookup('Drain valve', 'en', 'th'))
+
+    def test_edited_source_is_retranslated_instead_of_reusing_own_stale_target(self):
+        from core.ai_services import auto_translate_model
+        from core.translation_state import mark_edits
+        from details.models import Detail
+
+        glossary = FakeGlossary(self.db)
+        remote = TranslationChainTests.FixedProvider('remote', {('nhiệt độ thử', 'en'): 'Test temperature'})
+        chain = TranslationChain([GlossaryProvider(), remote])
+
+        def save(instance, changed):
+            # Như TranslationTrackingMixin.save() + signal post_save
+            mark_edits(instance, changed, Detail.translated_prefixes)
+            instance.translation_stale = stale_fields(instance)
+            glossary.update(instance)
+
+        detail = Detail(pk=7, name_vi='Áp suất thử', name_en='Test pressure')
+        glossary.lookup('Áp suất', 'vi', 'en')
+        save(detail, {'name_vi', 'name_en'})
+        self.assertEqual(glossary.lookup('Áp suất thử', 'vi', 'en'), 'Test pressure')
+
+        detail.name_vi = 'Nhiệt độ thử'
+        save(detail, {'name_vi'})
+        self.assertIsNone(glossary.lookup('Nhiệt độ thử', 'vi', 'en'))
+        with patch('core.translation_providers.glossary', glossary), \
+                patch('core.translation_providers.get_translation_chain', return_value=chain), \
+                patch('core.languages.language_registry.active', return_value=[]):
+            auto_translate_model(detail, fields=['name'])
+        self.assertEqual(detail.name_en, 'Test temperature')
+        self.assertFalse(is_stale(detail, 'name_en'))
+
+
+class TranslationChainTests(SimpleTestCase):
+    class FixedProvider(TranslationProvider):
+        def __init__(self, name, answers):
+            self.name = name
+            self.answers = answers
+            self.calls = 0
+
+        def translate(self, text, source, target, app_label=None):
+            self.calls += 1
+            return self.answers.get((normalize_term(text), target))
+
+    def test_first_provider_with_an_answer_wins(self):
+        local = self.FixedProvider('glossary', {('lò hơi', 'en'): 'Boiler'})
+        remote = self.FixedProvider('remote', {('lò hơi', 'en'): 'Steam generator', ('bơm', 'en'): 'Pump'})
+        chain = TranslationChain([local, remote])
+        self.assertEqual(chain.translate('  Lò   HƠI ', 'vi', 'en'), 'Boiler')
+        self.assertEqual(remote.calls, 0)
+        self.assertEqual(chain.translate('Bơm', 'vi', 'en'), 'Pump')
+        self.assertIsNone(chain.translate('Van', 'vi', 'en'))
+        self.assertIsNone(chain.translate('', 'vi', 'en'))
+
+    def test_build_chain_from_settings_entries(self):
+        chain = build_chain([
+            {'BACKEND': 'core.translation_providers.GlossaryProvider'},
+            {'BACKEND': 'core.translation_providers.StubProvider', 'OPTIONS': {'base_url': 'http://stub:1'}},
+        ])
+        self.assertEqual([p.name for p in chain.providers], ['glossary', 'stub'])
+        self.assertEqual(chain.providers[1].base_url, 'http://stub:1')
+
+
+@skipUnless(pinyin.available(), "pypinyin chưa được cài")
+class PinyinTests(SimpleTestCase):
+    def test_technical_phrases_and_heteronyms(self):
+        self.assertEqual(pinyin.to_pinyin('超临界锅炉'), 'Chāolínjiè guōlú')
+        self.assertEqual(pinyin.to_pinyin('差压变送器'), 'Chāyā biànsòngqì')
+        self.assertEqual(pinyin.to_pinyin('给水泵'), 'Jǐshuǐbèng')
+        self.assertEqual(pinyin.to_pinyin('1号给水泵A'), '1 hào jǐshuǐbèng A')
+
+    def test_non_han_runs_are_kept_intact(self):
+        self.assertEqual(pinyin.to_pinyin('锅炉10LAC10'), 'Guōlú 10LAC10')
+        self.assertEqual(pinyin.to_pinyin('汽轮机转速(额定)'), 'Qìlúnjī zhuànsù (édìng)')
+
+    def test_syllable_separator_inside_word(self):
+        self.assertEqual(pinyin.to_pinyin('西安'), "Xī'ān")
+
+    def test_non_chinese_text_is_skipped(self):
+        self.assertIsNone(pinyin.to_pinyin('Boiler'))
+        self.assertIsNone(pinyin.to_pinyin(''))
+
+    def test_generated_pinyin_is_recorded_as_translation_of_hanzi(self):
+        from core.management.commands.generate_pinyin import Command
+        from details.models import Detail
+
+        detail = Detail(pk=3, name_zh='给水泵', name_zh_pinyin='Gěishuǐbèng', translation_version=4)
+        detail.translation_sources = {'name_zh_pinyin': ['name_zh', 'old'], 'name_en': ['name_vi', 'x']}
+        detail.translation_stale = {'name_zh_pinyin': 'name_zh', 'name_en': 'name_vi'}
+        Command.fill(detail, 'name_zh', 'name_zh_pinyin', pinyin.to_pinyin(detail.name_zh))
+        self.assertEqual(detail.name_zh_pinyin, 'Jǐshuǐbèng')
+        self.assertFalse(is_stale(detail, 'name_zh_pinyin'))
+        self.assertEqual(detail.translation_stale, {'name_en': 'name_vi'})
+        self.assertEqual(detail.translation_version, F('translation_version') + 1)
+
+
+class TranslationStateTests(SimpleTestCase):
+    def make_label(self, **values):
+        from core.models import SystemLabel
+
+        label = SystemLabel(app='common', key='test', **values)
+        label.translation_sources = initial_sources(values, label.translated_field_names(), ('text',))
+        label._state.adding = False
+        label.mark_translation_clean()
+        return label
+
+    def test_initial_sources_follow_pipeline(self):
+        sources = initial_sources({'text_vi': 'Bơm', 'text_en': 'Pump', 'text_th': 'ปั๊ม', 'text_zh': ''},
+                                  ['text_vi', 'text_en', 'text_th', 'text_zh'], ('text',))
+        self.assertEqual(sources['text_en'][0], 'text_vi')
+        self.assertEqual(sources['text_th'][0], 'text_en')
+        self.assertNotIn('text_vi', sources)
+        self.assertNotIn('text_zh', sources)
+
+    def test_only_targets_of_changed_source_are_stale(self):
+        label = self.make_label(text_vi='Bơm', text_en='Pump', text_th='ปั๊ม')
+        self.assertFalse(needs_translation(label, 'text_en'))
+        label.text_vi = 'Bơm cấp'
+        self.assertTrue(is_stale(label, 'text_en'))
+        self.assertFalse(is_stale(label, 'text_th'))
+        mark_translated(label, 'text_en', 'text_vi')
+        label.text_en = 'Feed pump'
+        self.assertTrue(is_stale(label, 'text_th'))
+
+    def test_stale_fields_for_coverage(self):
+        label = self.make_label(text_vi='Bơm', text_en='Pump', text_th='ปั๊ม')
+        self.assertEqual(stale_fields(label), {})
+        label.text_vi = 'Bơm cấp'
+        self.assertEqual(stale_fields(label), {'text_en': 'text_vi'})
+
+    def test_untracked_manual_value_is_kept(self):
+        label = self.make_label(text_vi='Bơm', text_en='Pump')
+        label.translation_sources = {}
+        label.text_vi = 'Bơm cấp'
+        self.assertFalse(needs_translation(label, 'text_en'))
+        self.assertTrue(needs_translation(label, 'text_th'))
+
+    def test_translation_changes_ignore_other_fields(self):
+        label = self.make_label(text_vi='Bơm', text_en='Pump')
+        label.description = 'Ngữ cảnh mới'
+        self.assertEqual(label.translation_changes(), set())
+        label.text_en = 'Water pump'
+        self.assertEqual(label.translation_changes(), {'text_en'})
+
+    def test_save_skips_untouched_translations(self):
+        label = self.make_label(text_vi='Bơm', text_en='Pump')
+        label.description = 'Ngữ cảnh mới'
+        label.translation_changed = label.translation_changes()
+        fields = label._partial_update_fields()
+        self.assertIn('description', fields)
+        self.assertNotIn('text_en', fields)
+        self.assertNotIn('translation_version', fields)
+        label.text_en = 'Water pump'
+        label.translation_changed = label.translation_changes()
+        self.assertIn('text_en', label._partial_update_fields())
+
+    class FakeTable:
+        """Một dòng DB cho _default_manager: UPDATE ... WHERE translation_version = x như SQL thật."""
+
+        def __init__(self, row):
+            self.row = row
+            self.locked = False
+            self.updates = 0
+
+        def using(self, alias):
+            return self
+
+        def select_for_update(self):
+            self.locked = True
+            return self
+
+        def filter(self, pk, translation_version=None):
+            table = self
+
+            class Rows:
+                def update(self, **values):
+                    table.updates += 1
+                    if translation_version is not None and translation_version != table.row['translation_version']:
+                        return 0
+                    table.row.update(values)
+                    return 1
+
+                def values(self, *fields):
+                    return SimpleNamespace(first=lambda: {field: table.row[field] for field in fields})
+
+                def values_list(self, field, flat=False):
+                    return SimpleNamespace(first=lambda: table.row[field])
+
+            return Rows()
+
+    def test_save_translations_retries_after_concurrent_edit(self):
+        from core.models import SystemLabel
+
+        label = self.make_label(text_vi='Bơm', text_en='', text_th='')
+        baseline = label.translation_baseline()
+        label.text_en, label.text_th = 'Pump', 'ปั๊ม'
+        mark_translated(label, 'text_en', 'text_vi')
+        mark_translated(label, 'text_th', 'text_en')
+
+        # Trong lúc chờ API, người dùng nhập tay text_th -> phiên bản đã tăng
+        row = {name: getattr(label, name) for name in label.translated_field_names()}
+        row.update(text_en='', text_th='Thai', translation_sources=dict(baseline['sources']),
+                   translation_version=baseline['version'] + 1)
+        table = self.FakeTable(row)
+        with patch.object(SystemLabel._meta, 'default_manager', table):
+            saved = label.save_translations(baseline)
+
+        self.assertEqual(saved, {'text_en'})
+        self.assertEqual(table.updates, 2)
+        self.assertEqual((row['text_en'], row['text_th']), ('Pump', 'Thai'))
+        self.assertEqual(row['translation_version'], baseline['version'] + 2)
+        self.assertIn('text_en', row['translation_sources'])
+        self.assertNotIn('text_th', row['translation_sources'])
+
+    def test_save_translations_drops_target_of_changed_source(self):
+        from core.models import SystemLabel
+
+        label = self.make_label(text_vi='Bơm', text_en='')
+        baseline = label.translation_baseline()
+        label.text_en = 'Pump'
+        mark_translated(label, 'text_en', 'text_vi')
+        row = {name: getattr(label, name) for name in label.translated_field_names()}
+        row.update(text_vi='Van', text_en='', translation_sources={}, translation_version=baseline['version'] + 1)
+        with patch.object(SystemLabel._meta, 'default_manager', self.FakeTable(row)):
+            self.assertEqual(label.save_translations(baseline), set())
+        self.assertEqual(row['text_en'], '')
+
+    def test_save_merges_sources_under_row_lock(self):
+        from core.models import SystemLabel, TranslationTrackingMixin
+
+        label = self.make_label(text_vi='Bơm', text_en='Pump')
+        label.pk = 9
+        # Worker vừa lưu bản dịch text_th -> phải được giữ khi người dùng lưu text_vi
+        entry = ['text_en', 'abc']
+        table = self.FakeTable({'translation_sources': {**label.translation_sources, 'text_th': entry}})
+        label.text_vi = 'Bơm cấp'
+        with patch.object(SystemLabel._meta, 'default_manager', table), \
+                patch('core.models.transaction.atomic') as atomic, \
+                patch('django.db.models.Model.save') as model_save, \
+                patch.object(SystemLabel, 'refresh_from_db'):
+            # Chỉ phần của mixin (SystemLabel.save() còn hẹn dịch tự động sau commit)
+            TranslationTrackingMixin.save(label)
+        self.assertTrue(table.locked)
+        atomic.assert_called_once()
+        self.assertEqual(label.translation_sources['text_th'], entry)
+        self.assertIn('translation_sources', model_save.call_args.kwargs['update_fields'])
+
+
+class TranslationPreviewTests(SimpleTestCase):
+    class FakeChain:
+        def translate(self, text, source, target, app_label=None):
+            return f"{text}>{target}"
+
+        def to_pinyin(self, text, app_label=None):
+            return f"py({text})"
+
+        def describe(self, text, app_label=None):
+            return f"desc({text})"
+
+    FIELDS = ['name_vi', 'name_en', 'name_zh', 'name_zh_pinyin', 'name_th',
+              'description_vi', 'description_en', 'description_zh', 'description_th']
+
+    def preview(self, sources=None, **values):
+        draft = {field: values.get(field, '') for field in self.FIELDS}
+        results = stream_translations(draft, ('name', 'description'), sources=sources,
+                                      languages=['zh', 'th'], chain=self.FakeChain(), workers=2)
+        return {result['field']: (result['value'], result['source']) for result in results}
+
+    def test_fills_chain_and_keeps_user_fields(self):
+        results = self.preview(name_vi='Bơm', name_th='Thai tay')
+        self.assertEqual(results['name_en'], ('Bơm>en', 'name_vi'))
+        self.assertEqual(results['name_zh'], ('Bơm>en>zh', 'name_en'))
+        self.assertEqual(results['name_zh_pinyin'], ('py(Bơm>en>zh)', 'name_zh'))
+        self.assertEqual(results['description_en'], ('desc(Bơm>en)', 'name_en'))
+        self.assertEqual(results['description_vi'][1], 'description_en')
+        self.assertNotIn('name_th', results)
+        self.assertNotIn('name_vi', results)
+
+    def test_only_stale_translations_are_redone(self):
+        from core.translation_state import source_hash
+
+        sources = {'name_en': ['name_vi', source_hash('Bơm')], 'name_th': ['name_en', source_hash('Pump')]}
+        results = self.preview(sources=sources, name_vi='Bơm', name_en='Pump', name_th='Thai', name_zh='泵',
+                               description_vi='Mô tả', description_en='Desc', description_zh='描述', description_th='x')
+        self.assertEqual(set(results), {'name_zh_pinyin'})
+        results = self.preview(sources=sources, name_vi='Bơm cấp', name_en='Pump', name_th='Thai', name_zh='泵',
+                               description_vi='Mô tả', description_en='Desc', description_zh='描述', description_th='x')
+        self.assertEqual(set(results), {'name_en', 'name_th', 'name_zh_pinyin'})
+
+    def test_deadline_ends_stream_with_done_event(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        class HangingChain(self.FakeChain):
+            def translate(self, text, source, target, app_label=None):
+                release.wait(5)
+                return None
+
+        draft = {field: '' for field in self.FIELDS}
+        draft['name_vi'] = 'Bơm'
+        results = stream_translations(draft, ('name',), languages=[], chain=HangingChain(), workers=1, timeout=0.05)
+        events = list(stream_events(results))
+        self.assertIn('"timed_out": true', events[1])
+        self.assertTrue(events[-1].startswith('event: done'))
+        self.assertIn('"timed_out": true', events[-1])
+
+    def test_previews_share_one_bounded_pool(self):
+        from core import translation_preview
+
+        draft = {field: '' for field in self.FIELDS}
+        draft['name_vi'] = 'Bơm'
+        with patch.object(translation_preview, '_pool', None), \
+                override_settings(TRANSLATION_PREVIEW_WORKERS=2):
+            for _ in range(2):
+                list(stream_translations(draft, ('name',), languages=['th'], chain=self.FakeChain()))
+            pool = translation_preview.get_preview_pool()
+            self.assertEqual(pool._max_workers, 2)
+            self.assertLessEqual(len(pool._threads), 2)
+            pool.shutdown(wait=False)
+
+    def test_timed_out_preview_cancels_queued_calls(self):
+        from core import translation_preview
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        class HangingChain(self.FakeChain):
+            def translate(self, text, source, target, app_label=None):
+                calls.append(target)
+                release.wait(5)
+                return f"{target}:{text}"
+
+        draft = {field: '' for field in self.FIELDS}
+        draft.update(name_vi='Bơm', name_en='Pump', name_ja='', name_ko='')
+        with patch.object(translation_preview, '_pool', None), \
+                override_settings(TRANSLATION_PREVIEW_WORKERS=1):
+            results = list(stream_translations(draft, ('name',), languages=['th', 'ja', 'ko'], chain=HangingChain(),
+                                               timeout=0.05))
+            pool = translation_preview.get_preview_pool()
+            release.set()
+            pool.shutdown(wait=True)
+        self.assertTrue(all(result['timed_out'] for result in results))
+        # Chỉ lời gọi đang chạy hoàn tất; các lời gọi còn xếp hàng bị hủy thay vì chiếm pool chung
+        self.assertEqual(len(calls), 1)
+
+    def test_sse_format(self):
+        self.assertEqual(sse_event('done', {'count': 1}), 'event: done\ndata: {"count": 1}\n\n')
+
+
+class CoverageAggregateTests(SimpleTestCase):
+    def test_one_filtered_count_per_language_and_state(self):
+        from core.coverage import _aggregates
+
+        aggregates = _aggregates({'en': 'text_en', 'th': 'text_th'})
+        self.assertEqual(set(aggregates), {'total', 'en__empty', 'en__stale', 'th__empty', 'th__stale'})
+        self.assertIsNotNone(aggregates['th__stale'].filter)
+
+
+class CountingEngine(BaseTTSEngine):
+    name = 'counting'
+    default_voices = {'vi': 'vi-test'}
+
+    def __init__(self, voices=None):
+        super().__init__(voices)
+        self.calls = []
+
+    def synthesize(self, text, language, voice):
+        self.calls.append((text, language, voice))
+        return f"{voice}:{text}".encode('utf-8')
+
+
+class FakeAudioObject:
+    """Đủ cho generate_audio: name/description + manager ghi nhận update() thay cho DB."""
+    updates = []
+
+    class objects:
+        @staticmethod
+        def filter(pk):
+            return SimpleNamespace(update=lambda **fields: FakeAudioObject.updates.append((pk, fields)))
+
+    def __init__(self, pk, name, description=''):
+        self.pk, self.name, self.description = pk, name, description
+        self._audio_vi = ''
+
+    @property
+    def audio_vi(self):
+        return SimpleNamespace(name=self._audio_vi) if self._audio_vi else None
+
+    @audio_vi.setter
+    def audio_vi(self, value):
+        self._audio_vi = value
+
+
+class TTSTests(SimpleTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        FakeAudioObject.updates = []
+
+    def test_cache_key_depends_on_text_voice_and_language(self):
+        key = audio_cache_key('Bơm cấp', 'vi', 'vi')
+        self.assertEqual(key, audio_cache_key('Bơm cấp', 'vi', 'vi'))
+        self.assertEqual(len(key), 32)
+        self.assertEqual(len({key, audio_cache_key('Bơm', 'vi', 'vi'), audio_cache_key('Bơm cấp', 'vi-x', 'vi'),
+                              audio_cache_key('Bơm cấp', 'vi', 'en')}), 4)
+
+    def test_source_text_strips_rich_text(self):
+        self.assertEqual(get_source_text(FakeAudioObject(1, 'Bơm', '<p>Cấp <b>nước</b></p>')), 'Bơm. Cấp nước')
+        self.assertEqual(get_source_text(FakeAudioObject(1, 'Bơm')), 'Bơm')
+
+    @override_settings(TTS_ENGINE='core.tests.CountingEngine', TTS_ENGINE_OPTIONS={'voices': {'en': 'en-gb'}})
+    def test_engine_from_settings_merges_voices(self):
+        engine = get_tts_engine()
+        self.assertIsInstance(engine, CountingEngine)
+        self.assertEqual(engine.get_voice('vi'), 'vi-test')
+        self.assertEqual(engine.get_voice('en'), 'en-gb')
+        self.assertEqual(engine.get_voice('zh'), 'zh')
+
+    def test_identical_text_is_synthesized_once(self):
+        engine = CountingEngine()
+        first, twin = FakeAudioObject(1, 'Bơm cấp'), FakeAudioObject(2, 'Bơm cấp')
+        status, path = generate_audio(first, 'vi', engine=engine)
+        self.assertEqual(status, 'generated')
+        self.assertEqual(generate_audio(twin, 'vi', engine=engine), ('reused', path))
+        self.assertEqual(generate_audio(first, 'vi', engine=engine), ('unchanged', path))
+        self.assertEqual(len(engine.calls), 1)
+        self.assertEqual(FakeAudioObject.updates, [(1, {'audio_vi': path}), (2, {'audio_vi': path})])
+
+        first.name = 'Bơm cấp 2'
+        self.assertEqual(generate_audio(first, 'vi', engine=engine)[0], 'generated')
+        self.assertEqual(len(engine.calls), 2)
+
+    def test_field_points_at_name_chosen_by_storage(self):
+        from django.core.files.storage import default_storage
+
+        obj = FakeAudioObject(1, 'Bơm cấp')
+        with patch.object(default_storage, 'save', return_value='tts/vi/renamed.mp3') as save:
+            status, path = generate_audio(obj, 'vi', engine=CountingEngine(), force=True)
+        self.assertEqual((status, path), ('generated', 'tts/vi/renamed.mp3'))
+        self.assertNotEqual(save.call_args.args[0], path)
+        self.assertEqual(FakeAudioObject.updates, [(1, {'audio_vi': path})])
+
+    def test_key_locks_are_bounded(self):
+        keys = [audio_cache_key(str(i), 'vi', 'vi') for i in range(1000)]
+        locks = {id(_lock_for(key)) for key in keys}
+        self.assertLessEqual(len(locks), KEY_LOCK_STRIPES)
+        self.assertIs(_lock_for(keys[0]), _lock_for(keys[0]))
+
+    def test_save_hooks_schedule_generation_only_when_enabled(self):
+        from area.models import FunctionalLocation
+        from equipment.models import Equipment
+
+        for model, parent in ((Equipment, 'modelcluster.models.ClusterableModel.save'),
+                              (FunctionalLocation, 'django.db.models.Model.save')):
+            with self.subTest(model=model.__name__), patch(parent), \
+                    patch('core.background.run_in_background') as scheduled:
+                instance = model(pk=7, name='Bơm')
+                with override_settings(TTS_AUTO_GENERATE=False):
+                    instance.save()
+                scheduled.assert_not_called()
+                with override_settings(TTS_AUTO_GENERATE=True):
+                    instance.save()
+                scheduled.assert_called_once_with(generate_audio_for_object_id, model, 7)
+
+
+SVG_PLAN = (b'<svg xmlns="http://www.w3.org/2000/svg" width="400" height="300" viewBox="0 0 400 300">'
+            b'<rect width="400" height="300"/></svg>')
+
+
+class RenditionSpecTests(SimpleTestCase):
+    def test_every_spec_renders_an_svg(self):
+        from wagtail.images import get_image_model
+        from wagtail.images.models import Filter
+
+        from core.renditions import ALL_RENDITION_SPECS
+
+        # collection_id cố định -> không truy vấn thư mục gốc
+        image = get_image_model()(title='plan', file=SimpleUploadedFile('plan.svg', SVG_PLAN),
+                                  width=400, height=300, collection_id=1)
+        for spec in ALL_RENDITION_SPECS:
+            with self.subTest(spec=spec):
+                output = BytesIO()
+                image.clean_filter_for_svg(Filter(spec)).run(image, output)
+                self.assertIn(b'<svg', output.getvalue())
+
+    def test_template_specs_match_rendition_sets(self):
+        from django.conf import settings
+
+        from core.renditions import ALL_RENDITION_SPECS
+
+        tag = re.compile(r'{% srcset_image \S+ ((?:[^\s=%]+ )+)')
+        found = set()
+        for app in ('area', 'equipment'):
+            for template in Path(settings.BASE_DIR, app, 'templates').rglob('*.html'):
+                for filters in tag.findall(template.read_text(encoding='utf-8')):
+                    first, *rest = filters.split()
+                    size, _, variants = first.partition('-{')
+                    for variant in variants.rstrip('}').split(','):
+                        found.add('|'.join([f"{size}-{variant}", *rest]))
+        self.assertTrue(found)
+        self.assertLessEqual(found, set(ALL_RENDITION_SPECS))
+
+
+class ChunkedUploadTests(SimpleTestCase):
+    """Ghi từng phần: giành offset trước khi ghi, không bao giờ cắt tệp tạm dưới offset đã ghi nhận."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(CHUNKED_UPLOAD_DIR=directory.name, CHUNKED_UPLOAD_CHUNK_SIZE=8))
+        self.upload = SimpleNamespace(pk='u1', status='uploading', offset=4, total_size=12, user='editor',
+                                      document_id=None, filename='plan.pdf', refresh_from_db=lambda fields: None)
+        self.path = upload_temp_path(self.upload)
+        with open(self.path, 'wb') as f:
+            # 4 byte đã ghi nhận + 2 byte lố của lần gửi trước bị đứt
+            f.write(b'abcdXY')
+        self.released = []
+        self.enterContext(patch('core.uploads._release', lambda upload, claimed_at, offset: self.released.append(offset)))
+        self.renewals = 0
+        self.enterContext(patch('core.uploads._renew', self.renew))
+
+    def renew(self, upload, claimed_at):
+        self.renewals += 1
+        return claimed_at
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_claim_before_write(self):
+        with patch('core.uploads._claim', return_value=None):
+            with self.assertRaises(UploadError) as raised:
+                append_chunk(self.upload, 4, BytesIO(b'efgh'), 4)
+        self.assertEqual(raised.exception.status, 409)
+        self.assertEqual(self.read(), b'abcdXY')
+        self.assertEqual(self.released, [])
+
+    def test_chunk_replaces_leftover_bytes(self):
+        with patch('core.uploads._claim', return_value='claimed'):
+            append_chunk(self.upload, 4, BytesIO(b'efgh'), 4)
+        self.assertEqual(self.read(), b'abcdefgh')
+        self.assertEqual(self.released, [8])
+
+    def test_broken_chunk_keeps_committed_bytes(self):
+        with patch('core.uploads._claim', return_value='claimed'):
+            with self.assertRaises(UploadError):
+                append_chunk(self.upload, 4, BytesIO(b'ef'), 4)
+        self.assertEqual(self.read(), b'abcd')
+        self.assertEqual(self.released, [4])
+
+    @override_settings(CHUNKED_UPLOAD_CLAIM_TIMEOUT=0)
+    def test_claim_is_renewed_while_streaming(self):
+        with patch('core.uploads._claim', return_value='claimed'):
+            append_chunk(self.upload, 4, BytesIO(b'efgh'), 4)
+        # Trước lần ghi khối duy nhất + trước khi cắt tệp
+        self.assertEqual(self.renewals, 2)
+        self.assertEqual(self.released, [8])
+
+    @override_settings(CHUNKED_UPLOAD_CLAIM_TIMEOUT=0)
+    def test_lost_claim_never_truncates_other_writer_data(self):
+        def taken_over(upload, claimed_at):
+            # Lượt ghi quá hạn: request khác đã giành offset 4 và ghi phần của nó
+            with open(self.path, 'r+b') as f:
+                f.seek(4)
+                f.write(b'EFGHIJKL')
+            return None
+
+        with patch('core.uploads._claim', return_value='claimed'), patch('core.uploads._renew', taken_over):
+            with self.assertRaises(UploadError) as raised:
+                append_chunk(self.upload, 4, BytesIO(b'efgh'), 4)
+        self.assertEqual(raised.exception.status, 409)
+        self.assertEqual(self.read(), b'abcdEFGHIJKL')
+        self.assertEqual(self.released, [])
+
+    def test_deduplication_only_offers_permitted_documents(self):
+        self.upload.offset = self.upload.total_size = 6
+        self.upload.save = lambda update_fields: None
+        existing = SimpleNamespace(pk=3)
+        candidates = SimpleNamespace(filter=lambda **lookup: SimpleNamespace(
+            order_by=lambda *fields: SimpleNamespace(first=lambda: existing if lookup['file_hash'] else None)))
+        with patch('core.uploads.document_permission_policy.instances_user_has_any_permission_for',
+                   return_value=candidates) as permitted:
+            self.assertEqual(complete_upload(self.upload), (existing, True))
+        permitted.assert_called_once_with('editor', ['choose', 'change'])
+        self.assertEqual(self.upload.status, 'complete')
+        self.assertFalse(os.path.exists(self.path))
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = media.name
+        self.storage = ContentAddressedStorage(location=media.name)
+
+    def test_same_content_is_stored_once(self):
+        first = self.storage.save('documents/plan.pdf', ContentFile(b'P&ID'))
+        again = self.storage.save('documents/plan.pdf', ContentFile(b'P&ID'))
+        renamed = self.storage.save('documents/so-do.pdf', ContentFile(b'P&ID'))
+        self.assertTrue(first.startswith(CAS_PREFIX))
+        self.assertEqual(again, first)
+        self.assertNotEqual(renamed, first)
+        self.assertEqual(os.stat(self.storage.path(first)).st_ino, os.stat(self.storage.path(renamed)).st_ino)
+        self.assertEqual(os.stat(self.storage.path(first)).st_nlink, 2)
+
+    def test_reused_blob_is_fresh_for_gc(self):
+        first = self.storage.save('documents/plan.pdf', ContentFile(b'P&ID'))
+        old = time.time() - 86400
+        os.utime(self.storage.path(first), (old, old))
+        self.storage.save('documents/plan.pdf', ContentFile(b'P&ID'))
+        self.assertGreater(os.stat(self.storage.path(first)).st_mtime, old + 3600)
+
+        os.utime(self.storage.path(first), (old, old))
+        renamed = self.storage.save('documents/so-do.pdf', ContentFile(b'P&ID'))
+        self.assertGreater(os.stat(self.storage.path(renamed)).st_mtime, old + 3600)
+
+    def test_delete_keeps_shared_content(self):
+        name = self.storage.save('documents/plan.pdf', ContentFile(b'P&ID'))
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_exempt_prefixes_are_plain_files(self):
+        name = self.storage.save('tts/cache/vi/abc.wav', ContentFile(b'RIFF'))
+        self.assertEqual(name, 'tts/cache/vi/abc.wav')
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+
+    def test_gc_media_keeps_referenced_blobs_and_links(self):
+        kept = self.storage.save('documents/plan.pdf', ContentFile(b'P&ID'))
+        link = self.storage.save('documents/so-do.pdf', ContentFile(b'P&ID'))
+        stale_link = self.storage.save('documents/ban-sao.pdf', ContentFile(b'P&ID'))
+        orphan = self.storage.save('documents/old.pdf', ContentFile(b'old revision'))
+        old = time.time() - 86400
+        for name in (kept, link, stale_link, orphan):
+            os.utime(self.storage.path(name), (old, old))
+
+        output = StringIO()
+        with override_settings(MEDIA_ROOT=self.media, SCHEMATIC_PREVIEW_ROOT=os.path.join(self.media, 'none')), \
+                patch('core.management.commands.gc_media.referenced_names', return_value={kept, link}):
+            call_command('gc_media', min_age=1, stdout=output)
+
+        self.assertTrue(os.path.exists(self.storage.path(kept)))
+        self.assertTrue(os.path.exists(self.storage.path(link)))
+        self.assertEqual(os.stat(self.storage.path(kept)).st_nlink, 2)
+        self.assertFalse(os.path.exists(self.storage.path(stale_link)))
+        self.assertFalse(os.path.exists(self.storage.path(orphan)))
+        # Xóa tên hard link không giải phóng dung lượng -> chỉ tính blob mồ côi
+        self.assertIn(f"2 ({len(b'old revision') / 1048576:.1f} MB", output.getvalue())
+
+
+class CopyDatabaseTests(SimpleTestCase):
+    def test_insert_keeps_auto_now_timestamps(self):
+        from datetime import datetime, timezone as dt_timezone
+
+        from django.db.models.sql.compiler import SQLInsertCompiler
+
+        from core.management.commands.copy_database import Command
+        from core.models import ChunkedUpload
+
+        copied = datetime(2020, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+        upload = ChunkedUpload(pk='00000000-0000-0000-0000-000000000001', user_id=1, filename='a.pdf',
+                               total_size=1, created_at=copied, updated_at=copied)
+        statements = []
+
+        def execute_sql(compiler, returning_fields=None):
+            statements.extend(compiler.as_sql())
+            return []
+
+        with patch.object(SQLInsertCompiler, 'execute_sql', execute_sql):
+            self.assertEqual(Command()._insert(ChunkedUpload, [upload], 'default'), 1)
+        (sql, params), = statements
+        # created_at + updated_at giữ nguyên giá trị nguồn (bulk_create sẽ ghi thời điểm chép)
+        self.assertEqual(sum(str(param).startswith('2020-01-02 03:04:05') for param in params), 2)
@@ -0,0 +1,170 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .translation_state import mark_translated, needs_translation, root_field
+
+logger = logging.getLogger(__name__)
+
+# =========================================================
+# XEM TRƯỚC BẢN DỊCH (CHƯA LƯU) - PHÁT TỪNG KẾT QUẢ KHI CÓ
+# =========================================================
+# Cùng chuỗi với _translate_field_logic (nguồn -> en -> ngôn ngữ khác, zh -> pinyin, tên -> mô tả)
+# nhưng các bước độc lập chạy song song: kết quả đầu tiên (name_en) có sau ~1 lượt gọi API,
+# các ngôn ngữ còn lại đến cùng lúc ở lượt thứ hai thay vì nối tiếp nhau.
+# Mọi bản xem trước dùng chung một pool có giới hạn: lời gọi API treo sau khi hết thời hạn không
+# sinh thêm thread theo từng request, chỉ chiếm chỗ trong pool cho tới khi provider trả về.
+
+_lock = threading.Lock()
+_pool = None
+
+
+def get_preview_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TRANSLATION_PREVIEW_WORKERS', 8),
+                thread_name_prefix='preview',
+            )
+        return _pool
+
+
+class Draft:
+    """Giá trị form chưa lưu + translation_sources của bản ghi (nếu đang sửa) - đủ cho core.translation_state."""
+
+    def __init__(self, values, sources=None):
+        self.values = dict(values)
+        self.translation_sources = dict(sources or {})
+
+    def __getattr__(self, name):
+        values = self.__dict__.get('values', {})
+        if name in values:
+            return values[name] or ''
+        raise AttributeError(name)
+
+    def get(self, name):
+        return self.values.get(name) or ''
+
+
+def stream_translations(values, prefixes, app_label=None, sources=None, languages=None, chain=None, workers=None,
+                        timeout=None):
+    """
+    Sinh lần lượt {'field', 'value', 'source'} cho mỗi trường đích được dịch từ bản nháp `values`
+    (chỉ trường trống hoặc bản dịch cũ theo `sources`; trường người dùng nhập được giữ nguyên).
+    `value` None = provider không dịch được trường đó. `workers` -> pool riêng (mặc định: get_preview_pool()).
+    Quá `timeout` giây (mặc định settings.TRANSLATION_PREVIEW_TIMEOUT) -> các trường chưa xong trả về None
+    kèm 'timed_out' và dừng: kết nối (thread của worker gunicorn) không bị giữ vô thời hạn khi API treo.
+    """
+    from core.languages import language_registry
+    from core.translation_providers import get_translation_chain
+
+    chain = chain or get_translation_chain()
+    draft = Draft(values, sources)
+    codes = languages if languages is not None else [lang.code for lang in language_registry.active()]
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='preview') if workers else get_preview_pool()
+    pending = {}
+    scheduled = set()
+    if timeout is None:
+        timeout = getattr(settings, 'TRANSLATION_PREVIEW_TIMEOUT', 30)
+    deadline = time.monotonic() + timeout
+
+    def run(func, *args):
+        try:
+            return func(*args)
+        finally:
+            # Thread riêng -> tự đóng kết nối DB (từ điển dịch / prompt nạp từ DB)
+            close_old_connections()
+
+    def submit(field, source, func, *args):
+        if field in draft.values and field not in scheduled and needs_translation(draft, field, source):
+            scheduled.add(field)
+            pending[pool.submit(run, func, *args)] = (field, source)
+
+    def root_of(prefix):
+        root = root_field(draft.get, prefix, draft.translation_sources)
+        return root if root in (f"{prefix}_vi", f"{prefix}_zh") else None
+
+    def fan_out(field):
+        """Gửi các bước phụ thuộc vào trường `field` vừa có giá trị."""
+        prefix = next(p for p in prefixes if field.startswith(f"{p}_"))
+        code = field[len(prefix) + 1:]
+        text = draft.get(field)
+        if code == 'zh':
+            submit(f"{prefix}_zh_pinyin", field, chain.to_pinyin, text, app_label)
+        if code != 'en':
+            return
+        if prefix == 'name' and 'description' in prefixes and not root_of('description'):
+            # Chưa có mô tả nguồn -> sinh mô tả tiếng Anh từ tên (như auto_generate_description_logic).
+            # Gửi trước các bản dịch tên: nhánh mô tả còn một lượt dịch phía sau
+            submit('description_en', field, chain.describe, text, app_label)
+        root = root_of(prefix)
+        for target in ['vi', *codes]:
+            target_field = f"{prefix}_{target}"
+            if target not in ('en', 'zh_pinyin') and target_field != root:
+                submit(target_field, field, chain.translate, text, 'en', target, app_label)
+
+    for prefix in prefixes:
+        root = root_of(prefix)
+        en = f"{prefix}_en"
+        if root:
+            submit(en, root, chain.translate, draft.get(root), root[len(prefix) + 1:], 'en', app_label)
+        # Trường đã có giá trị và không phải dịch lại -> các bước phụ thuộc chạy ngay
+        for field in (en, f"{prefix}_zh"):
+            if field not in scheduled and draft.get(field):
+                fan_out(field)
+
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                logger.warning(f"Translation preview timed out after {timeout}s, {len(pending)} field(s) pending")
+                for field, source in pending.values():
+                    yield {'field': field, 'value': None, 'source': source, 'timed_out': True}
+                return
+            for future in done:
+                field, source = pending.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logger.error(f"Translation preview {field} error: {e}")
+                    value = None
+                if value:
+                    draft.values[field] = value
+                    mark_translated(draft, field, source)
+                yield {'field': field, 'value': value, 'source': source}
+                if value:
+                    fan_out(field)
+    finally:
+        # Hết thời hạn / client ngắt kết nối giữa chừng -> bỏ các lời gọi chưa chạy (pool chung vẫn hoạt động)
+        for future in pending:
+            future.cancel()
+        if workers:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_events(results):
+    """
+    Bọc stream_translations thành Server-Sent Events; sự kiện 'done' cuối cùng kèm tổng thời gian
+    và 'timed_out' (còn trường chưa dịch xong khi hết thời hạn).
+    """
+    started = time.perf_counter()
+    # Comment SSE đầu tiên -> proxy / trình duyệt nhận header ngay, không chờ kết quả đầu tiên
+    yield ": preview\n\n"
+    count, timed_out = 0, False
+    for result in results:
+        count += bool(result['value'])
+        timed_out = timed_out or result.get('timed_out', False)
+        yield sse_event('translation', {**result, 'elapsed_ms': round((time.perf_counter() - started) * 1000)})
+    yield sse_event('done', {
+        'count': count, 'timed_out': timed_out, 'elapsed_ms': round((time.perf_counter() - started) * 1000),
+    })
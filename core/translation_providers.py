@@ -0,0 +1,419 @@
+import logging
+import threading
+import time
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from . import metrics, perf
+from .cache import ChangeLog
+from .translation_state import is_reviewed
+
+logger = logging.getLogger(__name__)
+
+# Thứ tự mặc định: tra từ điển cục bộ trước (micro giây, không cần mạng) rồi mới gọi AI
+DEFAULT_PROVIDERS = [
+    {'BACKEND': 'core.translation_providers.GlossaryProvider'},
+    {'BACKEND': 'core.translation_providers.PinyinProvider'},
+    {'BACKEND': 'core.translation_providers.GeminiProvider'},
+]
+
+# Tên ngôn ngữ đưa vào prompt (rõ ràng hơn tên hiển thị trong SystemLanguage)
+SOURCE_PROMPT_NAMES = {'vi': "Vietnamese", 'zh': "Chinese", 'en': "English"}
+TARGET_PROMPT_NAMES = {
+    'vi': "Vietnamese",
+    'en': "English",
+    'zh': "Simplified Chinese (Hanzi only)",
+    'fil': "Filipino (Tagalog)",
+}
+
+
+# =========================================================
+# 1. GIAO DIỆN PROVIDER
+# =========================================================
+class TranslationProvider:
+    """
+    Một nguồn dịch. Mã ngôn ngữ theo hậu tố trường (vi, en, zh, th, ...).
+    Trả về None khi không dịch được -> chuỗi thử provider kế tiếp.
+    """
+
+    name = 'base'
+
+    def translate(self, text, source, target, app_label=None):
+        return None
+
+    def to_pinyin(self, text, app_label=None):
+        return None
+
+    def describe(self, text, app_label=None):
+        """Sinh mô tả kỹ thuật (tiếng Anh) cho một thuật ngữ."""
+        return None
+
+
+class GeminiProvider(TranslationProvider):
+    """
+    Gọi Gemini qua core.ai_services (prompt lấy từ AIPrompt, có retry).
+    Ngắt mạch: sau `failure_threshold` lần lỗi liên tiếp thì bỏ qua provider trong `cooldown` giây,
+    để mạng nhà máy bị cô lập không làm mỗi trường phải chờ hết timeout + retry.
+    """
+
+    name = 'gemini'
+
+    def __init__(self, base_url=None, api_key=None, failure_threshold=3, cooldown=60):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def _call(self, prompt, prompt_type):
+        from core.ai_services import call_gemini_api
+
+        if self._open_until > time.monotonic():
+            return None
+        result = call_gemini_api(prompt, prompt_type, base_url=self.base_url, api_key=self.api_key)
+        with self._lock:
+            if result:
+                self._failures = 0
+            else:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._open_until = time.monotonic() + self.cooldown
+                    self._failures = 0
+                    logger.warning(f"{self.name}: {self.failure_threshold} lỗi liên tiếp, tạm bỏ qua {self.cooldown}s")
+        return result
+
+    def _target_name(self, code):
+        if code in TARGET_PROMPT_NAMES:
+            return TARGET_PROMPT_NAMES[code]
+        from core.languages import language_registry
+
+        lang = language_registry.get(code)
+        return lang.name if lang else code
+
+    def translate(self, text, source, target, app_label=None):
+        from core.ai_services import get_best_prompt
+
+        if source != 'en' and target != 'en':
+            # Chuẩn hóa qua tiếng Anh (cùng chuỗi với _translate_field_logic)
+            text = self.translate(text, source, 'en', app_label)
+            if not text:
+                return None
+            source = 'en'
+        if target == 'en':
+            tmpl = get_best_prompt('translate_to_en', app_label)
+            source_name = SOURCE_PROMPT_NAMES.get(source) or self._target_name(source)
+            return self._call(tmpl.format(source_lang=source_name, text=text), 'translate_to_en')
+        tmpl = get_best_prompt('translate_from_en', app_label)
+        return self._call(tmpl.format(target_lang=self._target_name(target), text=text), 'translate_from_en')
+
+    def to_pinyin(self, text, app_label=None):
+        from core.ai_services import get_best_prompt
+
+        tmpl = get_best_prompt('pinyin_converter', app_label)
+        if not tmpl:
+            tmpl = "Role: Linguist. Task: Convert '{text}' to Pinyin. Constraint: Return ONLY Pinyin."
+        return self._call(tmpl.format(text=text), 'pinyin_converter')
+
+    def describe(self, text, app_label=None):
+        from core.ai_services import get_best_prompt
+
+        tmpl = get_best_prompt('generate_desc', app_label)
+        return self._call(tmpl.format(text=text), 'generate_desc')
+
+
+class StubProvider(GeminiProvider):
+    """Gemini giả lập cục bộ (manage.py ai_stub_server) - kiểm thử / đo tải khi không có mạng."""
+
+    name = 'stub'
+
+    def __init__(self, base_url=None, api_key='stub', **options):
+        super().__init__(base_url=base_url or getattr(settings, 'AI_STUB_URL', 'http://127.0.0.1:8765'),
+                         api_key=api_key, **options)
+
+
+# =========================================================
+# 2. TỪ ĐIỂN CỤC BỘ TỪ CÁC BẢN DỊCH ĐÃ DUYỆT
+# =========================================================
+# Nhật ký thay đổi dùng chung: worker khác sửa bản dịch -> worker này đọc lại đúng các dòng đó
+glossary_changes = ChangeLog('glossary:changes', timeout=24 * 3600)
+
+# (model, tiền tố trường) có đủ cột theo ngôn ngữ: name_vi, name_en, ... / text_vi, text_en, ...
+GLOSSARY_SOURCES = [
+    ('details.Detail', 'name'),
+    ('core.SystemLabel', 'text'),
+]
+GLOSSARY_SOURCE_LANGUAGES = ('vi', 'zh', 'en')
+# Chu kỳ (giây) hỏi nhật ký thay đổi chung
+DEFAULT_GLOSSARY_POLL_INTERVAL = 5
+# Mục nhật ký đặc biệt: nạp lại toàn bộ (VD: cập nhật hàng loạt bằng lệnh quản trị)
+RELOAD = '*'
+
+
+def normalize_term(text):
+    return ' '.join(str(text).split()).casefold()
+
+
+class Glossary:
+    """
+    Bảng (ngôn ngữ nguồn, thuật ngữ chuẩn hóa) -> các dòng có thuật ngữ đó, nạp một lần cho mỗi tiến trình
+    từ các giá trị người dùng nhập / sửa tay trong Admin và còn khớp nguồn (không học từ bản dịch máy).
+    Lưu / xóa một dòng chỉ cập nhật thuật ngữ của dòng đó (tại chỗ + qua nhật ký thay đổi cho worker khác),
+    không nạp lại cả bảng -> quét hàng loạt nhãn (scan_system_labels) không còn O(N²).
+    """
+
+    def __init__(self, sources=None, poll_interval=None):
+        self.sources = sources or GLOSSARY_SOURCES
+        self.poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._rows = None        # (thứ tự nguồn, pk) -> {mã ngôn ngữ: bản dịch}
+        self._terms = {}         # (ngôn ngữ nguồn, thuật ngữ chuẩn hóa) -> {(thứ tự nguồn, pk), ...}
+        self._seq = None
+        self._polled_at = 0.0
+
+    def _fields(self, model_label, prefix):
+        model = apps.get_model(model_label)
+        fields = [f.name for f in model._meta.concrete_fields if f.name.startswith(f"{prefix}_")]
+        return model, fields, [field[len(prefix) + 1:] for field in fields]
+
+    @staticmethod
+    def _row_values(fields, codes, row, stale, sources):
+        # Chỉ học từ giá trị người nhập / duyệt: bản dịch máy chưa duyệt không được lan sang bản ghi khác.
+        # Bản dịch có nguồn đã đổi (translation_stale) không còn là cặp thuật ngữ đúng -> bỏ qua,
+        # nếu không chính dòng vừa sửa nguồn sẽ "dịch" văn bản mới bằng bản dịch cũ của nó
+        return {
+            code: value.strip() for field, code, value in zip(fields, codes, row)
+            if value and value.strip() and field not in (stale or {}) and is_reviewed(sources, field)
+        }
+
+    def _source_index(self, model_label):
+        return next((i for i, (label, _) in enumerate(self.sources) if label == model_label), None)
+
+    # --- Chỉ mục thuật ngữ ---
+    def _add_row(self, key, values):
+        self._rows[key] = values
+        for source in GLOSSARY_SOURCE_LANGUAGES:
+            if source in values:
+                self._terms.setdefault((source, normalize_term(values[source])), set()).add(key)
+
+    def _remove_row(self, key):
+        values = self._rows.pop(key, None) or {}
+        for source in GLOSSARY_SOURCE_LANGUAGES:
+            if source in values:
+                term = (source, normalize_term(values[source]))
+                keys = self._terms.get(term)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._terms[term]
+
+    def _read_rows(self, index, pks=None):
+        """(pk, {mã ngôn ngữ: bản dịch}) của nguồn thứ `index` - toàn bảng, hoặc chỉ các pk cho trước."""
+        model, fields, codes = self._fields(*self.sources[index])
+        queryset = model.objects.order_by('pk')
+        if pks is not None:
+            queryset = queryset.filter(pk__in=pks)
+        columns = queryset.values_list('pk', 'translation_stale', 'translation_sources', *fields)
+        for pk, stale, sources, *row in columns.iterator(chunk_size=2000):
+            yield pk, self._row_values(fields, codes, row, stale, sources)
+
+    def _reload(self):
+        # Đọc số thứ tự TRƯỚC khi nạp: thay đổi trong lúc nạp sẽ được áp dụng lại ở lần hỏi sau
+        seq = glossary_changes.current()
+        self._rows, self._terms = {}, {}
+        for index in range(len(self.sources)):
+            for pk, values in self._read_rows(index):
+                if values:
+                    self._add_row((index, pk), values)
+        self._seq = seq
+        self._polled_at = time.monotonic()
+
+    def _catch_up(self):
+        """Áp dụng thay đổi từ worker khác. Trả về False nếu cần nạp lại toàn bộ."""
+        seq, changes = glossary_changes.since(self._seq)
+        if changes is None or RELOAD in changes:
+            return False
+        pks = {}
+        for model_label, pk in changes:
+            pks.setdefault(model_label, set()).add(pk)
+        for model_label, changed in pks.items():
+            index = self._source_index(model_label)
+            if index is None:
+                continue
+            for pk in changed:
+                self._remove_row((index, pk))
+            for pk, values in self._read_rows(index, changed):
+                if values:
+                    self._add_row((index, pk), values)
+        self._seq = seq
+        return True
+
+    def _sync(self):
+        now = time.monotonic()
+        interval = self.poll_interval
+        if interval is None:
+            interval = getattr(settings, 'TRANSLATION_GLOSSARY_POLL_INTERVAL', DEFAULT_GLOSSARY_POLL_INTERVAL)
+        with self._lock:
+            if self._rows is None:
+                self._reload()
+            elif now - self._polled_at >= interval:
+                self._polled_at = now
+                if not self._catch_up():
+                    self._reload()
+
+    # --- Tra cứu ---
+    def lookup(self, text, source, target):
+        self._sync()
+        with self._lock:
+            # Dòng cũ nhất thắng: thuật ngữ trùng không bị bản dịch mới ghi đè
+            for key in sorted(self._terms.get((source, normalize_term(text)), ())):
+                value = self._rows[key].get(target)
+                if value:
+                    return value
+        return None
+
+    # --- Cập nhật khi lưu / xóa ---
+    def update(self, instance, deleted=False):
+        """Cập nhật tại chỗ thuật ngữ của một dòng rồi ghi vào nhật ký cho worker khác."""
+        model_label = instance._meta.label
+        index = self._source_index(model_label)
+        if index is None:
+            return
+        with self._lock:
+            if self._rows is not None:
+                self._remove_row((index, instance.pk))
+                if not deleted:
+                    _, fields, codes = self._fields(model_label, self.sources[index][1])
+                    row = [getattr(instance, field) for field in fields]
+                    values = self._row_values(
+                        fields, codes, row,
+                        getattr(instance, 'translation_stale', None), getattr(instance, 'translation_sources', None),
+                    )
+                    if values:
+                        self._add_row((index, instance.pk), values)
+        # Ghi nhật ký sau commit: worker khác đọc lại dòng khi dữ liệu mới đã thấy được
+        transaction.on_commit(partial(self._log_change, (model_label, instance.pk)))
+
+    def _log_change(self, change):
+        seq = glossary_changes.append(change)
+        with self._lock:
+            # Thay đổi liền kề thay đổi cuối cùng đã áp dụng -> chính là thay đổi vừa làm ở worker này
+            if seq is not None and self._seq == seq - 1:
+                self._seq = seq
+
+    def invalidate(self):
+        """Nạp lại toàn bộ ở mọi worker (cập nhật hàng loạt không đi qua signal)."""
+        with self._lock:
+            self._rows = None
+        glossary_changes.append(RELOAD)
+
+    def __len__(self):
+        self._sync()
+        return len(self._terms)
+
+
+glossary = Glossary()
+
+
+class GlossaryProvider(TranslationProvider):
+    name = 'glossary'
+
+    def translate(self, text, source, target, app_label=None):
+        result = glossary.lookup(text, source, target)
+        if result is None and source != 'en' and target != 'en':
+            english = glossary.lookup(text, source, 'en')
+            result = glossary.lookup(english, 'en', target) if english else None
+        return result
+
+    def to_pinyin(self, text, app_label=None):
+        return glossary.lookup(text, 'zh', 'zh_pinyin')
+
+
+class PinyinProvider(TranslationProvider):
+    """Pinyin sinh cục bộ (core.pinyin) - thay cho lời gọi AI 'pinyin_converter'."""
+
+    name = 'pinyin'
+
+    def to_pinyin(self, text, app_label=None):
+        from core.pinyin import to_pinyin
+
+        return to_pinyin(text)
+
+
+@receiver([post_save, post_delete], sender='details.Detail')
+@receiver([post_save, post_delete], sender='core.SystemLabel')
+def update_glossary(sender, instance, raw=False, **kwargs):
+    if not raw:
+        glossary.update(instance, deleted=kwargs.get('signal') is post_delete)
+
+
+# =========================================================
+# 3. CHUỖI PROVIDER (settings.TRANSLATION_PROVIDERS)
+# =========================================================
+class TranslationChain:
+    """Thử lần lượt từng provider, kết quả khác rỗng đầu tiên được dùng."""
+
+    def __init__(self, providers):
+        self.providers = providers
+
+    def _first(self, method, *args, **kwargs):
+        for provider in self.providers:
+            try:
+                result = getattr(provider, method)(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Translation provider {provider.name} error: {e}")
+                continue
+            if result:
+                perf.incr(f"translate.{provider.name}")
+                metrics.record_translation_lookup(provider.name)
+                return result
+        metrics.record_translation_lookup('none')
+        return None
+
+    def translate(self, text, source, target, app_label=None):
+        if not text:
+            return None
+        return self._first('translate', text, source, target, app_label)
+
+    def to_pinyin(self, text, app_label=None):
+        if not text:
+            return None
+        return self._first('to_pinyin', text, app_label)
+
+    def describe(self, text, app_label=None):
+        if not text:
+            return None
+        return self._first('describe', text, app_label)
+
+
+def build_chain(config=None):
+    providers = []
+    for entry in config if config is not None else getattr(settings, 'TRANSLATION_PROVIDERS', DEFAULT_PROVIDERS):
+        provider_class = import_string(entry['BACKEND'])
+        providers.append(provider_class(**entry.get('OPTIONS', {})))
+    return TranslationChain(providers)
+
+
+_chain = None
+
+
+def get_translation_chain():
+    global _chain
+    if _chain is None:
+        _chain = build_chain()
+    return _chain
+
+
+@receiver(setting_changed)
+def reset_translation_chain(setting, **kwargs):
+    global _chain
+    if setting in ('TRANSLATION_PROVIDERS', 'AI_STUB_URL'):
+        _chain = None
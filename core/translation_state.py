@@ -0,0 +1,118 @@
+import hashlib
+
+# Mỗi model đa ngôn ngữ lưu trong trường JSON `translation_sources`:
+#   {trường đích: [trường nguồn, hash văn bản nguồn lúc dịch]}  (+ 'manual' nếu người dùng nhập tay)
+# VD: {'name_en': ['name_vi', '3f2a...'], 'name_th': ['name_en', '9c1b...'], 'name_zh_pinyin': ['name_zh', '...']}
+# Văn bản nguồn đổi -> hash lệch -> trường đích "cũ" và được dịch lại; trường khác giữ nguyên, không tốn lời gọi AI.
+# Người dùng sửa tay một trường đích -> ghi nhận là bản dịch của nguồn hiện tại (giữ nguyên tới khi nguồn đổi),
+# đánh dấu 'manual' = bản dịch đã được người duyệt (từ điển dịch chỉ học từ những bản này);
+# trường đích không có mục nào (dữ liệu cũ không xác định được nguồn) không bao giờ bị ghi đè.
+MANUAL = 'manual'
+
+
+def source_hash(text):
+    return hashlib.sha1((text or '').strip().encode('utf-8')).hexdigest()[:12]
+
+
+def root_field(get, prefix, tracked=()):
+    """
+    Trường nguồn gốc của một nhóm (name_vi, nếu trống thì name_zh); None nếu chưa có nguồn.
+    Trường trong `tracked` là bản dịch tự động (VD: name_vi dịch ngược từ name_en) -> không phải nguồn.
+    """
+    candidates = [f"{prefix}_vi", f"{prefix}_zh"]
+    if prefix == 'description':
+        # Mô tả do AI sinh từ tên khi chưa có mô tả nguồn
+        candidates += ['name_en', 'name_vi']
+    return next((field for field in candidates if get(field) and field not in tracked), None)
+
+
+def default_source(get, prefix, field, tracked=()):
+    """Trường mà `field` được dịch từ đó theo chuỗi chuẩn hóa: nguồn -> en -> ngôn ngữ khác, zh -> pinyin."""
+    root = root_field(get, prefix, tracked)
+    if root is None or field == root:
+        return None
+    code = field[len(prefix) + 1:]
+    if code == 'en':
+        return root
+    if code == 'zh_pinyin':
+        return f"{prefix}_zh"
+    return f"{prefix}_en"
+
+
+def _prefix_of(field, prefixes):
+    return next((prefix for prefix in prefixes if field.startswith(f"{prefix}_")), None)
+
+
+# =========================================================
+# TRẠNG THÁI TRÊN INSTANCE
+# =========================================================
+def is_stale(instance, field):
+    entry = getattr(instance, 'translation_sources', None) and instance.translation_sources.get(field)
+    if not entry:
+        return False
+    source, digest = entry[:2]
+    return source_hash(getattr(instance, source, '')) != digest
+
+
+def needs_translation(instance, field, source=None):
+    """
+    Trường đích trống, hoặc là bản dịch tự động mà văn bản nguồn nay đã thay đổi
+    (hoặc nguồn đã chuyển sang trường `source` khác). Bản nhập tay không theo dõi -> không bao giờ ghi đè.
+    """
+    if not getattr(instance, field, ''):
+        return True
+    entry = (getattr(instance, 'translation_sources', None) or {}).get(field)
+    if not entry:
+        return False
+    return (source is not None and entry[0] != source) or is_stale(instance, field)
+
+
+def stale_fields(instance):
+    """{trường đích: trường nguồn} của các bản dịch tự động đã cũ (lưu vào translation_stale để đếm bằng SQL)."""
+    sources = getattr(instance, 'translation_sources', None) or {}
+    return {field: entry[0] for field, entry in sources.items() if is_stale(instance, field)}
+
+
+def is_reviewed(sources, field):
+    """
+    Giá trị do người nhập / duyệt: trường không phải bản dịch tự động (nguồn gốc, dữ liệu không theo dõi)
+    hoặc bản dịch sửa tay. Bản dịch máy chưa ai xem lại -> False.
+    """
+    entry = (sources or {}).get(field)
+    return not entry or (len(entry) > 2 and entry[2] == MANUAL)
+
+
+def mark_translated(instance, field, source, manual=False):
+    if getattr(instance, 'translation_sources', None) is None:
+        return
+    entry = [source, source_hash(getattr(instance, source, ''))]
+    instance.translation_sources[field] = [*entry, MANUAL] if manual else entry
+
+
+def mark_edits(instance, fields, prefixes):
+    """
+    Người dùng sửa trực tiếp: trường nguồn gốc / bị xóa trắng -> bỏ theo dõi;
+    trường đích được nhập tay -> coi là bản dịch mới nhất của nguồn hiện tại.
+    """
+    get = lambda name: getattr(instance, name, '')  # noqa: E731
+    tracked = set(instance.translation_sources) - set(fields)
+    for field in fields:
+        prefix = _prefix_of(field, prefixes)
+        source = default_source(get, prefix, field, tracked) if prefix and get(field) else None
+        if source and get(source):
+            mark_translated(instance, field, source, manual=True)
+        else:
+            instance.translation_sources.pop(field, None)
+
+
+def initial_sources(values, fields, prefixes):
+    """translation_sources cho dữ liệu có sẵn (migration / seed): coi mọi bản dịch hiện có là khớp nguồn."""
+    sources = {}
+    for field in fields:
+        prefix = _prefix_of(field, prefixes)
+        if not prefix or not values.get(field):
+            continue
+        source = default_source(values.get, prefix, field)
+        if source and values.get(source):
+            sources[field] = [source, source_hash(values.get(source))]
+    return sources
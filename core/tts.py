@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Thư mục lưu audio dùng chung: tên tệp = hash(text, voice, language) -> đối tượng trùng nội dung dùng chung tệp
+TTS_CACHE_DIR = 'tts/cache'
+
+# Hậu tố field audio -> mã ngôn ngữ hệ thống
+AUDIO_LANGUAGES = {
+    'vi': 'vi',
+    'en': 'en',
+    'cn': 'zh',
+}
+
+
+# =========================================================
+# 1. ENGINE (Có thể thay thế qua settings.TTS_ENGINE)
+# =========================================================
+class BaseTTSEngine:
+    """
+    Giao diện engine TTS. Engine mới chỉ cần cài đặt synthesize() trả về bytes của tệp audio.
+    """
+    name = 'base'
+    extension = 'wav'
+    default_voices = {}
+
+    def __init__(self, voices=None):
+        self.voices = {**self.default_voices, **(voices or {})}
+
+    def get_voice(self, language):
+        return self.voices.get(language, language)
+
+    def synthesize(self, text, language, voice):
+        raise NotImplementedError
+
+
+class EspeakEngine(BaseTTSEngine):
+    """
+    Engine offline mặc định: espeak-ng (apt install espeak-ng). Không cần mạng.
+    """
+    name = 'espeak-ng'
+    extension = 'wav'
+    default_voices = {'vi': 'vi', 'en': 'en-us', 'zh': 'cmn'}
+
+    def __init__(self, voices=None, binary=None, speed=150):
+        super().__init__(voices)
+        self.binary = binary or shutil.which('espeak-ng') or shutil.which('espeak') or 'espeak-ng'
+        self.speed = speed
+
+    def synthesize(self, text, language, voice):
+        result = subprocess.run(
+            [self.binary, '-v', voice, '-s', str(self.speed), '--stdout', text],
+            capture_output=True, timeout=120, check=True,
+        )
+        return result.stdout
+
+
+def get_tts_engine():
+    engine_class = import_string(getattr(settings, 'TTS_ENGINE', 'core.tts.EspeakEngine'))
+    return engine_class(**getattr(settings, 'TTS_ENGINE_OPTIONS', {}))
+
+
+# =========================================================
+# 2. NGUỒN VĂN BẢN & KHÓA KHỬ TRÙNG LẶP
+# =========================================================
+def get_source_text(obj):
+    """Văn bản gốc để đọc: Tên + Mô tả (bỏ HTML của RichText)."""
+    description = strip_tags(getattr(obj, 'description', '') or '').strip()
+    return f"{obj.name}. {description}" if description else obj.name
+
+
+def audio_cache_key(text, voice, language):
+    return hashlib.sha256(f"{language}\x00{voice}\x00{text}".encode('utf-8')).hexdigest()[:32]
+
+
+def audio_fields_for(model):
+    """Các field audio có trên model: {'vi': 'audio_vi', ...}"""
+    field_names = {f.name for f in model._meta.get_fields()}
+    return {suffix: f"audio_{suffix}" for suffix in AUDIO_LANGUAGES if f"audio_{suffix}" in field_names}
+
+
+# =========================================================
+# 3. SINH AUDIO
+# =========================================================
+# Khóa phân dải theo cache key: hai đối tượng trùng nội dung trong cùng lô không tổng hợp 2 lần.
+# Số khóa cố định -> không phình theo số văn bản đã sinh (hai key khác nhau chung dải chỉ phải chờ nhau)
+KEY_LOCK_STRIPES = 64
+_key_locks = [threading.Lock() for _ in range(KEY_LOCK_STRIPES)]
+
+
+def _lock_for(key):
+    return _key_locks[int(key[:8], 16) % KEY_LOCK_STRIPES]
+
+
+def generate_audio(obj, suffix, engine=None, force=False):
+    """
+    Sinh audio cho một field (VD: suffix='vi' -> audio_vi).
+    Trả về (trạng thái, đường dẫn). Trạng thái: 'unchanged' | 'reused' | 'generated' | 'failed'.
+    Chỉ dịch + tổng hợp khi văn bản nguồn thay đổi (tên tệp chứa hash của văn bản nguồn).
+    """
+    from core.ai_services import translate_plain_text
+
+    engine = engine or get_tts_engine()
+    language = AUDIO_LANGUAGES[suffix]
+    voice = engine.get_voice(language)
+    field_name = f"audio_{suffix}"
+
+    source_text = get_source_text(obj)
+    key = audio_cache_key(source_text, voice, language)
+    path = f"{TTS_CACHE_DIR}/{language}/{key}.{engine.extension}"
+
+    current = getattr(obj, field_name)
+    if not force and current and current.name == path and default_storage.exists(path):
+        return 'unchanged', path
+
+    status = 'reused'
+    with _lock_for(key):
+        if force or not default_storage.exists(path):
+            spoken_text = source_text
+            if language != 'vi':
+                spoken_text = translate_plain_text(source_text, language, obj._meta.app_label)
+                if not spoken_text:
+                    return 'failed', None
+            try:
+                audio = engine.synthesize(spoken_text, language, voice)
+            except Exception as e:
+                logger.error(f"TTS error for {obj.__class__.__name__} {obj.pk} [{suffix}]: {e}")
+                return 'failed', None
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            # Storage có thể đổi tên (get_available_name) -> lưu đúng tên tệp thực sự được ghi
+            path = default_storage.save(path, ContentFile(audio))
+            status = 'generated'
+
+    # update() thay vì save(): không kích hoạt lại signal dịch thuật / chỉ mục tìm kiếm
+    type(obj).objects.filter(pk=obj.pk).update(**{field_name: path})
+    setattr(obj, field_name, path)
+    return status, path
+
+
+def generate_audio_for_object(obj, suffixes=None, engine=None, force=False):
+    engine = engine or get_tts_engine()
+    fields = audio_fields_for(type(obj))
+    return {
+        suffix: generate_audio(obj, suffix, engine=engine, force=force)[0]
+        for suffix in (suffixes or fields) if suffix in fields
+    }
+
+
+def generate_audio_batch(objects, suffixes=None, workers=4, force=False, engine=None):
+    """
+    Sinh audio hàng loạt trong thread pool (engine chạy tiến trình ngoài -> không bị GIL chặn).
+    Trả về Counter theo trạng thái.
+    """
+    from collections import Counter
+    from django.db import close_old_connections
+
+    engine = engine or get_tts_engine()
+    stats = Counter()
+
+    def _job(obj, suffix):
+        try:
+            return generate_audio(obj, suffix, engine=engine, force=force)[0]
+        finally:
+            close_old_connections()
+
+    jobs = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for obj in objects:
+            fields = audio_fields_for(type(obj))
+            for suffix in (suffixes or fields):
+                if suffix in fields:
+                    jobs.append(pool.submit(_job, obj, suffix))
+        for job in jobs:
+            stats[job.result()] += 1
+    return stats
+
+
+# =========================================================
+# 4. TỰ ĐỘNG SINH KHI LƯU (Tùy chọn: settings.TTS_AUTO_GENERATE = True)
+# =========================================================
+def generate_audio_for_object_id(model, pk):
+    obj = model.objects.filter(pk=pk).first()
+    if obj:
+        generate_audio_for_object(obj)
+
+
+def schedule_audio_generation(instance):
+    if not getattr(settings, 'TTS_AUTO_GENERATE', False):
+        return
+    from core.background import run_in_background
+    run_in_background(generate_audio_for_object_id, type(instance), instance.pk)
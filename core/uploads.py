@@ -0,0 +1,245 @@
+import hashlib
+import logging
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+from wagtail.documents import get_document_model
+from wagtail.documents.permissions import permission_policy as document_permission_policy
+
+from .models import ChunkedUpload
+
+logger = logging.getLogger(__name__)
+
+# Kích thước mỗi phần client nên gửi (mỗi request ngắn -> không giữ worker lâu, mất mạng chỉ mất 1 phần)
+DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024
+READ_BLOCK = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class ClaimLost(Exception):
+    """Quyền ghi một phần đã hết hạn và bị request khác giành lại."""
+
+
+def upload_dir():
+    return str(getattr(settings, 'CHUNKED_UPLOAD_DIR', settings.BASE_DIR / 'var' / 'uploads'))
+
+
+def upload_temp_path(upload):
+    return os.path.join(upload_dir(), f"{upload.pk}.part")
+
+
+def chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def max_upload_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024)
+
+
+# =========================================================
+# 1. KHỞI TẠO PHIÊN
+# =========================================================
+def start_upload(user, filename, total_size):
+    filename = os.path.basename(filename or '').strip()
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    allowed = getattr(settings, 'WAGTAILDOCS_EXTENSIONS', None)
+    if not filename or (allowed and extension not in allowed):
+        raise UploadError(f"Định dạng tệp không được phép: {filename or '-'}")
+    if total_size <= 0 or total_size > max_upload_size():
+        raise UploadError("Kích thước tệp không hợp lệ.", status=413)
+
+    upload = ChunkedUpload.objects.create(user=user, filename=filename[:255], total_size=total_size)
+    os.makedirs(upload_dir(), exist_ok=True)
+    open(upload_temp_path(upload), 'wb').close()
+    return upload
+
+
+# =========================================================
+# 2. NHẬN TỪNG PHẦN
+# =========================================================
+def claim_timeout():
+    # Worker chết giữa lúc nhận một phần -> sau khoảng này phiên được nhận tiếp từ offset đã ghi nhận
+    return getattr(settings, 'CHUNKED_UPLOAD_CLAIM_TIMEOUT', 600)
+
+
+def _claim(upload, start):
+    """
+    Giành quyền ghi phần bắt đầu tại 'start' bằng UPDATE có điều kiện TRƯỚC khi chạm vào tệp tạm:
+    hai request trùng offset chạy song song chỉ một request được ghi.
+    Trả về thời điểm giành được (dùng làm mã của lượt ghi) hoặc None.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=claim_timeout())
+    claimed = ChunkedUpload.objects.filter(
+        Q(status='uploading') | Q(status='receiving', updated_at__lt=expired),
+        pk=upload.pk, offset=start,
+    ).update(status='receiving', updated_at=now)
+    return now if claimed else None
+
+
+def _renew(upload, claimed_at):
+    """
+    Gia hạn quyền ghi (phần lớn trên đường truyền chậm có thể kéo dài quá claim_timeout()).
+    Trả về mã mới, hoặc None nếu quyền đã hết hạn và bị request khác giành lại -> phải dừng ghi ngay.
+    """
+    now = timezone.now()
+    renewed = ChunkedUpload.objects.filter(
+        pk=upload.pk, status='receiving', updated_at=claimed_at,
+    ).update(updated_at=now)
+    return now if renewed else None
+
+
+def _release(upload, claimed_at, offset):
+    """
+    Trả quyền ghi và ghi nhận offset mới (không đổi khi phần bị hỏng). Chỉ khi lượt ghi vẫn còn quyền:
+    lượt đã quá hạn và bị request khác giành lại thì không được ghi đè offset của request đó.
+    """
+    ChunkedUpload.objects.filter(pk=upload.pk, status='receiving', updated_at=claimed_at).update(
+        status='uploading', offset=offset, updated_at=timezone.now()
+    )
+    upload.refresh_from_db(fields=['offset', 'status'])
+
+
+def write_chunk(path, start, stream, length, keep_claim=lambda final=False: True):
+    """
+    Ghi tối đa 'length' byte từ stream vào tệp tại 'start' (offset đã ghi nhận). Trả về số byte nhận được.
+    Phần đứt giữa chừng bị cắt bỏ -> tệp không bao giờ ngắn hơn dữ liệu đã ghi nhận trước 'start'.
+    keep_claim() được gọi trước mỗi lần ghi và trước khi cắt tệp: False -> request khác đã nhận phần này,
+    dừng ngay (ClaimLost) và không cắt tệp (không xóa dữ liệu request kia vừa ghi).
+    """
+    received = 0
+    # Không đệm: mỗi khối nằm trên đĩa ngay khi ghi, không bị xả ra sau khi quyền ghi đã mất
+    with open(path, 'r+b', buffering=0) as f:
+        f.seek(start)
+        while received < length:
+            block = stream.read(min(READ_BLOCK, length - received))
+            if not block:
+                break
+            if not keep_claim():
+                raise ClaimLost()
+            f.write(block)
+            received += len(block)
+        if not keep_claim(final=True):
+            raise ClaimLost()
+        # Cắt phần dư (lần gửi trước bị đứt đã ghi lố, hoặc phần này không đủ)
+        f.truncate(start + received if received == length else start)
+    return received
+
+
+def append_chunk(upload, start, stream, length):
+    """
+    Ghi một phần dữ liệu tại vị trí 'start' (phải bằng offset hiện tại của phiên).
+    Đọc trực tiếp từ stream của request theo từng khối -> không nạp cả phần vào RAM.
+    Trả về offset mới.
+    """
+    if upload.status == 'complete':
+        raise UploadError("Phiên tải lên đã kết thúc.", status=409, offset=upload.offset)
+    if length <= 0 or length > chunk_size() or start + length > upload.total_size:
+        raise UploadError("Kích thước phần không hợp lệ.", status=413, offset=upload.offset)
+    claimed_at = _claim(upload, start)
+    if claimed_at is None:
+        # Client gửi lại phần đã nhận / bỏ sót phần / phần này đang được request khác ghi
+        # -> báo offset đúng để tải tiếp
+        upload.refresh_from_db(fields=['offset', 'status'])
+        raise UploadError("Sai vị trí (offset) hoặc phần này đang được nhận.", status=409, offset=upload.offset)
+
+    # Gia hạn quyền ghi định kỳ trong lúc nhận (1/3 thời hạn) và luôn kiểm tra lại trước khi cắt tệp
+    claim = {'at': claimed_at, 'renewed': time.monotonic()}
+
+    def keep_claim(final=False):
+        if not final and time.monotonic() - claim['renewed'] < claim_timeout() / 3:
+            return True
+        claim['at'] = _renew(upload, claim['at'])
+        claim['renewed'] = time.monotonic()
+        return claim['at'] is not None
+
+    received = 0
+    try:
+        received = write_chunk(upload_temp_path(upload), start, stream, length, keep_claim)
+    except ClaimLost:
+        upload.refresh_from_db(fields=['offset', 'status'])
+        raise UploadError("Phần này đã được request khác nhận tiếp.", status=409, offset=upload.offset)
+    finally:
+        if claim['at'] is not None:
+            _release(upload, claim['at'], start + received if received == length else start)
+
+    if received != length:
+        raise UploadError("Kết nối bị ngắt khi đang gửi dữ liệu.", status=400, offset=upload.offset)
+    return upload.offset
+
+
+# =========================================================
+# 3. HOÀN TẤT: BĂM, KHỬ TRÙNG LẶP, TẠO DOCUMENT
+# =========================================================
+def file_sha1(path):
+    # Cùng thuật toán với Document.file_hash của Wagtail -> so khớp trực tiếp với tài liệu đã có
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def complete_upload(upload, title='', collection=None):
+    """
+    Trả về (document, deduplicated). Nếu nội dung đã có trong thư viện thì dùng lại Document cũ.
+    """
+    Document = get_document_model()
+
+    if upload.status == 'complete' and upload.document_id:
+        return upload.document, True
+    if upload.offset != upload.total_size:
+        raise UploadError("Tệp chưa tải lên đủ.", status=409, offset=upload.offset)
+
+    path = upload_temp_path(upload)
+    content_hash = file_sha1(path)
+
+    # Chỉ dùng lại tài liệu người tải lên được phép dùng (chọn / sửa) -> không lộ tài liệu ở collection khác
+    candidates = document_permission_policy.instances_user_has_any_permission_for(upload.user, ['choose', 'change'])
+    document = candidates.filter(file_hash=content_hash).order_by('pk').first()
+    deduplicated = document is not None
+    if document is None:
+        document = Document(
+            title=title or os.path.splitext(upload.filename)[0],
+            uploaded_by_user=upload.user,
+            file_size=upload.total_size,
+            file_hash=content_hash,
+        )
+        if collection is not None:
+            document.collection = collection
+        with open(path, 'rb') as f:
+            document.file = File(f, name=upload.filename)
+            document.save()
+
+    upload.status = 'complete'
+    upload.document = document
+    upload.save(update_fields=['status', 'document', 'updated_at'])
+    remove_temp_file(upload)
+    return document, deduplicated
+
+
+def remove_temp_file(upload):
+    try:
+        os.remove(upload_temp_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def purge_stale_uploads(older_than):
+    """Xóa phiên tải lên dở dang không hoạt động từ trước 'older_than' (datetime). Trả về số phiên."""
+    stale = list(ChunkedUpload.objects.filter(updated_at__lt=older_than))
+    for upload in stale:
+        remove_temp_file(upload)
+    ChunkedUpload.objects.filter(pk__in=[u.pk for u in stale]).delete()
+    return len(stale)
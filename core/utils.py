@@ -1,58 +1,40 @@
 import logging
 from django.utils.translation import get_language
-from django.core.cache import cache
+from core.cache import label_cache
 from core.models import SystemLabel
 
 # Cấu hình Logger
 logger = logging.getLogger(__name__)
 
-MISSING_KEY_SENTINEL = "__MISSING__"
+def _lookup_label(app, key, lang_code):
+    label = SystemLabel.objects.filter(app=app, key=key).first()
+    if not label:
+        return None
+
+    field_name = f"text_{lang_code}"
+    if '-' in lang_code:
+        prefix = lang_code.split('-')[0]
+        field_name = f"text_{prefix}"
+
+    result_text = getattr(label, field_name, "") if hasattr(label, field_name) else ""
+    if not result_text:
+        result_text = label.text_en
+    if not result_text:
+        result_text = label.text_vi
+    return result_text or None
 
 def get_label_text(app, key, default_text=None):
     """
     Hàm helper lấy nhãn (Hỗ trợ các trường ngôn ngữ cụ thể).
+    Đi qua cache hai tầng (core.cache): LRU trong worker -> cache dùng chung -> DB.
     """
-    current_lang = get_language() or 'vi'
-    lang_code = current_lang
-
-    cache_key = f"sys_label_v6_{app}_{key}_{lang_code}"
-    
-    cached_value = cache.get(cache_key)
-    if cached_value is not None:
-        if cached_value == MISSING_KEY_SENTINEL:
-            return default_text or key
-        return cached_value
+    lang_code = get_language() or 'vi'
 
     try:
-        label = SystemLabel.objects.filter(app=app, key=key).first()
-        
-        if label:
-            result_text = ""
-            
-            field_name = f"text_{lang_code}"
-            if '-' in lang_code:
-                prefix = lang_code.split('-')[0]
-                field_name = f"text_{prefix}"
-
-            if hasattr(label, field_name):
-                result_text = getattr(label, field_name)
-            
-            if not result_text:
-                result_text = label.text_en
-            if not result_text:
-                result_text = label.text_vi
-
-            final_val = result_text if result_text else MISSING_KEY_SENTINEL
-            result = result_text if result_text else (default_text or key)
-        else:
-            final_val = MISSING_KEY_SENTINEL
-            result = default_text or key
-        
-        cache.set(cache_key, final_val, 3600)
-        return result
-        
+        result = label_cache.get_or_set(f"{app}:{key}:{lang_code}", lambda: _lookup_label(app, key, lang_code))
     except Exception:
         return default_text or key
+    return result or default_text or key
 
 class DynamicLabelMixin:
     app_name = 'common'
@@ -1,3 +1,255 @@
-from django.shortcuts import render
+import json
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
 
-# Create your views here.
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.views.decorators.http import require_GET, require_POST, require_http_methods
+from wagtail.documents.permissions import permission_policy as document_permission_policy
+from wagtail.documents.views.serve import serve as wagtail_serve_document
+
+from . import metrics, profiling
+from .media import restore_content_length, serve_audio
+from .models import ChunkedUpload
+from .uploads import UploadError, append_chunk, chunk_size, complete_upload, start_upload
+
+# Chỉ phục vụ audio qua view này; tài liệu đi qua view của Wagtail (có kiểm tra quyền riêng tư)
+AUDIO_MEDIA_PREFIXES = ('tts/', 'cas/')
+
+
+@require_http_methods(['GET', 'HEAD'])
+def stream_audio(request, path):
+    """Audio TTS có hỗ trợ Range (tua), ETag và biến thể bitrate thấp (?variant=low / Save-Data)."""
+    # cas/ chứa cả tài liệu -> chỉ nhận tệp audio
+    if not path.startswith(AUDIO_MEDIA_PREFIXES) or not (mimetypes.guess_type(path)[0] or '').startswith('audio/'):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except Exception:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return serve_audio(request, full_path)
+
+
+def serve_document(request, document_id, document_filename):
+    """
+    Bọc view phục vụ tài liệu của Wagtail (giữ nguyên kiểm tra quyền / hook document_served).
+    wagtail.utils.sendfile ghi đè Content-Length bằng kích thước cả tệp -> sửa lại cho 206 / 304 / 416.
+    """
+    return restore_content_length(wagtail_serve_document(request, document_id, document_filename))
+
+
+@require_GET
+def metrics_endpoint(request):
+    """
+    Số liệu Prometheus (cộng gộp mọi worker gunicorn). Chỉ cho phép IP trong METRICS_ALLOWED_IPS,
+    hoặc header "Authorization: Bearer <METRICS_TOKEN>" nếu có đặt METRICS_TOKEN.
+    """
+    if not metrics.enabled():
+        raise Http404
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        if request.headers.get('authorization', '') != f"Bearer {token}":
+            raise PermissionDenied
+    elif request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1']):
+        raise PermissionDenied
+    data, content_type = metrics.render_latest()
+    return HttpResponse(data, content_type=content_type)
+
+
+# =========================================================
+# HỒ SƠ HIỆU NĂNG (?_profile=1, xem core.middleware.ProfilingMiddleware)
+# =========================================================
+def _require_superuser(request):
+    if not request.user.is_superuser:
+        raise PermissionDenied
+
+
+@require_GET
+def profile_list(request):
+    _require_superuser(request)
+    profiles = profiling.list_profiles()
+    for profile in profiles:
+        profile['created_at'] = datetime.fromtimestamp(profile['created'], tz=dt_timezone.utc)
+    return render(request, 'core/admin/profiles.html', {
+        'profiles': profiles,
+        'max_profiles': profiling.max_profiles(),
+    })
+
+
+@require_GET
+def profile_detail(request, profile_id):
+    _require_superuser(request)
+    download = bool(request.GET.get('download'))
+    path = profiling.profile_file(profile_id, download=download)
+    if path is None:
+        raise Http404
+    if download:
+        extension = '.prof' if path.endswith('.raw') else '.html'
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f"{profile_id}{extension}")
+    return FileResponse(open(path, 'rb'), content_type='text/html; charset=utf-8')
+
+
+# =========================================================
+# TẢI LÊN TÀI LIỆU LỚN THEO TỪNG PHẦN (RESUMABLE)
+# =========================================================
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def _require_document_upload(request):
+    if not document_permission_policy.user_has_permission(request.user, 'add'):
+        raise PermissionDenied
+
+
+def _upload_state(upload, **extra):
+    return JsonResponse({
+        'id': str(upload.pk),
+        'filename': upload.filename,
+        'size': upload.total_size,
+        'offset': upload.offset,
+        'status': upload.status,
+        'chunk_size': chunk_size(),
+        **extra,
+    })
+
+
+def _upload_error(error):
+    return JsonResponse({'error': str(error), 'offset': error.offset}, status=error.status)
+
+
+def chunked_upload_page(request):
+    _require_document_upload(request)
+    collections = document_permission_policy.collections_user_has_permission_for(request.user, 'add')
+    return render(request, 'core/admin/chunked_upload.html', {'collections': collections})
+
+
+@require_POST
+def chunked_upload_start(request):
+    """Body JSON: {"filename": ..., "size": ...} -> phiên mới (id, offset=0, chunk_size)."""
+    _require_document_upload(request)
+    try:
+        data = json.loads(request.body or b'{}')
+        upload = start_upload(request.user, data.get('filename'), int(data.get('size') or 0))
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'Dữ liệu không hợp lệ.'}, status=400)
+    except UploadError as e:
+        return _upload_error(e)
+    return _upload_state(upload)
+
+
+@require_GET
+def chunked_upload_status(request, upload_id):
+    """Client gọi lại sau khi mất kết nối để biết cần gửi tiếp từ offset nào."""
+    _require_document_upload(request)
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    return _upload_state(upload)
+
+
+@require_http_methods(['PUT'])
+def chunked_upload_chunk(request, upload_id):
+    """Body: dữ liệu nhị phân của phần; header Content-Range: bytes <start>-<end>/<total>."""
+    _require_document_upload(request)
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    match = CONTENT_RANGE_RE.match(request.headers.get('content-range', ''))
+    if not match or int(match.group(3)) != upload.total_size:
+        return JsonResponse({'error': 'Thiếu hoặc sai header Content-Range.', 'offset': upload.offset}, status=400)
+    start, end = int(match.group(1)), int(match.group(2))
+    try:
+        # Đọc stream của request (không dùng request.body -> không nạp cả phần vào RAM)
+        append_chunk(upload, start, request, end - start + 1)
+    except UploadError as e:
+        return _upload_error(e)
+    return _upload_state(upload)
+
+
+@require_POST
+def chunked_upload_complete(request, upload_id):
+    """Body JSON: {"title": ..., "collection": <id>} -> băm, khử trùng lặp, tạo Document."""
+    _require_document_upload(request)
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        data = {}
+
+    collection = None
+    if data.get('collection'):
+        collections = document_permission_policy.collections_user_has_permission_for(request.user, 'add')
+        collection = collections.filter(pk=data['collection']).first()
+        if collection is None:
+            raise PermissionDenied
+
+    try:
+        document, deduplicated = complete_upload(upload, title=(data.get('title') or '').strip(), collection=collection)
+    except UploadError as e:
+        return _upload_error(e)
+
+    return _upload_state(
+        upload,
+        document={
+            'id': document.pk,
+            'title': document.title,
+            'url': document.url,
+            'edit_url': reverse('wagtaildocs:edit', args=[document.pk]),
+        },
+        deduplicated=deduplicated,
+    )
+
+
+# =========================================================
+# ĐỘ PHỦ BẢN DỊCH (SYSTEM LABEL / DETAIL)
+# =========================================================
+def _coverage_list_url(model_label, **params):
+    from django.apps import apps
+    from urllib.parse import urlencode
+
+    viewset = getattr(apps.get_model(model_label), 'snippet_viewset', None)
+    if viewset is None:
+        return None
+    return f"{reverse(viewset.get_url_name('list'))}?{urlencode(params)}"
+
+
+@require_GET
+def translation_coverage(request):
+    """Bảng đã dịch / trống / cũ theo phân hệ x ngôn ngữ, mỗi ô liên kết tới danh sách đã lọc sẵn."""
+    from .coverage import coverage_cache, coverage_report
+    from .languages import language_registry
+
+    if not request.user.has_perm('core.change_systemlabel'):
+        raise PermissionDenied
+    if request.GET.get('refresh'):
+        coverage_cache.clear()
+
+    report = coverage_report()
+    languages = [lang for lang in map(language_registry.get, report['codes']) if lang]
+    sections = []
+    for entry in report['models']:
+        rows = []
+        for row in entry['rows']:
+            group = {entry['group_field']: row['app']} if entry['group_field'] else {}
+            cells = []
+            for lang in languages:
+                stats = row['languages'].get(lang.code)
+                if stats is None:
+                    cells.append(None)
+                    continue
+                cells.append({
+                    **stats,
+                    'percent': round(100 * stats['filled'] / row['total']) if row['total'] else 100,
+                    'missing_url': _coverage_list_url(entry['model'], missing=lang.code, **group) if stats['empty'] else None,
+                    'stale_url': _coverage_list_url(entry['model'], stale=lang.code, **group) if stats['stale'] else None,
+                })
+            rows.append({'app': row['app'], 'total': row['total'], 'cells': cells})
+        sections.append({'model': entry['model'], 'rows': rows})
+
+    return render(request, 'core/admin/translation_coverage.html', {
+        'languages': languages,
+        'sections': sections,
+    })
@@ -7,13 +7,15 @@ from wagtail import hooks
 from wagtail.admin.menu import MenuItem
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup
+from .filters import TranslationFilterSet
+from .languages import language_registry
 from .models import SystemLabel, SystemLanguage, AIPrompt # Thêm AIPrompt
 
 LANGUAGE_SESSION_KEY = '_language'
 
 # ... (Phần switch_language và DynamicLanguageMenuItem giữ nguyên) ...
 def switch_language(request, lang_code):
-    db_langs = list(SystemLanguage.objects.filter(is_active=True).values_list('code', flat=True))
+    db_langs = language_registry.active_codes()
     valid_codes = list(set(db_langs + ['vi', 'en'])) 
     if lang_code not in valid_codes:
         found = False
@@ -33,7 +35,49 @@ def switch_language(request, lang_code):
 
 @hooks.register('register_admin_urls')
 def register_core_urls():
-    return [path('core/lang/<str:lang_code>/', switch_language, name='core_switch_language')]
+    from . import views
+    return [
+        path('core/lang/<str:lang_code>/', switch_language, name='core_switch_language'),
+        path('core/media/<path:path>', views.stream_audio, name='core_stream_audio'),
+        path('core/uploads/', views.chunked_upload_page, name='core_chunked_upload'),
+        path('core/profiles/', views.profile_list, name='core_profile_list'),
+        path('core/translation-coverage/', views.translation_coverage, name='core_translation_coverage'),
+        path('core/profiles/<str:profile_id>/', views.profile_detail, name='core_profile_detail'),
+        path('core/uploads/start/', views.chunked_upload_start, name='core_chunked_upload_start'),
+        path('core/uploads/<uuid:upload_id>/', views.chunked_upload_status, name='core_chunked_upload_status'),
+        path('core/uploads/<uuid:upload_id>/chunk/', views.chunked_upload_chunk, name='core_chunked_upload_chunk'),
+        path('core/uploads/<uuid:upload_id>/complete/', views.chunked_upload_complete, name='core_chunked_upload_complete'),
+    ]
+
+
+class ChunkedUploadMenuItem(MenuItem):
+    def is_shown(self, request):
+        from wagtail.documents.permissions import permission_policy
+        return permission_policy.user_has_permission(request.user, 'add')
+
+
+@hooks.register('register_admin_menu_item')
+def register_chunked_upload_menu_item():
+    # Ngay dưới menu "Tài liệu" của Wagtail (order 400)
+    return ChunkedUploadMenuItem('Tải tài liệu lớn', reverse('core_chunked_upload'), name='chunked_upload', icon_name='upload', order=401)
+
+class SuperuserMenuItem(MenuItem):
+    def is_shown(self, request):
+        return request.user.is_superuser
+
+
+@hooks.register('register_settings_menu_item')
+def register_profile_menu_item():
+    return SuperuserMenuItem('Hồ sơ hiệu năng', reverse('core_profile_list'), name='performance_profiles', icon_name='time', order=900)
+
+class TranslationCoverageMenuItem(MenuItem):
+    def is_shown(self, request):
+        return request.user.has_perm('core.change_systemlabel')
+
+
+@hooks.register('register_settings_menu_item')
+def register_translation_coverage_menu_item():
+    return TranslationCoverageMenuItem('Độ phủ bản dịch', reverse('core_translation_coverage'), name='translation_coverage', icon_name='globe', order=901)
 
 class DynamicLanguageMenuItem(MenuItem):
     def __init__(self, code, label, flag, order):
@@ -47,9 +91,9 @@ class DynamicLanguageMenuItem(MenuItem):
 
 @hooks.register('construct_main_menu')
 def add_language_menu_items(request, menu_items):
-    try: languages = SystemLanguage.objects.filter(is_active=True).order_by('-is_core', 'code')
+    try: languages = language_registry.active()
     except: return
-    if not languages.exists(): return
+    if not languages: return
     order_counter = 99999
     for lang in languages:
         menu_items.append(DynamicLanguageMenuItem(code=lang.code, label=lang.name, flag=lang.flag, order=order_counter))
@@ -75,13 +119,18 @@ class AIPromptViewSet(SnippetViewSet): # MỚI
     search_fields = ['name', 'content']
     add_to_admin_menu = False
 
+class SystemLabelFilterSet(TranslationFilterSet):
+    class Meta:
+        model = SystemLabel
+        fields = ['app']
+
 class SystemLabelViewSet(SnippetViewSet):
     model = SystemLabel
     icon = 'globe'
     menu_label = 'Nhãn giao diện'
     menu_name = 'system_labels'
     list_display = ['key', 'text_vi', 'text_en', 'app']
-    list_filter = ['app']
+    filterset_class = SystemLabelFilterSet
     search_fields = ['key', 'text_vi', 'text_en']
     ordering = ['app', 'key']
     add_to_admin_menu = False
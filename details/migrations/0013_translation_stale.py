@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('details', '0012_translation_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='detail',
+            name='translation_stale',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Bản dịch cũ'),
+        ),
+    ]
@@ -9,6 +9,7 @@ from wagtail.admin.panels import FieldPanel, MultiFieldPanel
 from wagtail.models import Orderable
 from modelcluster.fields import ParentalKey
 
+from core.models import TranslationTrackingMixin
 from core.utils import get_label_text
 from core.ai_services import auto_translate_model, auto_generate_description_logic
 
@@ -23,7 +24,9 @@ get_label_lazy = lazy(get_label_text, str)
 # =========================================================
 # 1. THƯ VIỆN TÊN THÔNG SỐ (Danh mục dùng chung)
 # =========================================================
-class Detail(models.Model):
+class Detail(TranslationTrackingMixin, models.Model):
+    translated_prefixes = ('name', 'description')
+
     # --- NAME FIELDS (Giữ nguyên) ---
     name_vi = models.CharField(max_length=255, verbose_name=get_label_lazy('details', 'field_name_vi_label', "Tên (Tiếng Việt)"), default="", blank=True, help_text=get_label_lazy('details', 'field_name_vi_help', "Nhập tên tiếng Việt."))
     name_en = models.CharField(max_length=255, blank=True, verbose_name=get_label_lazy('details', 'field_name_en_label', "Tên (Tiếng Anh)"), help_text=get_label_lazy('details', 'field_name_en_help', "Nhập tên tiếng Anh."))
@@ -88,7 +91,9 @@ class Detail(models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
         # Sử dụng on_commit để tránh lock DB khi gọi API
-        transaction.on_commit(lambda: self.trigger_auto_translate())
+        # Chỉ dịch khi tên / mô tả thay đổi (sửa đơn vị không gọi AI)
+        if self.translation_changed:
+            transaction.on_commit(lambda: self.trigger_auto_translate())
 
     def trigger_auto_translate(self):
         """
@@ -97,6 +102,7 @@ class Detail(models.Model):
         try:
             # Refresh để đảm bảo dữ liệu mới nhất
             self.refresh_from_db()
+            baseline = self.translation_baseline()
             
             # 1. Dịch Tên (Name)
             # (Đảm bảo các tên ngôn ngữ khác được điền từ nguồn VI/ZH)
@@ -108,28 +114,22 @@ class Detail(models.Model):
 
             # 3. Dịch Mô tả (Description Translator) - MỚI BỔ SUNG
             # (Chạy để lấp đầy các ngôn ngữ còn lại nếu user nhập tay description hoặc AI vừa sinh ra ở bước 2)
-            # Hàm này thông minh: nếu field đã có dữ liệu (do bước 2 sinh ra hoặc user nhập), nó sẽ bỏ qua, không ghi đè.
+            # Hàm này thông minh: field đã có dữ liệu (do bước 2 sinh ra hoặc user nhập) được giữ nguyên,
+            # trừ bản dịch tự động có văn bản nguồn đã đổi (translation_sources) -> dịch lại.
             auto_translate_model(self, fields=['description'])
             
-            # 4. Gom dữ liệu để update một lần (Atomic Update)
-            update_data = {}
-            
-            # Danh sách tất cả các hậu tố ngôn ngữ
-            suffixes = ['vi', 'en', 'zh', 'zh_pinyin', 'th', 'lo', 'km', 'id', 'ms', 'my', 'fil']
-            
-            # Lấy dữ liệu Name mới
-            for s in suffixes:
-                f = f"name_{s}"
-                if hasattr(self, f) and getattr(self, f): update_data[f] = getattr(self, f)
-            
-            # Lấy dữ liệu Description mới
-            for s in [x for x in suffixes if x != 'zh_pinyin']:
-                f = f"description_{s}"
-                if hasattr(self, f) and getattr(self, f): update_data[f] = getattr(self, f)
-
-            # Thực hiện update trực tiếp (Tránh gọi save() lần nữa gây loop)
-            if update_data:
-                Detail.objects.filter(pk=self.pk).update(**update_data)
+            # 4. Lưu một lần bằng UPDATE có điều kiện theo phiên bản (core.models.TranslationTrackingMixin):
+            # chỉ các trường vừa dịch; người dùng sửa trong lúc chờ API -> trường đó được giữ nguyên (Tránh gọi save() gây loop)
+            if self.save_translations(baseline):
+                # update() không phát signal post_save -> tự cập nhật chỉ mục tìm kiếm + từ điển dịch
+                # (kể cả EquipmentValue có chứa tên thông số, như receiver post_save vẫn làm)
+                from core.translation_providers import glossary
+                from search.indexing import index_object, reindex_queryset, related_queryset
+                from search.suggest import suggestion_index
+                index_object(self)
+                reindex_queryset(related_queryset(self))
+                suggestion_index.update(self)
+                glossary.update(self)
                 
         except Exception as e:
             logger.error(f"Auto translate error for Detail {self.pk}: {e}")
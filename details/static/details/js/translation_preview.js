@@ -0,0 +1,131 @@
+// details/static/details/js/translation_preview.js
+// Xem trước bản dịch trong form Thông số: gửi bản nháp, nhận từng kết quả qua Server-Sent Events
+// (fetch + ReadableStream vì EventSource chỉ hỗ trợ GET), người dùng áp dụng vào form rồi mới Lưu.
+(function () {
+    var FIELD_RE = /^(name|description)_/;
+
+    function init(panel) {
+        // Khối xem trước nằm ngoài form (before_form) -> tìm form qua ô tên thông số
+        var probe = document.querySelector('[name="name_vi"], [name="name_zh"]');
+        var form = probe && probe.form;
+        var startButton = panel.querySelector('[data-preview-start]');
+        var applyButton = panel.querySelector('[data-preview-apply]');
+        var status = panel.querySelector('[data-preview-status]');
+        var table = panel.querySelector('[data-preview-results]');
+        var results = {};
+        var controller = null;
+
+        function fieldInput(name) {
+            return form && form.querySelector('[name="' + name + '"]');
+        }
+
+        function apply(field) {
+            var input = fieldInput(field);
+            if (!input || !results[field]) return;
+            input.value = results[field];
+            input.dispatchEvent(new Event('change', { bubbles: true }));
+            var row = table.querySelector('tr[data-field="' + field + '"]');
+            if (row) row.classList.add('w-opacity-50');
+        }
+
+        function addRow(data) {
+            var row = document.createElement('tr');
+            row.dataset.field = data.field;
+            var label = document.createElement('td');
+            label.textContent = data.field + ' (' + data.elapsed_ms + ' ms)';
+            var value = document.createElement('td');
+            value.textContent = data.value || '—';
+            var action = document.createElement('td');
+            if (data.value && fieldInput(data.field)) {
+                var button = document.createElement('button');
+                button.type = 'button';
+                button.className = 'button button-small button-secondary';
+                button.textContent = '✓';
+                button.addEventListener('click', function () { apply(data.field); });
+                action.appendChild(button);
+            }
+            row.append(label, value, action);
+            table.tBodies[0].appendChild(row);
+        }
+
+        function handleEvent(block) {
+            var event = 'message';
+            var data = '';
+            block.split('\n').forEach(function (line) {
+                if (line.indexOf('event:') === 0) event = line.slice(6).trim();
+                else if (line.indexOf('data:') === 0) data += line.slice(5).trim();
+            });
+            if (!data) return;
+            var payload = JSON.parse(data);
+            if (event === 'translation') {
+                if (payload.value) results[payload.field] = payload.value;
+                addRow(payload);
+                table.hidden = false;
+                applyButton.hidden = Object.keys(results).length === 0;
+            } else if (event === 'done') {
+                status.textContent = (payload.timed_out ? '⚠️ ' : '✅ ') + payload.count + ' / ' + payload.elapsed_ms + ' ms';
+                startButton.disabled = false;
+            }
+        }
+
+        startButton.addEventListener('click', function () {
+            if (!form) return;
+            if (controller) controller.abort();
+            controller = new AbortController();
+            results = {};
+            table.tBodies[0].innerHTML = '';
+            table.hidden = true;
+            applyButton.hidden = true;
+            startButton.disabled = true;
+            status.textContent = '⏳';
+
+            var body = new FormData();
+            new FormData(form).forEach(function (value, key) {
+                if (FIELD_RE.test(key) || key === 'csrfmiddlewaretoken') body.append(key, value);
+            });
+            if (panel.dataset.pk) body.append('pk', panel.dataset.pk);
+
+            fetch(panel.dataset.url, {
+                method: 'POST',
+                body: body,
+                credentials: 'same-origin',
+                signal: controller.signal,
+            })
+                .then(function (res) {
+                    if (!res.ok || !res.body) throw new Error(res.status);
+                    var reader = res.body.getReader();
+                    var decoder = new TextDecoder();
+                    var buffer = '';
+                    function pump() {
+                        return reader.read().then(function (chunk) {
+                            if (chunk.done) return;
+                            buffer += decoder.decode(chunk.value, { stream: true });
+                            var blocks = buffer.split('\n\n');
+                            buffer = blocks.pop();
+                            blocks.forEach(handleEvent);
+                            return pump();
+                        });
+                    }
+                    return pump();
+                })
+                .catch(function (error) {
+                    if (error.name !== 'AbortError') status.textContent = '❌ ' + error.message;
+                })
+                .finally(function () { startButton.disabled = false; });
+        });
+
+        applyButton.addEventListener('click', function () {
+            Object.keys(results).forEach(apply);
+        });
+    }
+
+    function initAll() {
+        document.querySelectorAll('[data-translation-preview]').forEach(init);
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initAll);
+    } else {
+        initAll();
+    }
+})();
@@ -1,4 +1,7 @@
+from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext as _
+from django.views.decorators.http import require_POST
 from wagtail.snippets.views.snippets import (
     IndexView,
     CreateView,
@@ -11,7 +14,7 @@ from wagtail.snippets.views.snippets import (
 
 from .models import Detail, EquipmentValue
 from core.utils import get_label_text, DynamicLabelMixin
-from core.models import SystemLanguage
+from core.languages import language_registry
 
 # =========================================================
 # 1. DETAIL VIEWS (Sử dụng Global Mixin từ Core)
@@ -23,7 +26,7 @@ class DetailIndexView(DynamicLabelMixin, IndexView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Truyền danh sách mã ngôn ngữ đang active vào context (VD: ['vi', 'en', 'zh'])
-        context['active_codes'] = list(SystemLanguage.objects.filter(is_active=True).values_list('code', flat=True))
+        context['active_codes'] = language_registry.active_codes()
         return context
 
 class DetailCreateView(DynamicLabelMixin, CreateView):
@@ -32,7 +35,7 @@ class DetailCreateView(DynamicLabelMixin, CreateView):
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
         # Lấy danh sách ngôn ngữ KHÔNG kích hoạt
-        inactive_codes = list(SystemLanguage.objects.filter(is_active=False).values_list('code', flat=True))
+        inactive_codes = language_registry.inactive_codes()
         
         # Danh sách tất cả các suffix ngôn ngữ có thể có trong model Detail
         # (Không bao gồm vi/en vì là core)
@@ -60,7 +63,7 @@ class DetailEditView(DynamicLabelMixin, EditView):
     # Áp dụng logic ẩn field tương tự CreateView
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
-        inactive_codes = list(SystemLanguage.objects.filter(is_active=False).values_list('code', flat=True))
+        inactive_codes = language_registry.inactive_codes()
         all_suffixes = ['zh', 'th', 'lo', 'km', 'id', 'ms', 'my', 'fil']
         
         for code in all_suffixes:
@@ -88,7 +91,7 @@ class DetailInspectView(InspectView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Truyền active_codes để template Inspect ẩn/hiện các block
-        context['active_codes'] = list(SystemLanguage.objects.filter(is_active=True).values_list('code', flat=True))
+        context['active_codes'] = language_registry.active_codes()
         return context
 
 class DetailUsageView(UsageView):
@@ -113,4 +116,33 @@ class EquipmentValueInspectView(InspectView):
 
 class EquipmentValueCreateView(CreateView): pass
 class EquipmentValueEditView(EditView): pass
-class EquipmentValueDeleteView(DeleteView): pass
\ No newline at end of file
+class EquipmentValueDeleteView(DeleteView): pass
+
+
+# =========================================================
+# 3. XEM TRƯỚC BẢN DỊCH (SERVER-SENT EVENTS)
+# =========================================================
+@require_POST
+def detail_translation_preview(request):
+    """
+    Dịch bản nháp trong form Thông số (chưa lưu) sang mọi ngôn ngữ đang bật, phát từng kết quả khi có
+    (text/event-stream). Body: các trường name_* / description_* của form, 'pk' nếu đang sửa.
+    Người dùng áp dụng kết quả vào form rồi Lưu -> save() ghi nhận nguồn, không dịch lại lần hai.
+    """
+    from core.translation_preview import stream_events, stream_translations
+
+    if not (request.user.has_perm('details.add_detail') or request.user.has_perm('details.change_detail')):
+        raise PermissionDenied
+
+    fields = Detail.translated_field_names()
+    values = {name: request.POST.get(name, '').strip() for name in fields}
+    sources = None
+    if request.POST.get('pk'):
+        sources = Detail.objects.filter(pk=request.POST['pk']).values_list('translation_sources', flat=True).first()
+
+    results = stream_translations(values, Detail.translated_prefixes, app_label='details', sources=sources)
+    response = StreamingHttpResponse(stream_events(results), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Nginx: không đệm response -> kết quả tới trình duyệt ngay
+    response['X-Accel-Buffering'] = 'no'
+    return response
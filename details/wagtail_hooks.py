@@ -1,14 +1,18 @@
+from django.urls import path
 from django.utils.functional import lazy
+from wagtail import hooks
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup
 from .models import Detail, EquipmentValue
+from core.filters import TranslationFilterSet
 from core.utils import get_label_text # Import hàm lấy nhãn từ core
 
 from .views import (
     DetailIndexView, DetailCreateView, DetailEditView, DetailDeleteView,
     DetailInspectView, DetailUsageView, DetailHistoryView,
     EquipmentValueIndexView, EquipmentValueInspectView,
-    EquipmentValueCreateView, EquipmentValueEditView, EquipmentValueDeleteView
+    EquipmentValueCreateView, EquipmentValueEditView, EquipmentValueDeleteView,
+    detail_translation_preview,
 )
 
 # =========================================================
@@ -23,6 +27,12 @@ get_label_lazy = lazy(_get_label_lazy_func, str)
 # =========================================================
 # 1. DETAIL VIEWSET
 # =========================================================
+class DetailFilterSet(TranslationFilterSet):
+    class Meta:
+        model = Detail
+        fields = []
+
+
 class DetailViewSet(SnippetViewSet):
     """
     Quản lý danh mục Tên thông số (Thư viện dùng chung).
@@ -36,6 +46,8 @@ class DetailViewSet(SnippetViewSet):
     # Hiển thị tên Tiếng Việt trong bảng
     list_display = ['name_vi', 'default_unit']
     search_fields = ['name_vi', 'name_en', 'name_zh'] # Tìm kiếm trên nhiều ngôn ngữ
+    # Lọc thiếu bản dịch / bản dịch cũ theo ngôn ngữ (liên kết từ báo cáo độ phủ bản dịch)
+    filterset_class = DetailFilterSet
     
     # --- A. GẮN KẾT CUSTOM VIEW CLASS ---
     index_view_class = DetailIndexView
@@ -95,4 +107,11 @@ class DetailsAppGroup(SnippetViewSetGroup):
     menu_order = 300
     items = (DetailViewSet, EquipmentValueViewSet)
 
-register_snippet(DetailsAppGroup)
\ No newline at end of file
+register_snippet(DetailsAppGroup)
+
+
+@hooks.register('register_admin_urls')
+def register_details_urls():
+    return [
+        path('details/translation-preview/', detail_translation_preview, name='details_translation_preview'),
+    ]
\ No newline at end of file
@@ -17,6 +17,8 @@ from wagtail.fields import RichTextField
 from wagtail.images import get_image_model_string
 from wagtail.documents import get_document_model_string
 
+from core.tts import schedule_audio_generation
+
 
 # =========================================================
 # 1. PHYSICAL EQUIPMENT (Thiết bị Vật lý)
@@ -123,6 +125,11 @@ class Equipment(ClusterableModel, PreviewableMixin, models.Model):
         html = f'<div class="w-flex w-gap-1">{render_dot(bool(self.audio_vi), "VI")}{render_dot(bool(self.audio_en), "EN")}</div>'
         return format_html(html)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Sinh audio TTS ở nền (chỉ khi bật TTS_AUTO_GENERATE và văn bản nguồn đã đổi)
+        schedule_audio_generation(self)
+
     def __str__(self):
         return f"[{self.kks_code}] {self.name}" if self.kks_code else self.name
 
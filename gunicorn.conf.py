@@ -0,0 +1,31 @@
+# gunicorn.conf.py — gunicorn tự nạp tệp này khi chạy từ thư mục dự án (xem CMD trong Dockerfile)
+import os
+import shutil
+from pathlib import Path
+
+# Số liệu Prometheus của từng worker ghi ra tệp trong thư mục này; /metrics cộng gộp lại (core.metrics).
+# Phải đặt trước khi worker import prometheus_client -> đặt ở đây (master) để worker kế thừa.
+PROMETHEUS_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", str(Path(__file__).resolve().parent / "var" / "prometheus")
+)
+
+# Worker dạng thread: mỗi request (kể cả luồng SSE xem trước bản dịch đang chờ API, tải tệp dài)
+# chỉ giữ một thread, không giữ cả process như worker sync mặc định.
+# WEB_CONCURRENCY (số process) gunicorn tự đọc từ môi trường.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+
+def on_starting(server):
+    # Xóa số liệu của lần chạy trước (PID cũ) để bộ đếm không cộng dồn sai
+    shutil.rmtree(PROMETHEUS_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Worker thoát/được thay thế: gỡ các gauge "live" của nó khỏi tổng
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
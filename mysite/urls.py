@@ -6,13 +6,22 @@ from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from core import views as core_views
 from search import views as search_views
 
 urlpatterns = [
     path("django-admin/", admin.site.urls),
     path("admin/", include(wagtailadmin_urls)),
+    # Phục vụ tài liệu có hỗ trợ Range/206 (ghi đè route serve của wagtaildocs, cùng tên URL)
+    path(
+        "documents/<int:document_id>/<str:document_filename>",
+        core_views.serve_document,
+        name="wagtaildocs_serve",
+    ),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    # Prometheus scrape (xem core.metrics)
+    path("metrics", core_views.metrics_endpoint, name="metrics"),
 ]
 
 
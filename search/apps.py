@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "search"
+
+    def ready(self):
+        # Đăng ký signal cập nhật chỉ mục tìm kiếm (Equipment, Area, Detail, EquipmentValue)
+        from . import indexing, suggest, extraction  # noqa: F401
@@ -0,0 +1,180 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from wagtail.documents import get_document_model
+
+from core.background import get_process_pool, run_in_background
+from .extractors import SUPPORTED_EXTENSIONS, extract_pages
+from .indexing import fold_text, remove_objects
+from .models import ExtractedDocument, ExtractedPage, SearchEntry
+
+logger = logging.getLogger(__name__)
+
+Document = get_document_model()
+
+# Mã KKS (VD: 10LAC10, 10LAC10AP001) xuất hiện trong trang -> đưa vào từ khóa để xếp hạng cao
+KKS_RE = re.compile(r'\b\d{1,2}[A-Z]{3}\d{2}(?:[A-Z]{2}\d{3})?\b')
+
+
+def is_supported(document):
+    return os.path.splitext(document.file.name)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+@contextmanager
+def local_file_path(document):
+    """Đường dẫn cục bộ tới tệp (sao chép ra file tạm nếu storage không phải ổ đĩa)."""
+    try:
+        path = document.file.path
+    except (NotImplementedError, AttributeError):
+        path = None
+    if path and os.path.isfile(path):
+        yield path
+        return
+
+    suffix = os.path.splitext(document.file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        with document.file.open('rb') as src:
+            shutil.copyfileobj(src, tmp)
+        tmp.flush()
+        yield tmp.name
+
+
+# =========================================================
+# 1. LƯU KẾT QUẢ & ĐÁNH CHỈ MỤC
+# =========================================================
+def save_pages(extracted, pages):
+    with transaction.atomic():
+        # Trang cũ bị thay bằng pk mới -> gỡ bản ghi chỉ mục của chúng trước (nếu không: kết quả trùng / cũ)
+        remove_objects('page', list(extracted.pages.values_list('pk', flat=True)))
+        extracted.pages.all().delete()
+        ExtractedPage.objects.bulk_create([
+            ExtractedPage(extracted=extracted, page_number=i, text=text)
+            for i, text in enumerate(pages, start=1)
+        ])
+        extracted.status = 'done'
+        extracted.page_count = len(pages)
+        extracted.error = ''
+        extracted.extracted_at = timezone.now()
+        extracted.save()
+
+
+def index_document_pages(extracted):
+    """
+    Đồng bộ các trang đã trích xuất vào chỉ mục tìm kiếm hợp nhất.
+    Kết quả trỏ tới Document đầu tiên còn tồn tại có cùng nội dung, kèm "#page=N".
+    """
+    document = Document.objects.filter(file_hash=extracted.content_hash).order_by('pk').first()
+    page_ids = list(extracted.pages.values_list('pk', flat=True))
+
+    if document is None:
+        for entry in SearchEntry.objects.filter(kind='page', object_id__in=page_ids):
+            entry.delete()
+        return 0
+
+    existing = {e.object_id: e for e in SearchEntry.objects.filter(kind='page', object_id__in=page_ids)}
+    count = 0
+    for page in extracted.pages.all():
+        entry = existing.pop(page.pk, None)
+        if not page.text:
+            if entry:
+                entry.delete()
+            continue
+        entry = entry or SearchEntry(kind='page', object_id=page.pk)
+        entry.title = f"{document.title} - trang {page.page_number}"[:255]
+        entry.subtitle = document.filename[:255]
+        entry.url = f"{document.url}#page={page.page_number}"
+        kks_codes = sorted(set(KKS_RE.findall(page.text)))
+        entry.kks_code = (kks_codes[0] if len(kks_codes) == 1 else '')[:50]
+        entry.title_folded = fold_text(document.title)
+        entry.keywords_folded = fold_text(' '.join(kks_codes))
+        entry.body_folded = fold_text(page.text)
+        entry.save()
+        count += 1
+    return count
+
+
+# =========================================================
+# 2. TRÍCH XUẤT (PIPELINE)
+# =========================================================
+def extract_document(document, force=False):
+    """
+    Trích xuất một Document. Bỏ qua nếu nội dung (hash) đã được trích xuất trước đó.
+    Phần tách chữ chạy trong process pool để không chiếm CPU của worker web.
+    """
+    content_hash = document.get_file_hash()
+    extracted, _created = ExtractedDocument.objects.get_or_create(content_hash=content_hash)
+
+    if extracted.status == 'done' and not force:
+        # Cùng nội dung đã có -> chỉ cần cập nhật liên kết trong chỉ mục
+        index_document_pages(extracted)
+        return extracted
+
+    if not is_supported(document):
+        extracted.status = 'unsupported'
+        extracted.save(update_fields=['status'])
+        return extracted
+
+    try:
+        with local_file_path(document) as path:
+            pages = get_process_pool().submit(extract_pages, path).result()
+    except Exception as e:
+        logger.error(f"Document extraction error for {document.pk}: {e}")
+        extracted.status = 'failed'
+        extracted.error = str(e)[:2000]
+        extracted.save(update_fields=['status', 'error'])
+        return extracted
+
+    save_pages(extracted, pages)
+    index_document_pages(extracted)
+    return extracted
+
+
+def extract_document_by_id(document_id, force=False):
+    document = Document.objects.filter(pk=document_id).first()
+    if document:
+        extract_document(document, force=force)
+
+
+def reindex_content_hash(content_hash):
+    extracted = ExtractedDocument.objects.filter(content_hash=content_hash, status='done').first()
+    if extracted:
+        index_document_pages(extracted)
+
+
+# =========================================================
+# 3. SIGNALS (Trích xuất nền khi tải lên / xóa tài liệu)
+# =========================================================
+@receiver(pre_save, sender=Document)
+def remember_replaced_file_hash(sender, instance, raw=False, **kwargs):
+    # Thay tệp của Document: ghi nhớ hash cũ để gỡ / chuyển các trang của nội dung cũ sau khi lưu
+    if raw or instance.pk is None:
+        return
+    old_hash = sender.objects.filter(pk=instance.pk).values_list('file_hash', flat=True).first()
+    if old_hash and old_hash != instance.file_hash:
+        instance._replaced_file_hash = old_hash
+
+
+@receiver(post_save, sender=Document)
+def extract_on_document_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    replaced_hash = instance.__dict__.pop('_replaced_file_hash', None)
+    if replaced_hash and not raw:
+        # Nội dung cũ không còn Document nào -> các trang bị gỡ khỏi chỉ mục; còn -> trỏ sang Document đó
+        run_in_background(reindex_content_hash, replaced_hash)
+    # get_file_hash()/get_file_size() tự lưu lại metadata -> không kích hoạt trích xuất lần nữa
+    if raw or (update_fields and set(update_fields) <= {'file_hash', 'file_size'}):
+        return
+    run_in_background(extract_document_by_id, instance.pk)
+
+
+@receiver(post_delete, sender=Document)
+def reindex_on_document_delete(sender, instance, **kwargs):
+    if instance.file_hash:
+        run_in_background(reindex_content_hash, instance.file_hash)
@@ -0,0 +1,92 @@
+"""
+Trích xuất văn bản theo trang từ tệp tài liệu.
+Module này KHÔNG import Django để có thể chạy trong process pool (spawn).
+"""
+import os
+import re
+import zipfile
+from xml.etree import ElementTree
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+SPACE_RE = re.compile(r'[ \t\r\f\v]+')
+
+
+def _clean(text):
+    lines = (SPACE_RE.sub(' ', line).strip() for line in (text or '').splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def extract_pdf(path):
+    # Phụ thuộc tùy chọn: pip install pypdf
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(_clean(page.extract_text()))
+        except Exception:
+            # Một trang lỗi (font lạ, ảnh scan) không làm hỏng cả tài liệu
+            pages.append('')
+    return pages
+
+
+def extract_docx(path):
+    """
+    DOCX không lưu số trang cố định: tách trang theo vị trí ngắt trang mà Word đã render
+    (w:lastRenderedPageBreak). Word ghi kèm dấu này ngay sau ngắt trang thủ công (w:br type=page),
+    nên chỉ dùng một loại: w:br chỉ được tính khi tệp không có lastRenderedPageBreak (tệp sinh bằng công cụ khác).
+    """
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read('word/document.xml'))
+
+    rendered = root.find(f'.//{WORD_NS}lastRenderedPageBreak') is not None
+
+    def is_page_break(el):
+        if rendered:
+            return el.tag == f'{WORD_NS}lastRenderedPageBreak'
+        return el.tag == f'{WORD_NS}br' and el.get(f'{WORD_NS}type') == 'page'
+
+    pages, current, paragraph = [], [], []
+    for el in root.iter():
+        if el.tag == f'{WORD_NS}p':
+            if paragraph:
+                current.append(''.join(paragraph))
+            paragraph = []
+        elif el.tag == f'{WORD_NS}t' and el.text:
+            paragraph.append(el.text)
+        elif el.tag == f'{WORD_NS}tab':
+            paragraph.append(' ')
+        elif is_page_break(el):
+            current.append(''.join(paragraph))
+            paragraph = []
+            pages.append(_clean('\n'.join(current)))
+            current = []
+    if paragraph:
+        current.append(''.join(paragraph))
+    pages.append(_clean('\n'.join(current)))
+
+    # Bỏ trang rỗng ở đầu do lastRenderedPageBreak nằm ngay đoạn đầu tiên
+    while len(pages) > 1 and not pages[0]:
+        pages.pop(0)
+    return pages
+
+
+def extract_txt(path):
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        # Ký tự form feed (\f) được dùng làm ngắt trang trong tệp text xuất từ PDF
+        return [_clean(page) for page in f.read().split('\f')]
+
+
+def extract_pages(path):
+    """Trả về danh sách văn bản theo trang (phần tử 0 = trang 1)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.pdf':
+        return extract_pdf(path)
+    if ext == '.docx':
+        return extract_docx(path)
+    if ext == '.txt':
+        return extract_txt(path)
+    raise ValueError(f"Unsupported document type: {ext}")
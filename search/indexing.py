@@ -0,0 +1,272 @@
+import logging
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.html import strip_tags
+
+from area.models import FunctionalLocation
+from equipment.models import Equipment
+from details.models import Detail, EquipmentValue
+from .models import SearchEntry
+
+logger = logging.getLogger(__name__)
+
+# Các hậu tố ngôn ngữ của Detail (khớp với các field name_* / description_*)
+DETAIL_NAME_SUFFIXES = ['vi', 'en', 'zh', 'zh_pinyin', 'th', 'lo', 'km', 'id', 'ms', 'my', 'fil']
+DETAIL_DESC_SUFFIXES = [s for s in DETAIL_NAME_SUFFIXES if s != 'zh_pinyin']
+
+# Khối ký tự CJK (Hán tự) - mỗi chữ được tách thành một token riêng
+CJK_RE = re.compile(r'([㐀-䶿一-鿿豈-﫿])')
+SPACE_RE = re.compile(r'\s+')
+
+
+# =========================================================
+# 1. CHUẨN HÓA VĂN BẢN (TEXT FOLDING)
+# =========================================================
+def fold_text(text):
+    """
+    Chuẩn hóa chuỗi để tìm kiếm không phân biệt dấu:
+    - Bỏ dấu tiếng Việt / Pinyin (ă, ơ, ấ, ā, ǎ... -> a, o, a...), 'đ' -> 'd'.
+    - Tách từng chữ Hán thành token riêng (FTS không tự tách từ tiếng Trung).
+    - Chữ thường, gộp khoảng trắng.
+    Áp dụng cho CẢ nội dung đánh chỉ mục và câu truy vấn.
+    """
+    if not text:
+        return ""
+    text = str(text).lower().replace('đ', 'd')
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+    text = unicodedata.normalize('NFC', text)
+    text = CJK_RE.sub(r' \1 ', text)
+    return SPACE_RE.sub(' ', text).strip()
+
+
+def _join(*parts):
+    return " ".join(str(p) for p in parts if p)
+
+
+# =========================================================
+# 2. XÂY DỰNG BẢN GHI CHO TỪNG LOẠI ĐỐI TƯỢNG
+# =========================================================
+def _detail_names(detail):
+    return [getattr(detail, f"name_{s}", '') for s in DETAIL_NAME_SUFFIXES]
+
+
+def _build_equipment(obj):
+    location_name = obj.location.name if obj.location_id and obj.location else ''
+    return {
+        'title': obj.name,
+        'subtitle': location_name,
+        'kks_code': obj.kks_code or '',
+        'keywords': _join(obj.kks_code, obj.model_number),
+        'body': _join(obj.manufacturer, location_name, strip_tags(obj.description or '')),
+    }
+
+
+def _build_area(obj):
+    return {
+        'title': obj.name,
+        'subtitle': '',
+        'kks_code': obj.kks_code or '',
+        'keywords': obj.kks_code or '',
+        'body': strip_tags(obj.description or ''),
+    }
+
+
+def _build_detail(obj):
+    return {
+        'title': str(obj.name_vi or obj.name_en or obj.name_zh or f"Detail #{obj.pk}"),
+        'subtitle': obj.default_unit or '',
+        'kks_code': '',
+        'keywords': _join(*_detail_names(obj)),
+        'body': _join(*[getattr(obj, f"description_{s}", '') for s in DETAIL_DESC_SUFFIXES]),
+    }
+
+
+def _build_value(obj):
+    detail = obj.detail
+    equipment = obj.equipment
+    unit = obj.unit or detail.default_unit or ''
+    return {
+        'title': f"{detail.name_vi or detail.name_en or detail.name_zh}: {obj.value} {unit}".strip(),
+        'subtitle': str(equipment),
+        'kks_code': equipment.kks_code or '',
+        'keywords': _join(*_detail_names(detail)),
+        'body': _join(obj.value, unit, equipment.name, equipment.kks_code),
+    }
+
+
+# Model -> (kind, builder)
+INDEXED_MODELS = {
+    Equipment: ('equipment', _build_equipment),
+    FunctionalLocation: ('area', _build_area),
+    Detail: ('detail', _build_detail),
+    EquipmentValue: ('value', _build_value),
+}
+
+
+def build_entry(obj):
+    """Trả về SearchEntry (chưa lưu) tương ứng với đối tượng nguồn."""
+    kind, builder = INDEXED_MODELS[type(obj)]
+    data = builder(obj)
+    return SearchEntry(
+        kind=kind,
+        object_id=obj.pk,
+        title=data['title'][:255],
+        subtitle=data['subtitle'][:255],
+        kks_code=data['kks_code'][:50],
+        title_folded=fold_text(data['title']),
+        keywords_folded=fold_text(data['keywords']),
+        body_folded=fold_text(data['body']),
+    )
+
+
+# =========================================================
+# 3. CẬP NHẬT TĂNG DẦN (INCREMENTAL UPDATE)
+# =========================================================
+def index_object(obj):
+    """Thêm mới / cập nhật bản ghi chỉ mục cho một đối tượng."""
+    if type(obj) not in INDEXED_MODELS or obj.pk is None:
+        return
+    entry = build_entry(obj)
+    existing = SearchEntry.objects.filter(kind=entry.kind, object_id=entry.object_id).first()
+    if existing:
+        entry.pk = existing.pk
+    # save() kích hoạt signal của Wagtail search -> backend tự cập nhật chỉ mục FTS
+    entry.save()
+
+
+def remove_object(kind, object_id):
+    for entry in SearchEntry.objects.filter(kind=kind, object_id=object_id):
+        entry.delete()
+
+
+def remove_objects(kind, object_ids, batch_size=1000):
+    """
+    Gỡ bản ghi chỉ mục của nhiều đối tượng đã bị xóa thô (_raw_delete không phát signal post_delete).
+    delete() theo lô -> signal của Wagtail search gỡ luôn khỏi backend FTS. Trả về số đối tượng.
+    """
+    object_ids = list(object_ids)
+    for i in range(0, len(object_ids), batch_size):
+        SearchEntry.objects.filter(kind=kind, object_id__in=object_ids[i:i + batch_size]).delete()
+    return len(object_ids)
+
+
+def _safe_index(obj):
+    try:
+        index_object(obj)
+    except Exception as e:
+        logger.error(f"Search index error for {obj.__class__.__name__} {obj.pk}: {e}")
+
+
+def reindex_queryset(queryset, batch_size=500):
+    """
+    Đánh lại chỉ mục cho cả queryset theo lô: bulk_update bản ghi đã có, bulk_create bản ghi mới,
+    rồi đẩy một lần vào backend tìm kiếm (thay cho save() từng dòng).
+    """
+    from wagtail.search.backends import get_search_backend
+
+    backend = get_search_backend()
+    kind = INDEXED_MODELS[queryset.model][0]
+    fields = ['title', 'subtitle', 'kks_code', 'title_folded', 'keywords_folded', 'body_folded']
+    total = 0
+    batch = []
+
+    def flush(batch):
+        existing = dict(
+            SearchEntry.objects.filter(kind=kind, object_id__in=[entry.object_id for entry in batch])
+            .values_list('object_id', 'pk')
+        )
+        for entry in batch:
+            entry.pk = existing.get(entry.object_id)
+        SearchEntry.objects.bulk_update([e for e in batch if e.pk], fields)
+        created = SearchEntry.objects.bulk_create([e for e in batch if not e.pk])
+        backend.add_bulk(SearchEntry, [e for e in batch if e.pk] + created)
+        return len(batch)
+
+    for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(build_entry(obj))
+        if len(batch) >= batch_size:
+            total += flush(batch)
+            batch = []
+    if batch:
+        total += flush(batch)
+    return total
+
+
+def related_queryset(instance):
+    """Đối tượng phụ thuộc có chứa tên của instance -> cần đánh lại chỉ mục."""
+    if isinstance(instance, Detail):
+        return EquipmentValue.objects.filter(detail=instance).select_related('detail', 'equipment')
+    if isinstance(instance, Equipment):
+        return EquipmentValue.objects.filter(equipment=instance).select_related('detail', 'equipment')
+    if isinstance(instance, FunctionalLocation):
+        return Equipment.objects.filter(location=instance).select_related('location')
+    return None
+
+
+def reindex_related(model, pk):
+    instance = model.objects.filter(pk=pk).first()
+    queryset = related_queryset(instance) if instance else None
+    if queryset is not None:
+        reindex_queryset(queryset)
+
+
+@receiver(post_save)
+def update_search_entry_on_save(sender, instance, raw=False, **kwargs):
+    if raw or sender not in INDEXED_MODELS:
+        return
+
+    # Giống luồng dịch thuật: chỉ đánh chỉ mục SAU KHI transaction lưu dữ liệu hoàn tất
+    transaction.on_commit(lambda: _safe_index(instance))
+    if related_queryset(instance) is not None:
+        # Đối tượng phụ thuộc có thể rất nhiều (Detail dùng chung cho hàng nghìn giá trị) -> chạy nền, theo lô
+        from core.background import run_in_background
+        run_in_background(reindex_related, sender, instance.pk)
+
+
+@receiver(post_delete)
+def remove_search_entry_on_delete(sender, instance, **kwargs):
+    if sender not in INDEXED_MODELS:
+        return
+    kind = INDEXED_MODELS[sender][0]
+    object_id = instance.pk
+    transaction.on_commit(lambda: remove_object(kind, object_id))
+
+
+# =========================================================
+# 4. TRUY VẤN
+# =========================================================
+def search_entries(query, kinds=None, limit=50):
+    """
+    Tìm kiếm có xếp hạng trên chỉ mục hợp nhất.
+    Trả về danh sách SearchEntry (đã sắp xếp theo độ liên quan).
+    """
+    from wagtail.search.backends import get_search_backend
+
+    folded = fold_text(query)
+    if not folded:
+        return []
+
+    queryset = SearchEntry.objects.all()
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+
+    backend = get_search_backend()
+
+    # 1. Tìm toàn văn (khớp nguyên từ trên tiêu đề, từ khóa và nội dung) - có xếp hạng
+    results = list(backend.search(folded, queryset, operator='and')[:limit])
+
+    # 2. Bổ sung kết quả khớp tiền tố (VD: "10lac" -> "10lac10", "bom" -> "bom cap")
+    if len(results) < limit:
+        seen = {entry.pk for entry in results}
+        for entry in backend.autocomplete(folded, queryset, operator='and')[:limit]:
+            if entry.pk not in seen:
+                results.append(entry)
+                seen.add(entry.pk)
+            if len(results) >= limit:
+                break
+    return results
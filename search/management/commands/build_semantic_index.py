@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core.models import SystemLanguage
+from search.semantic import SemanticIndex, iter_documents
+
+
+class Command(BaseCommand):
+    help = "Xây dựng / làm mới chỉ mục ngữ nghĩa TF-IDF (offline) cho phần mô tả, theo từng ngôn ngữ."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--languages',
+            nargs='+',
+            type=str,
+            help='Mã ngôn ngữ cần xử lý (mặc định: tất cả ngôn ngữ đang kích hoạt)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Dựng lại từ đầu (bỏ qua dữ liệu cũ, tính lại toàn bộ từ vựng)'
+        )
+
+    def handle(self, *args, **options):
+        languages = options['languages'] or list(
+            SystemLanguage.objects.filter(is_active=True).values_list('code', flat=True)
+        )
+        self.stdout.write(self.style.WARNING(f"🚀 CHỈ MỤC NGỮ NGHĨA: {', '.join(languages)}\n"))
+
+        for language in languages:
+            stats = SemanticIndex(language).refresh(iter_documents(language), full=options['full'])
+            self.stdout.write(
+                f"   - [{language}] Tổng: {stats['total']} | Thay đổi: {stats['changed']} | Đã xóa: {stats['removed']}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT!"))
@@ -0,0 +1,70 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand
+from wagtail.documents import get_document_model
+
+from search.extraction import index_document_pages, is_supported, local_file_path, save_pages
+from search.extractors import extract_pages
+from search.models import ExtractedDocument
+
+
+class Command(BaseCommand):
+    help = "Trích xuất văn bản theo trang từ tài liệu (PDF/DOCX/TXT) và đưa vào chỉ mục tìm kiếm."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Số tiến trình trích xuất song song')
+        parser.add_argument('--force', action='store_true', help='Trích xuất lại kể cả nội dung đã xử lý')
+
+    def handle(self, *args, **options):
+        Document = get_document_model()
+        force = options['force']
+        stats = {'skipped': 0, 'extracted': 0, 'failed': 0, 'unsupported': 0}
+
+        self.stdout.write(self.style.WARNING("🚀 BẮT ĐẦU TRÍCH XUẤT TÀI LIỆU\n"))
+
+        # 1. Gom theo hash: tài liệu trùng nội dung chỉ trích xuất một lần
+        jobs, seen = {}, set()
+        for document in Document.objects.order_by('pk'):
+            content_hash = document.get_file_hash()
+            if content_hash in seen:
+                continue
+            seen.add(content_hash)
+            extracted, _ = ExtractedDocument.objects.get_or_create(content_hash=content_hash)
+            if extracted.status == 'done' and not force:
+                stats['skipped'] += 1
+                index_document_pages(extracted)
+                continue
+            if not is_supported(document):
+                extracted.status = 'unsupported'
+                extracted.save(update_fields=['status'])
+                stats['unsupported'] += 1
+                continue
+            jobs[content_hash] = (document, extracted)
+
+        # 2. Tách chữ song song; ghi DB tuần tự ở tiến trình chính
+        # local_file_path: storage không phải ổ đĩa -> tệp tạm, giữ tới khi tách chữ xong
+        with ExitStack() as files, ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {
+                pool.submit(extract_pages, files.enter_context(local_file_path(document))): (document, extracted)
+                for document, extracted in jobs.values()
+            }
+            for future in as_completed(futures):
+                document, extracted = futures[future]
+                try:
+                    pages = future.result()
+                except Exception as e:
+                    extracted.status = 'failed'
+                    extracted.error = str(e)[:2000]
+                    extracted.save(update_fields=['status', 'error'])
+                    stats['failed'] += 1
+                    self.stdout.write(self.style.ERROR(f"   ❌ {document.title}: {e}"))
+                    continue
+                save_pages(extracted, pages)
+                indexed = index_document_pages(extracted)
+                stats['extracted'] += 1
+                self.stdout.write(self.style.SUCCESS(f"   + {document.title}: {len(pages)} trang ({indexed} có nội dung)"))
+
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT!"))
+        for key, value in stats.items():
+            self.stdout.write(f"   - {key}: {value}")
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from wagtail.search.backends import get_search_backend
+
+from search.indexing import INDEXED_MODELS, build_entry
+from search.models import SearchEntry
+
+
+class Command(BaseCommand):
+    help = "Xây dựng lại toàn bộ chỉ mục tìm kiếm hợp nhất (Equipment, Area, Detail, EquipmentValue)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Số bản ghi mỗi lô ghi DB')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        backend = get_search_backend()
+
+        self.stdout.write(self.style.WARNING("🚀 BẮT ĐẦU XÂY DỰNG CHỈ MỤC TÌM KIẾM\n"))
+
+        with transaction.atomic():
+            SearchEntry.objects.all().delete()
+
+            for model, (kind, _builder) in INDEXED_MODELS.items():
+                queryset = model.objects.all().order_by('pk')
+                if model.__name__ == 'Equipment':
+                    queryset = queryset.select_related('location')
+                elif model.__name__ == 'EquipmentValue':
+                    queryset = queryset.select_related('detail', 'equipment')
+
+                batch, total = [], 0
+                for obj in queryset.iterator(chunk_size=batch_size):
+                    batch.append(build_entry(obj))
+                    if len(batch) >= batch_size:
+                        total += self._flush(backend, batch)
+                        batch = []
+                if batch:
+                    total += self._flush(backend, batch)
+
+                self.stdout.write(f"   - {kind}: {total}")
+
+        self.stdout.write(self.style.SUCCESS("\n✅ HOÀN TẤT!"))
+
+    def _flush(self, backend, batch):
+        # bulk_create không phát signal -> tự đẩy vào backend tìm kiếm theo lô
+        created = SearchEntry.objects.bulk_create(batch)
+        backend.add_bulk(SearchEntry, created)
+        return len(created)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:32
+
+import modelsearch.index
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('equipment', 'Thiết bị'), ('area', 'Khu vực'), ('detail', 'Danh mục Thông số'), ('value', 'Thông số kỹ thuật')], max_length=20, verbose_name='Loại')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID đối tượng')),
+                ('title', models.CharField(max_length=255, verbose_name='Tiêu đề')),
+                ('subtitle', models.CharField(blank=True, max_length=255, verbose_name='Phụ đề')),
+                ('kks_code', models.CharField(blank=True, db_index=True, max_length=50, verbose_name='Mã KKS')),
+                ('title_folded', models.TextField(blank=True)),
+                ('keywords_folded', models.TextField(blank=True)),
+                ('body_folded', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Chỉ mục tìm kiếm',
+                'verbose_name_plural': 'Chỉ mục tìm kiếm',
+                'unique_together': {('kind', 'object_id')},
+            },
+            bases=(modelsearch.index.Indexed, models.Model),
+        ),
+    ]
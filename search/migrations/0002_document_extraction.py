@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='Hash nội dung')),
+                ('status', models.CharField(choices=[('pending', 'Đang chờ'), ('done', 'Hoàn tất'), ('failed', 'Lỗi'), ('unsupported', 'Không hỗ trợ')], default='pending', max_length=20, verbose_name='Trạng thái')),
+                ('page_count', models.PositiveIntegerField(default=0, verbose_name='Số trang')),
+                ('error', models.TextField(blank=True, verbose_name='Lỗi')),
+                ('extracted_at', models.DateTimeField(blank=True, null=True, verbose_name='Thời điểm trích xuất')),
+            ],
+            options={
+                'verbose_name': 'Nội dung tài liệu',
+                'verbose_name_plural': 'Nội dung tài liệu',
+            },
+        ),
+        migrations.AddField(
+            model_name='searchentry',
+            name='url',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AlterField(
+            model_name='searchentry',
+            name='kind',
+            field=models.CharField(choices=[('equipment', 'Thiết bị'), ('area', 'Khu vực'), ('detail', 'Danh mục Thông số'), ('value', 'Thông số kỹ thuật'), ('page', 'Trang tài liệu')], max_length=20, verbose_name='Loại'),
+        ),
+        migrations.CreateModel(
+            name='ExtractedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField(verbose_name='Trang')),
+                ('text', models.TextField(blank=True, verbose_name='Nội dung')),
+                ('extracted', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='search.extracteddocument')),
+            ],
+            options={
+                'verbose_name': 'Trang tài liệu',
+                'verbose_name_plural': 'Trang tài liệu',
+                'ordering': ['extracted', 'page_number'],
+                'unique_together': {('extracted', 'page_number')},
+            },
+        ),
+    ]
@@ -0,0 +1,116 @@
+from django.db import models
+from django.urls import reverse, NoReverseMatch
+from django.utils.translation import gettext_lazy as _
+from wagtail.search import index
+
+
+# =========================================================
+# CHỈ MỤC TÌM KIẾM HỢP NHẤT (UNIFIED SEARCH ENTRY)
+# =========================================================
+class SearchEntry(index.Indexed, models.Model):
+    """
+    Bản ghi phi chuẩn hóa (denormalized) cho một đối tượng cần tìm kiếm.
+    Nội dung đã được "gấp" (bỏ dấu tiếng Việt, tách chữ Hán; Pinyin lấy từ các trường *_zh_pinyin có sẵn)
+    để backend tìm kiếm của Wagtail xếp hạng mà không phân biệt dấu.
+    """
+    KIND_CHOICES = [
+        ('equipment', _('Thiết bị')),
+        ('area', _('Khu vực')),
+        ('detail', _('Danh mục Thông số')),
+        ('value', _('Thông số kỹ thuật')),
+        ('page', _('Trang tài liệu')),
+    ]
+
+    # Tên route Inspect của từng loại đối tượng (Wagtail Snippet)
+    ADMIN_URL_NAMES = {
+        'equipment': 'wagtailsnippets_equipment_equipment:inspect',
+        'area': 'wagtailsnippets_area_functionallocation:inspect',
+        'detail': 'wagtailsnippets_details_detail:inspect',
+        'value': 'wagtailsnippets_details_equipmentvalue:inspect',
+    }
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name=_("Loại"))
+    object_id = models.PositiveBigIntegerField(verbose_name=_("ID đối tượng"))
+
+    # Dữ liệu hiển thị (giữ nguyên dấu)
+    title = models.CharField(max_length=255, verbose_name=_("Tiêu đề"))
+    subtitle = models.CharField(max_length=255, blank=True, verbose_name=_("Phụ đề"))
+    kks_code = models.CharField(max_length=50, blank=True, db_index=True, verbose_name=_("Mã KKS"))
+    # Đường dẫn cố định (VD: trang tài liệu "…/manual.pdf#page=12"); để trống -> dùng route Inspect
+    url = models.CharField(max_length=500, blank=True)
+
+    # Dữ liệu đã chuẩn hóa để đánh chỉ mục
+    title_folded = models.TextField(blank=True)
+    keywords_folded = models.TextField(blank=True)
+    body_folded = models.TextField(blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    search_fields = [
+        index.SearchField('keywords_folded', boost=5),
+        index.SearchField('title_folded', boost=3),
+        index.SearchField('body_folded'),
+        index.AutocompleteField('title_folded'),
+        index.AutocompleteField('keywords_folded'),
+        index.FilterField('kind'),
+    ]
+
+    def get_admin_url(self):
+        if self.url:
+            return self.url
+        try:
+            return reverse(self.ADMIN_URL_NAMES[self.kind], args=[self.object_id])
+        except (KeyError, NoReverseMatch):
+            return ""
+
+    def __str__(self):
+        return f"[{self.kind}] {self.title}"
+
+    class Meta:
+        verbose_name = _("Chỉ mục tìm kiếm")
+        verbose_name_plural = _("Chỉ mục tìm kiếm")
+        unique_together = ('kind', 'object_id')
+
+
+# =========================================================
+# NỘI DUNG TRÍCH XUẤT TỪ TÀI LIỆU (MANUAL / P&ID)
+# =========================================================
+class ExtractedDocument(models.Model):
+    """
+    Kết quả trích xuất văn bản của MỘT nội dung tệp (theo hash).
+    Nhiều Document trùng nội dung (tải lên lại, cùng manual cho nhiều bơm) dùng chung một bản ghi.
+    """
+    STATUS_CHOICES = [
+        ('pending', _('Đang chờ')),
+        ('done', _('Hoàn tất')),
+        ('failed', _('Lỗi')),
+        ('unsupported', _('Không hỗ trợ')),
+    ]
+
+    content_hash = models.CharField(max_length=64, unique=True, verbose_name=_("Hash nội dung"))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name=_("Trạng thái"))
+    page_count = models.PositiveIntegerField(default=0, verbose_name=_("Số trang"))
+    error = models.TextField(blank=True, verbose_name=_("Lỗi"))
+    extracted_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Thời điểm trích xuất"))
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = _("Nội dung tài liệu")
+        verbose_name_plural = _("Nội dung tài liệu")
+
+
+class ExtractedPage(models.Model):
+    extracted = models.ForeignKey(ExtractedDocument, on_delete=models.CASCADE, related_name='pages')
+    page_number = models.PositiveIntegerField(verbose_name=_("Trang"))
+    text = models.TextField(blank=True, verbose_name=_("Nội dung"))
+
+    def __str__(self):
+        return f"{self.extracted.content_hash[:12]} - p.{self.page_number}"
+
+    class Meta:
+        verbose_name = _("Trang tài liệu")
+        verbose_name_plural = _("Trang tài liệu")
+        ordering = ['extracted', 'page_number']
+        unique_together = ('extracted', 'page_number')
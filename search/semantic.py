@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.utils.html import strip_tags
+
+from area.models import FunctionalLocation
+from equipment.models import Equipment
+from details.models import Detail
+from .indexing import fold_text
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'\w+')
+
+# Từ dừng phổ biến (đã bỏ dấu) - loại khỏi vector vì không mang nghĩa
+STOPWORDS = {
+    # Tiếng Việt
+    'va', 'cua', 'cho', 'la', 'cac', 'nhung', 'mot', 'duoc', 'trong', 'khi', 'de', 'voi', 'tu', 'co', 'nay', 'thi',
+    'gi', 'nao', 'bi',
+    # Tiếng Anh
+    'the', 'a', 'an', 'of', 'and', 'or', 'to', 'in', 'on', 'for', 'is', 'are', 'be', 'by', 'with', 'from', 'what',
+    'which', 'that', 'this', 'it', 'as', 'at', 'how', 'does', 'do',
+}
+
+# Mô tả Thiết bị / Khu vực là RichText một ngôn ngữ -> gộp vào chỉ mục của ngôn ngữ nguồn
+DEFAULT_SOURCE_LANGUAGE = 'vi'
+
+
+def get_index_root():
+    return Path(getattr(settings, 'SEARCH_SEMANTIC_DIR', settings.BASE_DIR / 'var' / 'semantic'))
+
+
+# =========================================================
+# 1. TÁCH TỪ (TOKENIZER)
+# =========================================================
+def tokenize(text):
+    """
+    Token = âm tiết/từ đã bỏ dấu + cặp từ liền kề (bigram).
+    Tiếng Việt là ngôn ngữ đơn âm tiết ("bom cap nuoc") nên bigram giữ lại nghĩa của từ ghép;
+    với tiếng Trung, fold_text đã tách từng chữ Hán -> bigram tương đương từ hai chữ.
+    """
+    words = [w for w in WORD_RE.findall(fold_text(text)) if w not in STOPWORDS]
+    tokens = list(words)
+    tokens.extend(f"{a}_{b}" for a, b in zip(words, words[1:]))
+    return tokens
+
+
+def _text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+# =========================================================
+# 2. NGUỒN TÀI LIỆU THEO NGÔN NGỮ
+# =========================================================
+def iter_documents(language):
+    """Sinh (kind, object_id, text) cho một ngôn ngữ."""
+    source_language = getattr(settings, 'SEARCH_SEMANTIC_SOURCE_LANGUAGE', DEFAULT_SOURCE_LANGUAGE)
+    if language == source_language:
+        for obj in Equipment.objects.only('pk', 'name', 'description').iterator(chunk_size=2000):
+            text = strip_tags(obj.description or '')
+            if text.strip():
+                yield 'equipment', obj.pk, f"{obj.name}. {text}"
+        for obj in FunctionalLocation.objects.only('pk', 'name', 'description').iterator(chunk_size=2000):
+            text = strip_tags(obj.description or '')
+            if text.strip():
+                yield 'area', obj.pk, f"{obj.name}. {text}"
+
+    name_field, desc_field = f"name_{language}", f"description_{language}"
+    if hasattr(Detail, desc_field):
+        for obj in Detail.objects.only('pk', name_field, desc_field).iterator(chunk_size=2000):
+            text = getattr(obj, desc_field) or ''
+            if text.strip():
+                yield 'detail', obj.pk, f"{getattr(obj, name_field) or ''}. {text}"
+
+
+# =========================================================
+# 3. CHỈ MỤC TF-IDF TRÊN ĐĨA (MEMORY-MAPPED)
+# =========================================================
+class SemanticIndex:
+    """
+    Chỉ mục TF-IDF thưa của một ngôn ngữ, lưu dạng mảng NumPy:
+    - doc_*  : CSR theo tài liệu (tf thô, chưa nhân IDF) -> dùng lại khi làm mới tăng dần.
+    - post_* : CSC theo từ (trọng số tf-idf đã chuẩn hóa L2) -> dùng khi truy vấn.
+    Các mảng được mở bằng mmap nên nhiều worker dùng chung page cache của hệ điều hành.
+    """
+
+    ARRAYS = ('doc_indptr', 'doc_terms', 'doc_tf', 'post_indptr', 'post_docs', 'post_weights', 'idf')
+
+    def __init__(self, language, root=None):
+        self.language = language
+        self.path = Path(root or get_index_root()) / language
+        self.meta = {'docs': [], 'vocab': {}}
+        self.arrays = {}
+        self._mtime = None
+
+    # --- Đọc ---
+    def load(self, mmap=True):
+        meta_file = self.path / 'meta.json'
+        if not meta_file.exists():
+            return False
+        mtime = meta_file.stat().st_mtime
+        if mtime == self._mtime:
+            return True
+        with open(meta_file, encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.arrays = {
+            name: np.load(self.path / f"{name}.npy", mmap_mode='r' if mmap else None)
+            for name in self.ARRAYS
+        }
+        self._mtime = mtime
+        return True
+
+    # --- Ghi ---
+    def _save(self, meta, arrays):
+        self.path.mkdir(parents=True, exist_ok=True)
+        for name, array in arrays.items():
+            tmp = self.path / f"{name}.tmp.npy"
+            np.save(tmp, array)
+            os.replace(tmp, self.path / f"{name}.npy")
+        # meta.json ghi sau cùng -> tiến trình đọc chỉ nạp lại khi mọi mảng đã sẵn sàng
+        tmp = self.path / 'meta.tmp.json'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, self.path / 'meta.json')
+
+    def refresh(self, documents, full=False):
+        """
+        Làm mới chỉ mục: chỉ tách từ lại các tài liệu có nội dung thay đổi (so sánh hash).
+        Trả về dict thống kê {'total', 'changed', 'removed'}.
+        """
+        old_rows = {}
+        vocab = {}
+        if not full and self.load(mmap=False):
+            vocab = dict(self.meta['vocab'])
+            indptr, terms, tf = (self.arrays[n] for n in ('doc_indptr', 'doc_terms', 'doc_tf'))
+            for i, (kind, object_id, doc_hash) in enumerate(self.meta['docs']):
+                s, e = indptr[i], indptr[i + 1]
+                old_rows[(kind, object_id)] = (doc_hash, terms[s:e], tf[s:e])
+
+        docs, rows_terms, rows_tf = [], [], []
+        changed = 0
+        for kind, object_id, text in documents:
+            doc_hash = _text_hash(text)
+            previous = old_rows.pop((kind, object_id), None)
+            if previous and previous[0] == doc_hash:
+                row_terms, row_tf = previous[1], previous[2]
+            else:
+                changed += 1
+                counts = Counter(tokenize(text))
+                row_terms = np.fromiter(
+                    (vocab.setdefault(t, len(vocab)) for t in counts), dtype=np.int32, count=len(counts)
+                )
+                # TF tuyến tính con (sublinear): 1 + log(tf)
+                row_tf = np.fromiter(
+                    (1.0 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts)
+                )
+            docs.append([kind, object_id, doc_hash])
+            rows_terms.append(np.asarray(row_terms, dtype=np.int32))
+            rows_tf.append(np.asarray(row_tf, dtype=np.float32))
+
+        removed = len(old_rows)
+        if not changed and not removed and not full and self.meta['docs']:
+            return {'total': len(docs), 'changed': 0, 'removed': 0}
+
+        n_docs, n_terms = len(docs), len(vocab)
+        lengths = np.fromiter((len(r) for r in rows_terms), dtype=np.int64, count=n_docs)
+        doc_indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(lengths, out=doc_indptr[1:])
+        doc_terms = np.concatenate(rows_terms) if n_docs else np.zeros(0, dtype=np.int32)
+        doc_tf = np.concatenate(rows_tf) if n_docs else np.zeros(0, dtype=np.float32)
+
+        # IDF làm mịn: log((1 + N) / (1 + df)) + 1
+        df = np.bincount(doc_terms, minlength=n_terms).astype(np.float32)
+        idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+
+        # Trọng số tf-idf + chuẩn hóa L2 theo từng tài liệu
+        doc_ids = np.repeat(np.arange(n_docs, dtype=np.int32), lengths)
+        weights = doc_tf * idf[doc_terms]
+        norms = np.sqrt(np.bincount(doc_ids, weights=weights * weights, minlength=n_docs)).astype(np.float32)
+        norms[norms == 0] = 1.0
+        weights = weights / norms[doc_ids]
+
+        # Chuyển CSR -> CSC (danh sách tài liệu theo từng từ) để truy vấn
+        order = np.argsort(doc_terms, kind='stable')
+        post_docs = doc_ids[order]
+        post_weights = weights[order].astype(np.float32)
+        post_indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(doc_terms, minlength=n_terms), out=post_indptr[1:])
+
+        self._save(
+            {'docs': docs, 'vocab': vocab},
+            {
+                'doc_indptr': doc_indptr, 'doc_terms': doc_terms, 'doc_tf': doc_tf,
+                'post_indptr': post_indptr, 'post_docs': post_docs, 'post_weights': post_weights,
+                'idf': idf,
+            },
+        )
+        self._mtime = None
+        return {'total': n_docs, 'changed': changed, 'removed': removed}
+
+    # --- Truy vấn ---
+    def query(self, text, top_k=10):
+        """Trả về [(kind, object_id, score), ...] theo độ tương đồng cosine giảm dần."""
+        if not self.load():
+            return []
+        vocab = self.meta['vocab']
+        counts = Counter(t for t in tokenize(text) if t in vocab)
+        if not counts:
+            return []
+
+        post_indptr, post_docs, post_weights, idf = (
+            self.arrays[n] for n in ('post_indptr', 'post_docs', 'post_weights', 'idf')
+        )
+        term_ids = [vocab[t] for t in counts]
+        q_weights = np.array([(1.0 + math.log(c)) for c in counts.values()], dtype=np.float32) * idf[term_ids]
+        q_weights /= np.linalg.norm(q_weights) or 1.0
+
+        scores = np.zeros(len(self.meta['docs']), dtype=np.float32)
+        for term_id, q_w in zip(term_ids, q_weights):
+            s, e = post_indptr[term_id], post_indptr[term_id + 1]
+            # Mỗi tài liệu xuất hiện tối đa một lần trong danh sách của một từ -> cộng trực tiếp
+            scores[post_docs[s:e]] += q_w * post_weights[s:e]
+
+        k = min(top_k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        docs = self.meta['docs']
+        return [(docs[i][0], docs[i][1], float(scores[i])) for i in top]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_semantic_index(language):
+    with _indexes_lock:
+        if language not in _indexes:
+            _indexes[language] = SemanticIndex(language)
+        return _indexes[language]
+
+
+def semantic_search(query, language=None, top_k=10):
+    language = (language or DEFAULT_SOURCE_LANGUAGE).split('-')[0]
+    try:
+        return get_semantic_index(language).query(query, top_k=top_k)
+    except Exception as e:
+        logger.error(f"Semantic search error ({language}): {e}")
+        return []
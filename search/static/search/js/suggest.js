@@ -0,0 +1,68 @@
+// search/static/search/js/suggest.js
+// Gợi ý tức thời (typeahead) cho ô tìm kiếm trong Admin.
+// Dùng <datalist> gốc của trình duyệt -> không cần thư viện ngoài, nhẹ cho máy tính bảng.
+(function () {
+    var script = document.currentScript;
+    var suggestUrl = script && script.dataset.suggestUrl;
+    if (!suggestUrl) return;
+
+    var DEBOUNCE_MS = 120;
+    var MIN_CHARS = 2;
+    var cache = {};
+
+    function attach(input, index) {
+        if (input.dataset.suggestBound) return;
+        input.dataset.suggestBound = '1';
+
+        var list = document.createElement('datalist');
+        list.id = 'search-suggest-' + index;
+        document.body.appendChild(list);
+        input.setAttribute('list', list.id);
+        input.setAttribute('autocomplete', 'off');
+
+        var timer = null;
+        var controller = null;
+
+        function render(rows) {
+            list.innerHTML = '';
+            rows.forEach(function (row) {
+                var option = document.createElement('option');
+                option.value = row[0];
+                if (row[1]) option.label = row[1];
+                list.appendChild(option);
+            });
+        }
+
+        input.addEventListener('input', function () {
+            var q = input.value.trim();
+            clearTimeout(timer);
+            if (q.length < MIN_CHARS) return render([]);
+            if (cache[q]) return render(cache[q]);
+
+            timer = setTimeout(function () {
+                if (controller) controller.abort();
+                controller = new AbortController();
+                fetch(suggestUrl + '?q=' + encodeURIComponent(q), {
+                    credentials: 'same-origin',
+                    signal: controller.signal,
+                })
+                    .then(function (res) { return res.ok ? res.json() : { r: [] }; })
+                    .then(function (data) {
+                        cache[q] = data.r;
+                        if (input.value.trim() === q) render(data.r);
+                    })
+                    .catch(function () {});
+            }, DEBOUNCE_MS);
+        });
+    }
+
+    function bindAll() {
+        document.querySelectorAll('form[data-w-swap-src-value] input[name="q"], input#id_q').forEach(attach);
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', bindAll);
+    } else {
+        bindAll();
+    }
+})();
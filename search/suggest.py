@@ -0,0 +1,265 @@
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from area.models import FunctionalLocation
+from equipment.models import Equipment
+from details.models import Detail
+from core.cache import ChangeLog, suggest_cache
+from core.models import SystemLanguage
+from .indexing import fold_text
+
+# Giới hạn bộ nhớ: số khóa tối đa trong mảng gợi ý (mỗi khóa ~200 byte)
+DEFAULT_MAX_ENTRIES = 200_000
+# Sau khoảng thời gian này, worker tự dựng lại toàn bộ (lưới an toàn nếu nhật ký thay đổi bị mất)
+DEFAULT_TTL = 600
+# Chu kỳ (giây) hỏi nhật ký thay đổi chung để áp dụng thay đổi từ worker khác
+DEFAULT_POLL_INTERVAL = 5
+# Worker tụt lại quá số thay đổi này (hoặc nhật ký đã hết hạn) -> dựng lại toàn bộ thay vì áp dụng từng cái
+MAX_CATCH_UP = 1000
+# Mục nhật ký đặc biệt: dựng lại toàn bộ (VD: danh sách ngôn ngữ thay đổi)
+REBUILD = '*'
+# Chỉ tạo khóa cho tối đa N vị trí bắt đầu từ trong một cụm tên (VD: "bom cap nuoc" -> "cap nuoc", "nuoc")
+MAX_WORD_OFFSETS = 4
+
+SUGGEST_MODELS = {
+    Equipment: 'equipment',
+    FunctionalLocation: 'area',
+    Detail: 'detail',
+}
+
+
+# =========================================================
+# 1. MẢNG GỢI Ý ĐÃ SẮP XẾP (SORTED PREFIX ARRAY)
+# =========================================================
+class SuggestionIndex:
+    """
+    Chỉ mục gợi ý trong bộ nhớ tiến trình.
+    - keys: danh sách khóa đã chuẩn hóa, luôn được giữ sắp xếp -> tìm tiền tố bằng bisect (O(log n)).
+    - Mỗi khóa có dạng "<folded text>\\x00<kind>:<id>" để khóa trùng nội dung vẫn phân biệt.
+    - shared_cache (core.cache.TwoTierCache): cache kết quả gợi ý + nhật ký thay đổi dùng chung
+      (số thứ tự tăng dần -> "<kind>:<id>"). Worker khác áp dụng từng thay đổi (đọc lại đúng đối tượng đó)
+      thay vì dựng lại toàn bộ mảng sau mỗi lần lưu.
+    """
+
+    def __init__(self, max_entries=None, ttl=None, shared_cache=None, poll_interval=None):
+        self.max_entries = max_entries or getattr(settings, 'SEARCH_SUGGEST_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        self.ttl = ttl or getattr(settings, 'SEARCH_SUGGEST_TTL', DEFAULT_TTL)
+        self.poll_interval = (
+            poll_interval if poll_interval is not None
+            else getattr(settings, 'SEARCH_SUGGEST_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+        )
+        self.shared_cache = shared_cache
+        self.changes = (
+            ChangeLog(f"{shared_cache.namespace}:changes", timeout=self.ttl * 2, max_catch_up=MAX_CATCH_UP)
+            if shared_cache is not None else None
+        )
+        self._seq = None         # Thay đổi cuối cùng trong nhật ký chung đã có trong mảng
+        self._polled_at = None
+        self._lock = threading.RLock()
+        self._keys = []
+        self._payloads = {}      # "<kind>:<id>" -> (display, kks, kind, id)
+        self._owned_keys = {}    # "<kind>:<id>" -> [keys...] (để gỡ khi cập nhật/xóa)
+        self._built_at = None
+
+    # --- Xây dựng ---
+    def _terms_for(self, obj, languages):
+        if isinstance(obj, Detail):
+            names = [getattr(obj, f"name_{code}", '') for code in languages]
+            if 'zh' in languages:
+                names.append(obj.name_zh_pinyin)
+            display = obj.name_vi or obj.name_en or obj.name_zh or f"Detail #{obj.pk}"
+            return display, '', [n for n in names if n]
+        return obj.name, obj.kks_code or '', [obj.name, obj.kks_code]
+
+    def _make_keys(self, ref, terms):
+        keys = set()
+        for term in terms:
+            words = fold_text(term).split(' ')
+            for offset in range(min(len(words), MAX_WORD_OFFSETS)):
+                phrase = ' '.join(words[offset:])
+                if phrase:
+                    keys.add(f"{phrase}\x00{ref}")
+        return keys
+
+    def _add(self, obj, kind, languages):
+        ref = f"{kind}:{obj.pk}"
+        display, kks, terms = self._terms_for(obj, languages)
+        keys = self._make_keys(ref, [t for t in terms if t])
+        if len(self._keys) + len(keys) > self.max_entries:
+            return False
+        self._payloads[ref] = (str(display), kks, kind, obj.pk)
+        self._owned_keys[ref] = list(keys)
+        for key in keys:
+            bisect.insort(self._keys, key)
+        return True
+
+    def _remove(self, ref):
+        for key in self._owned_keys.pop(ref, []):
+            i = bisect.bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+        self._payloads.pop(ref, None)
+
+    def _active_languages(self):
+        from core.languages import language_registry
+        return language_registry.active_codes()
+
+    def _sources(self):
+        return {
+            'equipment': Equipment.objects.only('pk', 'name', 'kks_code'),
+            'area': FunctionalLocation.objects.only('pk', 'name', 'kks_code'),
+            'detail': Detail.objects.all(),
+        }
+
+    def rebuild(self):
+        # Đọc số thứ tự TRƯỚC khi nạp: thay đổi xảy ra trong lúc dựng sẽ được áp dụng lại ở lần hỏi sau
+        seq = self.changes.current() if self.changes else None
+        languages = self._active_languages()
+        keys, payloads, owned = [], {}, {}
+        for kind, queryset in self._sources().items():
+            for obj in queryset.iterator(chunk_size=2000):
+                ref = f"{kind}:{obj.pk}"
+                display, kks, terms = self._terms_for(obj, languages)
+                obj_keys = self._make_keys(ref, [t for t in terms if t])
+                if len(keys) + len(obj_keys) > self.max_entries:
+                    break
+                keys.extend(obj_keys)
+                payloads[ref] = (str(display), kks, kind, obj.pk)
+                owned[ref] = list(obj_keys)
+        keys.sort()
+        with self._lock:
+            self._keys, self._payloads, self._owned_keys = keys, payloads, owned
+            self._built_at = self._polled_at = time.monotonic()
+            self._seq = seq
+
+    # --- Nhật ký thay đổi dùng chung giữa các worker ---
+    def _log_change(self, ref):
+        """Ghi "<kind>:<id>" vào nhật ký chung + vô hiệu kết quả gợi ý đã cache ở mọi worker."""
+        if self.changes is None:
+            return
+        seq = self.changes.append(ref)
+        with self._lock:
+            # Thay đổi liền kề thay đổi cuối cùng đã áp dụng -> chính là thay đổi vừa làm ở worker này
+            if seq is not None and self._built_at is not None and self._seq == seq - 1:
+                self._seq = seq
+        self.shared_cache.clear()
+
+    def _catch_up(self):
+        """Áp dụng các thay đổi từ worker khác. Trả về False nếu cần dựng lại toàn bộ."""
+        seq, changes = self.changes.since(self._seq)
+        if changes is None or REBUILD in changes:
+            return False
+
+        refs = {}
+        for ref in changes:
+            kind, pk = ref.split(':', 1)
+            refs.setdefault(kind, set()).add(pk)
+        languages = self._active_languages()
+        sources = self._sources()
+        for kind, pks in refs.items():
+            found = {str(obj.pk): obj for obj in sources[kind].filter(pk__in=pks)}
+            for pk in pks:
+                self._remove(f"{kind}:{pk}")
+                if pk in found:
+                    self._add(found[pk], kind, languages)
+        self._seq = seq
+        return True
+
+    def _ensure_built(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._built_at is None or now - self._built_at > self.ttl:
+                self.rebuild()
+            elif self.changes is not None and now - self._polled_at >= self.poll_interval:
+                self._polled_at = now
+                if not self._catch_up():
+                    self.rebuild()
+
+    # --- Cập nhật tăng dần ---
+    def update(self, obj):
+        kind = SUGGEST_MODELS.get(type(obj))
+        if not kind:
+            return
+        if self._built_at is not None:
+            with self._lock:
+                self._remove(f"{kind}:{obj.pk}")
+                self._add(obj, kind, self._active_languages())
+        # Sau commit: worker khác đọc lại đối tượng phải thấy dữ liệu mới
+        ref = f"{kind}:{obj.pk}"
+        transaction.on_commit(lambda: self._log_change(ref))
+
+    def remove(self, obj):
+        kind = SUGGEST_MODELS.get(type(obj))
+        if not kind:
+            return
+        if self._built_at is not None:
+            with self._lock:
+                self._remove(f"{kind}:{obj.pk}")
+        ref = f"{kind}:{obj.pk}"
+        transaction.on_commit(lambda: self._log_change(ref))
+
+    def invalidate(self):
+        """Dựng lại toàn bộ ở lần truy vấn kế tiếp, ở mọi worker (thay đổi hàng loạt / danh sách ngôn ngữ)."""
+        with self._lock:
+            self._built_at = None
+        self._log_change(REBUILD)
+
+    # --- Truy vấn ---
+    def suggest(self, query, limit=10):
+        prefix = fold_text(query)
+        if not prefix:
+            return []
+        self._ensure_built()
+
+        results, seen = [], set()
+        with self._lock:
+            i = bisect.bisect_left(self._keys, prefix)
+            while i < len(self._keys) and len(results) < limit:
+                key = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                ref = key.rsplit('\x00', 1)[1]
+                if ref not in seen:
+                    seen.add(ref)
+                    results.append(self._payloads[ref])
+                i += 1
+        return results
+
+    def __len__(self):
+        return len(self._keys)
+
+    def cached_suggest(self, query, limit=10):
+        """suggest() qua cache hai tầng: worker mới khởi động trả lời ngay từ cache chung, chưa cần dựng mảng."""
+        prefix = fold_text(query)
+        if not prefix or self.shared_cache is None:
+            return self.suggest(query, limit=limit)
+        return self.shared_cache.get_or_set(f"{prefix}:{limit}", lambda: self.suggest(query, limit=limit))
+
+
+suggestion_index = SuggestionIndex(shared_cache=suggest_cache)
+
+
+# =========================================================
+# 2. SIGNALS (Cập nhật tăng dần trong tiến trình hiện tại)
+# =========================================================
+@receiver(post_save)
+def update_suggestions_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if sender is SystemLanguage:
+        # Danh sách ngôn ngữ thay đổi -> dựng lại ở lần truy vấn kế tiếp
+        suggestion_index.invalidate()
+    elif sender in SUGGEST_MODELS:
+        suggestion_index.update(instance)
+
+
+@receiver(post_delete)
+def remove_suggestions_on_delete(sender, instance, **kwargs):
+    if sender in SUGGEST_MODELS:
+        suggestion_index.remove(instance)
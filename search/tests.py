@@ -0,0 +1,309 @@
+import os
+import tempfile
+import time
+import zipfile
+from types import SimpleNamespace
+
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import TwoTierCache
+from equipment.models import Equipment
+from search.extractors import extract_pages
+from search.indexing import fold_text, related_queryset, remove_objects
+from search.semantic import SemanticIndex
+from search.suggest import MAX_CATCH_UP, SuggestionIndex
+
+
+class FoldTextTests(SimpleTestCase):
+    """
+    Kiểm tra chuẩn hóa văn bản dùng chung cho chỉ mục và truy vấn.
+    """
+
+    def test_vietnamese_diacritics_are_removed(self):
+        self.assertEqual(fold_text("Bơm cấp nước Lò hơi"), "bom cap nuoc lo hoi")
+        self.assertEqual(fold_text("Đường ống ĐIỆN"), "duong ong dien")
+
+    def test_pinyin_tone_marks_are_removed(self):
+        self.assertEqual(fold_text("Chāolínjiè guōlú"), "chaolinjie guolu")
+
+    def test_hanzi_are_split_into_tokens(self):
+        self.assertEqual(fold_text("超临界锅炉"), "超 临 界 锅 炉")
+        self.assertEqual(fold_text("锅炉10LAC10"), "锅 炉 10lac10")
+
+    def test_empty_input(self):
+        self.assertEqual(fold_text(None), "")
+        self.assertEqual(fold_text(""), "")
+
+
+class RelatedReindexTests(SimpleTestCase):
+    def test_dependents_are_reindexed_as_querysets(self):
+        from details.models import Detail, EquipmentValue
+
+        # Queryset lười (chưa truy vấn) -> đánh lại chỉ mục theo lô trong thread nền
+        queryset = related_queryset(Detail(pk=1))
+        self.assertIs(queryset.model, EquipmentValue)
+        self.assertIsNone(related_queryset(EquipmentValue(pk=1)))
+
+    def test_auto_translated_detail_reindexes_its_values(self):
+        from details import models
+
+        detail = models.Detail(pk=1)
+        with patch.object(models.Detail, 'refresh_from_db'), \
+                patch.object(models.Detail, 'save_translations', return_value={'name_en'}), \
+                patch.object(models, 'auto_translate_model'), \
+                patch.object(models, 'auto_generate_description_logic'), \
+                patch('search.indexing.index_object'), \
+                patch('search.indexing.reindex_queryset') as reindex, \
+                patch('search.suggest.suggestion_index.update'), \
+                patch('core.translation_providers.glossary.update'):
+            detail.trigger_auto_translate()
+        # save_translations() dùng update() -> không có post_save, phải tự đánh lại EquipmentValue
+        self.assertIs(reindex.call_args[0][0].model, models.EquipmentValue)
+
+
+class RemoveObjectsTests(SimpleTestCase):
+    def test_entries_of_raw_deleted_rows_are_removed_in_batches(self):
+        batches = []
+
+        def filter(kind, object_id__in):
+            batches.append((kind, list(object_id__in)))
+            return SimpleNamespace(delete=lambda: None)
+
+        with patch('search.indexing.SearchEntry.objects.filter', side_effect=filter):
+            self.assertEqual(remove_objects('value', range(5), batch_size=2), 5)
+        self.assertEqual(batches, [('value', [0, 1]), ('value', [2, 3]), ('value', [4])])
+
+
+class ExtractionIndexTests(SimpleTestCase):
+    def test_reextraction_removes_entries_of_replaced_pages(self):
+        from search.extraction import save_pages
+        from search.models import ExtractedDocument
+
+        calls = []
+        pages = SimpleNamespace(
+            values_list=lambda *fields, flat=False: [11, 12],
+            all=lambda: SimpleNamespace(delete=lambda: calls.append('delete')),
+        )
+        extracted = ExtractedDocument(pk=1, content_hash='a' * 40)
+        with patch.object(ExtractedDocument, 'pages', pages), \
+                patch.object(extracted, 'save', lambda: calls.append('save')), \
+                patch('search.extraction.transaction.atomic'), \
+                patch('search.extraction.ExtractedPage.objects.bulk_create'), \
+                patch('search.extraction.remove_objects', side_effect=lambda *args: calls.append(args)):
+            save_pages(extracted, ['trang 1'])
+        self.assertEqual(calls, [('page', [11, 12]), 'delete', 'save'])
+
+    def test_replacing_document_file_reindexes_old_content(self):
+        from search.extraction import (
+            Document, extract_document_by_id, extract_on_document_save, reindex_content_hash,
+            remember_replaced_file_hash,
+        )
+
+        def save(document, stored_hash):
+            rows = SimpleNamespace(values_list=lambda *f, flat=False: SimpleNamespace(first=lambda: stored_hash))
+            with patch.object(Document.objects, 'filter', return_value=rows), \
+                    patch('search.extraction.run_in_background') as scheduled:
+                remember_replaced_file_hash(Document, document)
+                extract_on_document_save(Document, document)
+            return [call.args for call in scheduled.call_args_list]
+
+        document = Document(pk=5, title='Sơ đồ', collection_id=1, file_hash='b' * 40)
+        self.assertEqual(save(document, 'a' * 40), [(reindex_content_hash, 'a' * 40), (extract_document_by_id, 5)])
+        self.assertEqual(save(document, 'b' * 40), [(extract_document_by_id, 5)])
+
+
+class SuggestionIndexTests(SimpleTestCase):
+    """
+    Kiểm tra mảng gợi ý tiền tố (không cần DB: nạp trực tiếp đối tượng chưa lưu).
+    """
+
+    def setUp(self):
+        self.index = SuggestionIndex(max_entries=100, ttl=3600)
+        self.index._built_at = time.monotonic()
+        self.pump = Equipment(pk=1, name="Bơm cấp nước A", kks_code="10LAC10AP001")
+        self.fan = Equipment(pk=2, name="Quạt khói", kks_code="10HNC10AN001")
+        for obj in (self.pump, self.fan):
+            self.index._add(obj, 'equipment', ['vi'])
+
+    def test_prefix_matches_name_kks_and_inner_words(self):
+        self.assertEqual([r[3] for r in self.index.suggest("bom")], [1])
+        self.assertEqual([r[3] for r in self.index.suggest("10hnc")], [2])
+        self.assertEqual([r[3] for r in self.index.suggest("cấp nư")], [1])
+        self.assertEqual(self.index.suggest("xyz"), [])
+
+    def test_update_and_remove_replace_old_keys(self):
+        self.pump.name = "Bơm tuần hoàn"
+        self.index._remove("equipment:1")
+        self.index._add(self.pump, 'equipment', ['vi'])
+        self.assertEqual(self.index.suggest("bom cap"), [])
+        self.assertEqual(self.index.suggest("tuan")[0][0], "Bơm tuần hoàn")
+
+        self.index._remove("equipment:2")
+        self.assertEqual(self.index.suggest("quat"), [])
+
+    def test_memory_cap_is_respected(self):
+        small = SuggestionIndex(max_entries=3, ttl=3600)
+        small._built_at = time.monotonic()
+        self.assertTrue(small._add(self.fan, 'equipment', ['vi']))
+        self.assertFalse(small._add(self.pump, 'equipment', ['vi']))
+        self.assertLessEqual(len(small), 3)
+
+
+class FakeQuerySet(list):
+    def iterator(self, chunk_size=None):
+        return iter(list(self))
+
+    def filter(self, pk__in):
+        return [obj for obj in self if str(obj.pk) in pk__in]
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'suggest-tests'}})
+class SuggestionChangeLogTests(SimpleTestCase):
+    """Hai worker dùng chung nhật ký thay đổi: worker kia áp dụng từng thay đổi, không dựng lại toàn bộ."""
+
+    def setUp(self):
+        self.pump = Equipment(pk=1, name="Bơm cấp nước", kks_code="10LAC10AP001")
+        self.rows = FakeQuerySet([self.pump])
+        self.workers = []
+        for _ in range(2):
+            worker = SuggestionIndex(max_entries=100, ttl=3600, shared_cache=TwoTierCache('suggest-test'),
+                                     poll_interval=0)
+            worker._sources = lambda: {'equipment': self.rows, 'area': FakeQuerySet(), 'detail': FakeQuerySet()}
+            worker._active_languages = lambda: ['vi']
+            worker.rebuild()
+            self.workers.append(worker)
+        self.enterContext(patch('search.suggest.transaction.on_commit', lambda func: func()))
+
+    def test_change_is_applied_without_rebuild(self):
+        writer, reader = self.workers
+        fan = Equipment(pk=2, name="Quạt khói", kks_code="10HNC10AN001")
+        self.rows.append(fan)
+        writer.update(fan)
+        self.pump.name = "Bơm tuần hoàn"
+        writer.update(self.pump)
+        self.rows.remove(self.pump)
+        writer.remove(self.pump)
+
+        with patch.object(reader, 'rebuild', side_effect=AssertionError('full rebuild')), \
+                patch.object(writer, 'rebuild', side_effect=AssertionError('full rebuild')):
+            for worker in self.workers:
+                self.assertEqual([r[3] for r in worker.suggest("quat")], [2])
+                self.assertEqual(worker.suggest("bom"), [])
+
+    def test_invalidate_rebuilds_every_worker(self):
+        writer, reader = self.workers
+        writer.invalidate()
+        with patch.object(reader, 'rebuild') as rebuilt:
+            reader.suggest("bom")
+        rebuilt.assert_called_once()
+
+    def test_falling_too_far_behind_rebuilds(self):
+        writer, reader = self.workers
+        for _ in range(MAX_CATCH_UP + 1):
+            writer.update(self.pump)
+        with patch.object(reader, 'rebuild') as rebuilt:
+            reader.suggest("bom")
+        rebuilt.assert_called_once()
+
+
+class SemanticIndexTests(SimpleTestCase):
+    """
+    Kiểm tra chỉ mục TF-IDF trên đĩa (thư mục tạm).
+    """
+    DOCS = [
+        ('detail', 1, "Van chống xâm thực bảo vệ bơm cấp nước khỏi hiện tượng xâm thực"),
+        ('detail', 2, "Quạt khói hút khí thải ra ống khói"),
+        ('equipment', 3, "Bơm cấp nước chính cấp nước vào bao hơi"),
+    ]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = SemanticIndex('vi', root=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_query_ranks_by_meaning(self):
+        self.index.refresh(self.DOCS)
+        hits = self.index.query("cái gì bảo vệ bơm cấp nước khỏi xâm thực", top_k=2)
+        self.assertEqual([(kind, pk) for kind, pk, _ in hits], [('detail', 1), ('equipment', 3)])
+        self.assertEqual(self.index.query("không khớp gì"), [])
+
+    def test_refresh_only_reprocesses_changed_documents(self):
+        self.index.refresh(self.DOCS)
+        stats = self.index.refresh(self.DOCS)
+        self.assertEqual(stats, {'total': 3, 'changed': 0, 'removed': 0})
+
+        docs = [self.DOCS[0], ('detail', 2, "Quạt gió cấp không khí cho lò hơi")]
+        stats = self.index.refresh(docs)
+        self.assertEqual(stats, {'total': 2, 'changed': 1, 'removed': 1})
+        self.assertEqual(self.index.query("quạt gió lò hơi")[0][:2], ('detail', 2))
+
+
+class ExtractorTests(SimpleTestCase):
+    """
+    Kiểm tra tách trang của DOCX (ngắt trang thủ công) và TXT (form feed).
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_docx_pages_split_on_page_break(self):
+        ns = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+        body = (
+            f'<w:document {ns}><w:body>'
+            '<w:p><w:r><w:t>Bơm cấp nước</w:t></w:r></w:p>'
+            '<w:p><w:r><w:br w:type="page"/><w:t>10LAC10AP001</w:t></w:r></w:p>'
+            '</w:body></w:document>'
+        )
+        path = os.path.join(self.tmp.name, 'manual.docx')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('word/document.xml', body)
+        self.assertEqual(extract_pages(path), ['Bơm cấp nước', '10LAC10AP001'])
+
+    def test_docx_manual_and_rendered_break_count_once(self):
+        # Word ghi cả w:br type=page lẫn lastRenderedPageBreak tại cùng một chỗ ngắt trang
+        ns = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+        body = (
+            f'<w:document {ns}><w:body>'
+            '<w:p><w:r><w:lastRenderedPageBreak/><w:t>Trang 1</w:t></w:r></w:p>'
+            '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+            '<w:p><w:r><w:lastRenderedPageBreak/><w:t>Trang 2</w:t></w:r></w:p>'
+            '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+            '<w:p><w:r><w:lastRenderedPageBreak/><w:t>Trang 3</w:t></w:r></w:p>'
+            '</w:body></w:document>'
+        )
+        path = os.path.join(self.tmp.name, 'word.docx')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('word/document.xml', body)
+        self.assertEqual(extract_pages(path), ['Trang 1', 'Trang 2', 'Trang 3'])
+
+    def test_local_file_path_copies_non_filesystem_storage(self):
+        from django.core.files.base import ContentFile
+
+        from search.extraction import local_file_path
+
+        class RemoteFile(ContentFile):
+            @property
+            def path(self):
+                raise NotImplementedError
+
+            def open(self, mode='rb'):
+                self.seek(0)
+                return self
+
+        document = type('Document', (), {'file': RemoteFile(b'Trang 1', name='remote.txt')})()
+        with local_file_path(document) as path:
+            self.assertEqual(extract_pages(path), ['Trang 1'])
+        self.assertFalse(os.path.exists(path))
+
+    def test_txt_pages_split_on_form_feed(self):
+        path = os.path.join(self.tmp.name, 'notes.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("Trang 1\fTrang   2\n")
+        self.assertEqual(extract_pages(path), ['Trang 1', 'Trang 2'])
@@ -1,8 +1,16 @@
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
 from django.template.response import TemplateResponse
+from django.utils.translation import get_language
 
 from wagtail.models import Page
 
+from .indexing import search_entries
+from .models import SearchEntry
+from .semantic import semantic_search
+from .suggest import suggestion_index
+
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
 # uncomment the following line and the lines indicated in the search function
@@ -27,6 +35,16 @@ def search(request):
     else:
         search_results = Page.objects.none()
 
+    # Chỉ mục hợp nhất (Thiết bị, Khu vực, Thông số) - chỉ dành cho người dùng có quyền vào Admin
+    # mode=semantic: tìm theo nghĩa trên phần mô tả (TF-IDF offline)
+    search_mode = request.GET.get("mode", "keyword")
+    entry_results = []
+    if search_query and request.user.has_perm("wagtailadmin.access_admin"):
+        if search_mode == "semantic":
+            entry_results = _semantic_entries(search_query, request.GET.get("lang") or get_language())
+        else:
+            entry_results = search_entries(search_query)
+
     # Pagination
     paginator = Paginator(search_results, 10)
     try:
@@ -42,5 +60,47 @@ def search(request):
         {
             "search_query": search_query,
             "search_results": search_results,
+            "entry_results": entry_results,
+            "search_mode": search_mode,
         },
     )
+
+
+def _semantic_entries(query, language, top_k=20):
+    """Ghép kết quả (kind, id, score) của chỉ mục ngữ nghĩa với bản ghi SearchEntry để hiển thị."""
+    hits = semantic_search(query, language=language, top_k=top_k)
+    if not hits:
+        return []
+    entries = {
+        (entry.kind, entry.object_id): entry
+        for entry in SearchEntry.objects.filter(object_id__in=[object_id for _, object_id, _ in hits])
+    }
+    results = []
+    for kind, object_id, score in hits:
+        entry = entries.get((kind, object_id))
+        if entry:
+            entry.score = score
+            results.append(entry)
+    return results
+
+
+@require_GET
+def suggest(request):
+    """
+    Gợi ý tức thời (typeahead) cho ô tìm kiếm trong Admin.
+    Trả về JSON gọn: {"r": [[tên hiển thị, mã KKS, url], ...]}
+    """
+    query = request.GET.get("q", "")[:100]
+    try:
+        limit = min(int(request.GET.get("limit", 10)), 30)
+    except ValueError:
+        limit = 10
+
+    rows = []
+    for display, kks, kind, object_id in suggestion_index.cached_suggest(query, limit=limit):
+        url = SearchEntry(kind=kind, object_id=object_id).get_admin_url()
+        rows.append([display, kks, url])
+
+    response = JsonResponse({"r": rows})
+    response["Cache-Control"] = "private, max-age=60"
+    return response
@@ -0,0 +1,21 @@
+from django.templatetags.static import static
+from django.urls import path, reverse
+from django.utils.html import format_html
+from wagtail import hooks
+
+from . import views
+
+
+@hooks.register('register_admin_urls')
+def register_search_urls():
+    return [path('search/suggest/', views.suggest, name='search_suggest')]
+
+
+@hooks.register('insert_global_admin_js')
+def suggest_admin_js():
+    # Gắn gợi ý tức thời vào các ô tìm kiếm của Admin (Thiết bị, Khu vực, Thông số...)
+    return format_html(
+        '<script defer src="{}" data-suggest-url="{}"></script>',
+        static('search/js/suggest.js'),
+        reverse('search_suggest'),
+    )